@@ -1,14 +1,77 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from routers import conversations, webhooks
 
-from fastapi import FastAPI
+from db.connection import close_pool, db_conn, open_pool
+from routers import (
+    conversations,
+    dashboard,
+    export,
+    metrics,
+    search,
+    webhooks,
+)
+from services.kb_index import get_index
+from services.lifecycle import (
+    DrainMiddleware,
+    begin_drain,
+    install_drain_handler,
+    uninstall_drain_handler,
+)
+from services.metrics import RequestMetricsMiddleware
+from services.partitions import ensure_partitions
+from services.perception_store import perception_store
+from services.pubsub import start_listener, stop_listener
+from services.tavus import TavusUnavailableError, close_client, open_client
+from services.webhook_inbox import start_workers
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from psycopg_pool import PoolTimeout, TooManyRequests
 
 _BASE = Path(__file__).resolve().parent
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm everything the first request would otherwise pay for, in
+    # parallel: pool connections, a Tavus connection and the
+    # knowledge-base index (which also imports numpy off the boot path).
+    await asyncio.gather(
+        open_pool(wait=True), open_client(), asyncio.to_thread(get_index)
+    )
+    # Writes fail without a partition for the current month; retention.py
+    # keeps months ahead too, this covers a missed run.
+    async with db_conn() as conn:
+        created = await ensure_partitions(conn)
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+    await start_listener()
+    start_workers()
+    install_drain_handler()
+    yield
+    # Normally already started by the signal; covers other shutdowns.
+    await begin_drain()
+    flushed = await perception_store.flush()
+    if flushed:
+        logger.info(
+            "Flushed buffered perception for %s conversations", flushed
+        )
+    uninstall_drain_handler()
+    await stop_listener()
+    await close_client()
+    await close_pool()
+
 
-app = FastAPI(title="Procedure Companion")
+app = FastAPI(title="Procedure Companion", lifespan=lifespan)
+
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(DrainMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,7 +80,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(PoolTimeout)
+@app.exception_handler(TooManyRequests)
+async def db_pool_exhausted(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(TavusUnavailableError)
+async def tavus_unavailable(request: Request, exc: TavusUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Video service temporarily unavailable"},
+        headers={"Retry-After": "5"},
+    )
+
+
 app.include_router(conversations.router, prefix="/api")
 app.include_router(webhooks.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(export.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 
 app.mount("/static", StaticFiles(directory=_BASE / "data"), name="static")
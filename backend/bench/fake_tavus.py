@@ -0,0 +1,120 @@
+"""Local stand-in for the Tavus endpoints used by services/tavus.py.
+
+Run it, then point the backend at it:
+
+    uv run uvicorn bench.fake_tavus:app --port 9000
+    TAVUS_BASE_URL=http://127.0.0.1:9000 uv run uvicorn app:app --port 8000
+
+FAKE_TAVUS_LATENCY_MS adds a fixed delay to every response and
+FAKE_TAVUS_ERROR_RATE makes that fraction of calls return 503, to exercise
+retries and the circuit breaker. Documents and personas are also stubbed so
+``tavus_setup.py sync`` can run against it (set TAVUS_BASE_URL there too);
+documents report "ready" FAKE_TAVUS_DOCUMENT_SECONDS after upload.
+"""
+
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, HTTPException, Request
+
+LATENCY_MS = float(os.getenv("FAKE_TAVUS_LATENCY_MS", "50"))
+ERROR_RATE = float(os.getenv("FAKE_TAVUS_ERROR_RATE", "0"))
+DOCUMENT_SECONDS = float(os.getenv("FAKE_TAVUS_DOCUMENT_SECONDS", "3"))
+
+app = FastAPI(title="Fake Tavus")
+
+_conversations: dict[str, dict] = {}
+_documents: dict[str, dict] = {}
+_personas: dict[str, dict] = {}
+
+
+async def _simulate() -> None:
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        raise HTTPException(status_code=503, detail="Simulated outage")
+
+
+@app.post("/v2/conversations")
+async def create_conversation(request: Request):
+    await _simulate()
+    body = await request.json()
+    conversation_id = f"c{uuid.uuid4().hex[:15]}"
+    _conversations[conversation_id] = {
+        "status": "active",
+        "callback_url": body.get("callback_url"),
+    }
+    return {
+        "conversation_id": conversation_id,
+        "conversation_name": body.get("conversation_name", ""),
+        "conversation_url": f"https://tavus.daily.co/{conversation_id}",
+        "status": "active",
+        "callback_url": body.get("callback_url"),
+    }
+
+
+@app.post("/v2/conversations/{conversation_id}/end")
+async def end_conversation(conversation_id: str):
+    await _simulate()
+    conversation = _conversations.get(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    conversation["status"] = "ended"
+    return {}
+
+
+@app.post("/v2/documents")
+async def create_document(request: Request):
+    await _simulate()
+    body = await request.json()
+    document_id = f"d{uuid.uuid4().hex[:15]}"
+    _documents[document_id] = {**body, "created": time.monotonic()}
+    return {
+        "document_id": document_id,
+        "document_name": body.get("document_name"),
+        "status": "started",
+    }
+
+
+@app.get("/v2/documents/{document_id}")
+async def get_document(document_id: str):
+    await _simulate()
+    document = _documents.get(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    ready = time.monotonic() - document["created"] >= DOCUMENT_SECONDS
+    return {
+        "document_id": document_id,
+        "document_name": document.get("document_name"),
+        "status": "ready" if ready else "processing",
+    }
+
+
+@app.delete("/v2/documents/{document_id}")
+async def delete_document(document_id: str):
+    await _simulate()
+    if _documents.pop(document_id, None) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {}
+
+
+@app.post("/v2/personas")
+async def create_persona(request: Request):
+    await _simulate()
+    persona_id = f"p{uuid.uuid4().hex[:11]}"
+    _personas[persona_id] = await request.json()
+    return {"persona_id": persona_id, "status": "active"}
+
+
+@app.patch("/v2/personas/{persona_id}")
+async def patch_persona(persona_id: str, request: Request):
+    await _simulate()
+    persona = _personas.get(persona_id)
+    if persona is None:
+        raise HTTPException(status_code=404, detail="Persona not found")
+    for op in await request.json():
+        persona[op["path"].strip("/")] = op.get("value")
+    return {"persona_id": persona_id}
@@ -0,0 +1,274 @@
+"""Open-loop load driver for the backend.
+
+Start Postgres, the fake Tavus server and the app (see bench/fake_tavus.py),
+then from backend/:
+
+    uv run python -m bench.load --duration 30 --create-rate 2 \\
+        --perception-rate 20 --webhook-rate 2 --summary-rate 50 --sse-rate 2
+
+Each scenario fires requests at a fixed arrival rate (requests/second)
+regardless of how fast earlier ones complete, so queueing in the server
+shows up as latency rather than as a lower offered load. The report lists
+throughput and p50/p95/p99 latency per endpoint; ``--json`` writes the same
+numbers to a file so releases can be compared.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from bench.synthetic import synthetic_observations, synthetic_transcript
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        if ok:
+            self.samples[name].append(seconds)
+        else:
+            self.errors[name] += 1
+
+    def report(self, duration: float) -> dict:
+        rows = {}
+        for name in sorted(set(self.samples) | set(self.errors)):
+            samples = sorted(self.samples[name])
+            rows[name] = {
+                "ok": len(samples),
+                "errors": self.errors[name],
+                "throughput_rps": len(samples) / duration,
+                **{
+                    f"p{q}_ms": (
+                        samples[int(q / 100 * (len(samples) - 1))] * 1000
+                        if samples
+                        else None
+                    )
+                    for q in (50, 95, 99)
+                },
+            }
+        return rows
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.recorder = Recorder()
+        self.open_conversations: list[str] = []
+        self.summarized: list[str] = []
+        self.rng = random.Random(args.seed)
+        self.transcript = synthetic_transcript(args.transcript_minutes)
+        self.in_flight = asyncio.Semaphore(args.max_in_flight)
+
+    async def timed(self, name: str, request) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            resp = await request
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - start, False)
+            return None
+        self.recorder.record(
+            name, time.perf_counter() - start, resp.is_success
+        )
+        return resp
+
+    async def create(self, client: httpx.AsyncClient) -> None:
+        resp = await self.timed(
+            "POST /conversations",
+            client.post(
+                "/api/conversations",
+                json={"patient_name": f"Bench {self.rng.randrange(10**6)}"},
+            ),
+        )
+        if resp is not None and resp.is_success:
+            self.open_conversations.append(resp.json()["conversation_id"])
+
+    async def perception(self, client: httpx.AsyncClient) -> None:
+        if not self.open_conversations:
+            return
+        conversation_id = self.rng.choice(self.open_conversations)
+        await self.timed(
+            "POST /perception",
+            client.post(
+                f"/api/conversations/{conversation_id}/perception",
+                json={
+                    "observations": synthetic_observations(
+                        self.args.observations, self.rng.randrange(10**6)
+                    )
+                },
+            ),
+        )
+
+    def _take_open(self) -> str | None:
+        if not self.open_conversations:
+            return None
+        index = self.rng.randrange(len(self.open_conversations))
+        return self.open_conversations.pop(index)
+
+    async def _finish(
+        self, client: httpx.AsyncClient, conversation_id: str
+    ) -> None:
+        await self.timed(
+            "POST /webhooks/tavus",
+            client.post(
+                "/api/webhooks/tavus",
+                json={
+                    "event_type": "system.shutdown",
+                    "conversation_id": conversation_id,
+                    "properties": {"shutdown_reason": "bench"},
+                },
+            ),
+        )
+        await self.timed(
+            "POST /webhooks/tavus",
+            client.post(
+                "/api/webhooks/tavus",
+                json={
+                    "event_type": "application.transcription_ready",
+                    "conversation_id": conversation_id,
+                    "properties": {"transcript": self.transcript},
+                },
+            ),
+        )
+
+    async def webhook(self, client: httpx.AsyncClient) -> None:
+        conversation_id = self._take_open()
+        if conversation_id is None:
+            return
+        await self._finish(client, conversation_id)
+        self.summarized.append(conversation_id)
+
+    async def summary(self, client: httpx.AsyncClient) -> None:
+        if not self.summarized:
+            return
+        conversation_id = self.rng.choice(self.summarized)
+        await self.timed(
+            "GET /summary",
+            client.get(f"/api/conversations/{conversation_id}/summary"),
+        )
+
+    async def sse(self, client: httpx.AsyncClient) -> None:
+        """Subscribe, end the conversation, and time until the SSE event."""
+        conversation_id = self._take_open()
+        if conversation_id is None:
+            return
+        start = time.perf_counter()
+        ok = False
+        try:
+            async with client.stream(
+                "GET", f"/api/conversations/{conversation_id}/stream"
+            ) as resp:
+                self.recorder.record(
+                    "GET /stream (connect)",
+                    time.perf_counter() - start,
+                    resp.is_success,
+                )
+                if resp.is_success:
+                    finished = time.perf_counter()
+                    await self._finish(client, conversation_id)
+                    async for line in resp.aiter_lines():
+                        if line.startswith("data:"):
+                            ok = True
+                            break
+                    self.recorder.record(
+                        "webhook -> SSE event",
+                        time.perf_counter() - finished,
+                        ok,
+                    )
+        except httpx.HTTPError:
+            self.recorder.record("GET /stream (connect)", 0, False)
+        self.summarized.append(conversation_id)
+
+    async def drive(self, scenario, rate: float, deadline: float) -> None:
+        if rate <= 0:
+            return
+        tasks = set()
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url, timeout=self.args.timeout
+        ) as client:
+            next_at = time.perf_counter()
+            while next_at < deadline:
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+                next_at += 1 / rate
+
+                async def run():
+                    async with self.in_flight:
+                        await scenario(client)
+
+                task = asyncio.create_task(run())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks, timeout=self.args.timeout)
+
+    async def run(self) -> dict:
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url, timeout=self.args.timeout
+        ) as client:
+            await asyncio.gather(
+                *(
+                    self.create(client)
+                    for _ in range(self.args.seed_conversations)
+                )
+            )
+        start = time.perf_counter()
+        deadline = start + self.args.duration
+        await asyncio.gather(
+            self.drive(self.create, self.args.create_rate, deadline),
+            self.drive(self.perception, self.args.perception_rate, deadline),
+            self.drive(self.webhook, self.args.webhook_rate, deadline),
+            self.drive(self.summary, self.args.summary_rate, deadline),
+            self.drive(self.sse, self.args.sse_rate, deadline),
+        )
+        return self.recorder.report(time.perf_counter() - start)
+
+
+def print_report(rows: dict) -> None:
+    print(
+        f"{'endpoint':<24} {'ok':>7} {'err':>5} {'rps':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, row in rows.items():
+        cells = [
+            f"{row[k]:>8.1f}" if row[k] is not None else f"{'-':>8}"
+            for k in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"{name:<24} {row['ok']:>7} {row['errors']:>5} "
+            f"{row['throughput_rps']:>8.1f} {' '.join(cells)}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--create-rate", type=float, default=2)
+    parser.add_argument("--perception-rate", type=float, default=20)
+    parser.add_argument("--webhook-rate", type=float, default=1)
+    parser.add_argument("--summary-rate", type=float, default=50)
+    parser.add_argument("--sse-rate", type=float, default=1)
+    parser.add_argument("--seed-conversations", type=int, default=20)
+    parser.add_argument("--observations", type=int, default=50)
+    parser.add_argument("--transcript-minutes", type=int, default=30)
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(LoadTest(args).run())
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
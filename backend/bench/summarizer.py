@@ -0,0 +1,98 @@
+"""Benchmark generate_summary on synthetic transcripts of increasing length.
+
+Usage (from backend/):
+    uv run python -m bench.summarizer [--minutes 10 60 180] [--repeat 5]
+
+Compares TopicMatcher against the previous per-keyword substring scan,
+with the stock taxonomy and with a taxonomy padded with extra keywords.
+"""
+
+import argparse
+import statistics
+import time
+
+from bench.synthetic import synthetic_transcript
+from services.summarizer import (
+    TOPIC_KEYWORDS,
+    TopicMatcher,
+    generate_summary,
+)
+
+
+def legacy_topics(transcript: list[dict], taxonomy: dict) -> list[str]:
+    """The substring scan generate_summary used before TopicMatcher."""
+    full_text = " ".join(
+        entry.get("content", "") for entry in transcript
+    ).lower()
+    return [
+        topic
+        for topic, keywords in taxonomy.items()
+        if any(kw in full_text for kw in keywords)
+    ]
+
+
+def matcher_topics(transcript: list[dict], matcher: TopicMatcher) -> set:
+    found = set()
+    for entry in transcript:
+        found.update(matcher.scan(entry.get("content", "")))
+    return found
+
+
+def expanded_taxonomy(extra: int) -> dict[str, list[str]]:
+    """TOPIC_KEYWORDS plus ``extra`` keywords that never occur."""
+    taxonomy = {topic: list(kws) for topic, kws in TOPIC_KEYWORDS.items()}
+    if extra:
+        taxonomy["Synthetic"] = [f"zzkeyword{i}" for i in range(extra)]
+    return taxonomy
+
+
+def _time(fn, *args, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--minutes", type=int, nargs="+", default=[10, 60, 180]
+    )
+    parser.add_argument(
+        "--extra-keywords",
+        type=int,
+        nargs="+",
+        default=[0, 200],
+        help="grow the taxonomy to show how each approach scales with it",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'minutes':>8} {'utterances':>10} {'words':>8} {'keywords':>9} "
+        f"{'matcher ms':>11} {'legacy ms':>10} {'summary ms':>11}"
+    )
+    for minutes in args.minutes:
+        transcript = synthetic_transcript(minutes)
+        words = sum(len(e["content"].split()) for e in transcript)
+        summary_ms = _time(generate_summary, transcript, repeat=args.repeat)
+        for extra in args.extra_keywords:
+            taxonomy = expanded_taxonomy(extra)
+            keywords = sum(len(kws) for kws in taxonomy.values())
+            matcher = TopicMatcher(taxonomy)
+            matcher_ms = _time(
+                matcher_topics, transcript, matcher, repeat=args.repeat
+            )
+            legacy_ms = _time(
+                legacy_topics, transcript, taxonomy, repeat=args.repeat
+            )
+            print(
+                f"{minutes:>8} {len(transcript):>10} {words:>8} {keywords:>9} "
+                f"{matcher_ms:>11.2f} {legacy_ms:>10.2f} {summary_ms:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Synthetic transcripts and perception observations for benchmarks."""
+
+import random
+
+from services.summarizer import QUESTION_STARTERS, TOPIC_KEYWORDS
+
+FILLER = (
+    "the and you it that your will be with this for about after before "
+    "doctor clinic nurse day week feel okay really great separate generate "
+    "morning night usually normal body follow"
+).split()
+
+EMOTIONS = ["neutral", "calm", "anxious", "confused", "distressed"]
+EMOTION_WEIGHTS = [50, 25, 15, 8, 2]
+
+UTTERANCES_PER_MINUTE = 12
+
+
+def synthetic_transcript(minutes: int, seed: int = 0) -> list[dict]:
+    """Roughly ``minutes`` of alternating patient/replica speech."""
+    rng = random.Random(seed)
+    keywords = [kw for kws in TOPIC_KEYWORDS.values() for kw in kws]
+    starters = sorted(QUESTION_STARTERS)
+    transcript = []
+    for i in range(minutes * UTTERANCES_PER_MINUTE):
+        role = "user" if i % 2 == 0 else "replica"
+        length = rng.randint(6, 14) if role == "user" else rng.randint(20, 45)
+        words = [
+            rng.choice(keywords) if rng.random() < 0.08 else rng.choice(FILLER)
+            for _ in range(length)
+        ]
+        if role == "user" and rng.random() < 0.4:
+            words[0] = rng.choice(starters)
+            words[-1] += "?"
+        transcript.append(
+            {
+                "role": role,
+                "content": " ".join(words).capitalize(),
+                "timestamp": f"{i * 5 // 60:02d}:{i * 5 % 60:02d}",
+            }
+        )
+    return transcript
+
+
+def synthetic_observations(count: int, seed: int = 0) -> list[dict]:
+    """Raven-1 style emotion observations, as the frontend posts them."""
+    rng = random.Random(seed)
+    return [
+        {"emotion": emotion}
+        for emotion in rng.choices(EMOTIONS, EMOTION_WEIGHTS, k=count)
+    ]
@@ -19,3 +19,144 @@ WEBHOOK_URL = require_env("WEBHOOK_URL")
 DATABASE_URL = os.getenv(
     "DATABASE_URL", "postgresql://localhost:5432/procedure_companion"
 )
+
+# Async Postgres pool (psycopg_pool). Requests beyond max_size wait in a
+# bounded queue for up to DB_POOL_TIMEOUT seconds before failing.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_MAX_WAITING = int(os.getenv("DB_POOL_MAX_WAITING", "500"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Per-connection server-side statement cache: a query is prepared after
+# DB_PREPARE_THRESHOLD executions and up to DB_PREPARED_MAX are kept.
+DB_PREPARE_THRESHOLD = int(os.getenv("DB_PREPARE_THRESHOLD", "2"))
+DB_PREPARED_MAX = int(os.getenv("DB_PREPARED_MAX", "100"))
+
+# Webhook inbox: events are persisted on receipt and drained by background
+# workers with at-least-once delivery and per-conversation ordering.
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_RETRY_BASE_SECONDS = float(
+    os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "2")
+)
+WEBHOOK_RETRY_MAX_SECONDS = float(
+    os.getenv("WEBHOOK_RETRY_MAX_SECONDS", "300")
+)
+WEBHOOK_LEASE_SECONDS = float(os.getenv("WEBHOOK_LEASE_SECONDS", "120"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "1"))
+WEBHOOK_INBOX_RETENTION_HOURS = float(
+    os.getenv("WEBHOOK_INBOX_RETENTION_HOURS", "72")
+)
+# Recent webhook event keys remembered per process, so redeliveries are
+# dropped without a database round trip.
+WEBHOOK_DEDUP_MEMORY_SIZE = int(
+    os.getenv("WEBHOOK_DEDUP_MEMORY_SIZE", "10000")
+)
+
+# Shared Tavus HTTP client
+TAVUS_BASE_URL = os.getenv("TAVUS_BASE_URL", "https://tavusapi.com")
+TAVUS_TIMEOUT = float(os.getenv("TAVUS_TIMEOUT", "30"))
+TAVUS_MAX_CONNECTIONS = int(os.getenv("TAVUS_MAX_CONNECTIONS", "20"))
+TAVUS_MAX_IN_FLIGHT = int(os.getenv("TAVUS_MAX_IN_FLIGHT", "20"))
+TAVUS_MAX_RETRIES = int(os.getenv("TAVUS_MAX_RETRIES", "3"))
+TAVUS_RETRY_BASE_SECONDS = float(os.getenv("TAVUS_RETRY_BASE_SECONDS", "0.5"))
+TAVUS_BREAKER_THRESHOLD = int(os.getenv("TAVUS_BREAKER_THRESHOLD", "5"))
+TAVUS_BREAKER_RESET_SECONDS = float(
+    os.getenv("TAVUS_BREAKER_RESET_SECONDS", "30")
+)
+TAVUS_HTTP2 = os.getenv("TAVUS_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Live (utterance-level) summaries of calls that never produce a transcript
+# are purged after this long without an utterance.
+LIVE_SUMMARY_TTL_SECONDS = float(
+    os.getenv("LIVE_SUMMARY_TTL_SECONDS", "21600")
+)
+
+# Idempotency-Key results for POST /conversations, kept per process.
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+# Serialized GET /summary responses cached per process (LRU). Entries are
+# invalidated on writes; the TTL bounds staleness if an invalidation is lost.
+SUMMARY_CACHE_MAX_CONVERSATIONS = int(
+    os.getenv("SUMMARY_CACHE_MAX_CONVERSATIONS", "1000")
+)
+SUMMARY_CACHE_TTL_SECONDS = float(
+    os.getenv("SUMMARY_CACHE_TTL_SECONDS", "300")
+)
+
+# Perception store: "memory" (per process, bounded, TTL-evicted) or
+# "postgres" (durable, shared by every worker).
+PERCEPTION_STORE = os.getenv("PERCEPTION_STORE", "memory")
+PERCEPTION_TTL_SECONDS = float(os.getenv("PERCEPTION_TTL_SECONDS", "21600"))
+PERCEPTION_MAX_CONVERSATIONS = int(
+    os.getenv("PERCEPTION_MAX_CONVERSATIONS", "5000")
+)
+# Optional per-time-bucket emotion counts (0 disables bucketing).
+PERCEPTION_BUCKET_SECONDS = float(os.getenv("PERCEPTION_BUCKET_SECONDS", "0"))
+
+# Cross-worker pub/sub for SSE: "postgres" (LISTEN/NOTIFY) or "memory"
+# (single process only).
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "postgres")
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_IDLE_TIMEOUT_SECONDS = float(os.getenv("SSE_IDLE_TIMEOUT_SECONDS", "600"))
+SSE_MAX_LISTENERS_PER_CONVERSATION = int(
+    os.getenv("SSE_MAX_LISTENERS_PER_CONVERSATION", "5")
+)
+# Care-team escalation stream: consoles per worker, and events buffered per
+# console before it is told to resync.
+ESCALATION_STREAM_MAX_CLIENTS = int(
+    os.getenv("ESCALATION_STREAM_MAX_CLIENTS", "500")
+)
+ESCALATION_STREAM_QUEUE_SIZE = int(
+    os.getenv("ESCALATION_STREAM_QUEUE_SIZE", "100")
+)
+
+# Limits for perception / batch ingestion bodies (JSON or NDJSON).
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(1024 * 1024)))
+
+# BM25 index over data/*.txt used to link summary questions to source
+# documents. Rebuilt automatically when the documents change.
+KB_INDEX_DIR = os.getenv(
+    "KB_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".kb_index"),
+)
+
+# Monthly partitions: months created ahead of time, and full months kept
+# before the current one by retention.py, which archives expired months to
+# ARCHIVE_DIR before dropping them.
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+RETENTION_MONTHS = int(os.getenv("RETENTION_MONTHS", "24"))
+ARCHIVE_DIR = os.getenv(
+    "ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"),
+)
+
+# Recap a returning patient's earlier sessions in the persona's context.
+PATIENT_HISTORY_CONTEXT = os.getenv(
+    "PATIENT_HISTORY_CONTEXT", "false"
+).lower() in ("1", "true", "yes")
+
+# Care-team views of every patient under /api/dashboard and /api/search.
+# They are not authenticated: enable them only where the API is not
+# publicly reachable.
+DASHBOARD_ENABLED = os.getenv("DASHBOARD_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Bulk export of all conversations under /api/export (the export.py CLI
+# works regardless).
+EXPORT_ENABLED = os.getenv("EXPORT_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Runtime sampling profiler endpoints under /api/debug/profiler.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
@@ -1,29 +1,93 @@
-from contextlib import contextmanager
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from psycopg2.pool import SimpleConnectionPool
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
 
-from config import DATABASE_URL
+from config import (
+    DATABASE_URL,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MAX_WAITING,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PREPARE_THRESHOLD,
+    DB_PREPARED_MAX,
+)
+from services.metrics import db_pool_wait, gauge_labels, register_gauge
 
-_pool: SimpleConnectionPool | None = None
+_pool: AsyncConnectionPool | None = None
 
 
-def get_pool() -> SimpleConnectionPool:
+async def _configure(conn: AsyncConnection) -> None:
+    conn.prepared_max = DB_PREPARED_MAX
+
+
+def get_pool() -> AsyncConnectionPool:
     global _pool
     if _pool is None:
-        _pool = SimpleConnectionPool(minconn=1, maxconn=5, dsn=DATABASE_URL)
+        _pool = AsyncConnectionPool(
+            DATABASE_URL,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_waiting=DB_POOL_MAX_WAITING,
+            timeout=DB_POOL_TIMEOUT,
+            kwargs={"prepare_threshold": DB_PREPARE_THRESHOLD},
+            configure=_configure,
+            open=False,
+        )
     return _pool
 
 
-@contextmanager
-def db_conn():
-    """Yield a connection that auto-commits on success and returns to pool on exit."""
+async def open_pool(wait: bool = False) -> None:
+    """Open the pool (idempotent).
+
+    The app lifespan passes ``wait=True`` so DB_POOL_MIN_SIZE connections
+    are established before the first request, and a worker that cannot
+    reach the database fails at startup instead of on traffic.
+    """
+    pool = get_pool()
+    if pool.closed:
+        await pool.open(wait=wait, timeout=DB_POOL_TIMEOUT)
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def db_conn() -> AsyncIterator[AsyncConnection]:
+    """Yield a connection that auto-commits on success and returns to pool on exit.
+
+    Waits up to DB_POOL_TIMEOUT for a free connection; raises PoolTimeout on
+    expiry and TooManyRequests when DB_POOL_MAX_WAITING callers already wait.
+    """
     pool = get_pool()
-    conn = pool.getconn()
-    try:
+    if pool.closed:
+        await open_pool()
+    start = time.perf_counter()
+    async with pool.connection() as conn:
+        db_pool_wait.observe(time.perf_counter() - start)
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        pool.putconn(conn)
+
+
+def _pool_gauges() -> dict:
+    if _pool is None or _pool.closed:
+        return {}
+    stats = _pool.get_stats()
+    return {
+        gauge_labels(state="in_use"): stats["pool_size"]
+        - stats["pool_available"],
+        gauge_labels(state="idle"): stats["pool_available"],
+        gauge_labels(state="waiting"): stats.get("requests_waiting", 0),
+    }
+
+
+register_gauge(
+    "db_pool_connections",
+    "Pool connections in use and idle, and callers waiting for one.",
+    _pool_gauges,
+)
@@ -0,0 +1,19 @@
+-- Durable inbox for Tavus webhooks (acknowledge-first ingestion).
+CREATE TABLE webhook_inbox (
+    id              BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    event_type      TEXT NOT NULL,
+    body            JSONB NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'done', 'dead')),
+    attempts        INT NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    received_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    available_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    processed_at    TIMESTAMPTZ
+);
+CREATE INDEX idx_webhook_inbox_pending_conversation
+    ON webhook_inbox(conversation_id, id) WHERE status = 'pending';
+CREATE INDEX idx_webhook_inbox_pending_available
+    ON webhook_inbox(available_at, id) WHERE status = 'pending';
+CREATE INDEX idx_webhook_inbox_processed_at
+    ON webhook_inbox(processed_at) WHERE status <> 'pending';
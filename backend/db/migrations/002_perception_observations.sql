@@ -0,0 +1,11 @@
+-- Durable perception store (PERCEPTION_STORE=postgres).
+CREATE TABLE perception_observations (
+    id              BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    observation     JSONB NOT NULL,
+    received_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX idx_perception_observations_conversation
+    ON perception_observations(conversation_id, id);
+CREATE INDEX idx_perception_observations_received_at
+    ON perception_observations(received_at);
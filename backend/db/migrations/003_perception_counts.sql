@@ -0,0 +1,30 @@
+-- Perception is stored as per-label counters instead of raw observations.
+
+BEGIN;
+
+CREATE TABLE perception_counts (
+    conversation_id TEXT NOT NULL,
+    bucket          BIGINT NOT NULL DEFAULT 0,
+    label           TEXT NOT NULL,
+    count           INT NOT NULL,
+    first_seen_at   TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (conversation_id, bucket, label)
+);
+CREATE INDEX idx_perception_counts_updated_at ON perception_counts(updated_at);
+
+-- No observation may arrive between the aggregation and the drop.
+LOCK TABLE perception_observations IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO perception_counts (conversation_id, label, count, first_seen_at, updated_at)
+SELECT conversation_id,
+       LOWER(COALESCE(observation->>'emotion', observation->>'label', 'neutral')),
+       COUNT(*),
+       MIN(received_at),
+       MAX(received_at)
+FROM perception_observations
+GROUP BY 1, 2;
+
+DROP TABLE perception_observations;
+
+COMMIT;
@@ -0,0 +1,33 @@
+-- Transcripts move from conversation_summaries.raw_transcript to one row
+-- per utterance. Dropping the column does not return its TOAST space until
+-- the table is rewritten (e.g. VACUUM FULL conversation_summaries).
+
+BEGIN;
+
+CREATE TABLE conversation_utterances (
+    conversation_id TEXT NOT NULL REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+    seq             INT  NOT NULL,
+    role            TEXT NOT NULL,
+    spoken_at       TEXT,  -- timestamp as sent by Tavus, if any
+    content         TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+
+-- No summary may be written between the backfill and the drop.
+LOCK TABLE conversation_summaries IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO conversation_utterances (conversation_id, seq, role, spoken_at, content)
+SELECT s.conversation_id,
+       u.ordinality - 1,
+       COALESCE(u.entry->>'role', ''),
+       u.entry->>'timestamp',
+       COALESCE(u.entry->>'content', '')
+FROM conversation_summaries s
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(s.raw_transcript) = 'array' THEN s.raw_transcript ELSE '[]' END
+) WITH ORDINALITY AS u(entry, ordinality)
+ORDER BY s.conversation_id, u.ordinality;
+
+ALTER TABLE conversation_summaries DROP COLUMN raw_transcript;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Full-text search indexes. CONCURRENTLY keeps the tables writable while the
+-- indexes build; run this file with psql (not inside a transaction).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_summaries_created_at
+    ON conversation_summaries(created_at DESC, conversation_id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_summaries_topics
+    ON conversation_summaries USING GIN (topics_covered);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_summaries_questions_fts
+    ON conversation_summaries USING GIN (
+        jsonb_to_tsvector('english', jsonb_path_query_array(questions_asked, '$[*].text'), '["string"]')
+    );
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_utterances_content_fts
+    ON conversation_utterances USING GIN (to_tsvector('english', content));
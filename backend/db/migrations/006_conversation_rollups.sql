@@ -0,0 +1,36 @@
+-- Dashboard rollups, backfilled from the existing tables.
+CREATE TABLE conversation_rollups (
+    conversation_id    TEXT PRIMARY KEY REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+    patient_name       TEXT NOT NULL,
+    created_at         TIMESTAMPTZ NOT NULL,
+    ended_at           TIMESTAMPTZ,
+    shutdown_reason    TEXT,
+    escalation_count   INT NOT NULL DEFAULT 0,
+    max_severity       SMALLINT NOT NULL DEFAULT 0,  -- 0 none, 1 medium, 2 high
+    last_escalation_at TIMESTAMPTZ,
+    topics_covered     TEXT[] NOT NULL DEFAULT '{}',
+    summarized         BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO conversation_rollups (
+    conversation_id, patient_name, created_at, ended_at, shutdown_reason,
+    escalation_count, max_severity, last_escalation_at, topics_covered, summarized
+)
+SELECT c.conversation_id, c.patient_name, c.created_at, c.ended_at, c.shutdown_reason,
+       COALESCE(e.escalation_count, 0), COALESCE(e.max_severity, 0), e.last_escalation_at,
+       COALESCE(s.topics_covered, '{}'), s.conversation_id IS NOT NULL
+FROM conversations c
+LEFT JOIN (
+    SELECT conversation_id,
+           COUNT(*) AS escalation_count,
+           MAX(CASE severity WHEN 'high' THEN 2 WHEN 'medium' THEN 1 ELSE 0 END) AS max_severity,
+           MAX(occurred_at) AS last_escalation_at
+    FROM escalation_events
+    GROUP BY conversation_id
+) e USING (conversation_id)
+LEFT JOIN conversation_summaries s USING (conversation_id);
+
+CREATE INDEX idx_rollups_created_at ON conversation_rollups(created_at DESC, conversation_id DESC);
+CREATE INDEX idx_rollups_ended_at ON conversation_rollups(ended_at);
+CREATE INDEX idx_escalations_occurred_at ON escalation_events(occurred_at);
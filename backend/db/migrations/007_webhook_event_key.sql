@@ -0,0 +1,6 @@
+-- Webhook deduplication key. Rows received before this migration keep a
+-- NULL key, which never conflicts. Run with psql (not inside a transaction)
+-- so the unique index builds without blocking webhook inserts.
+ALTER TABLE webhook_inbox ADD COLUMN IF NOT EXISTS event_key TEXT;
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS webhook_inbox_event_key_key
+    ON webhook_inbox(event_key);
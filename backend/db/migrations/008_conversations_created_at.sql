@@ -0,0 +1,4 @@
+-- Index for date-range exports. Run with psql (not inside a transaction) so
+-- conversation inserts are not blocked while it builds.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_created_at
+    ON conversations(created_at, conversation_id);
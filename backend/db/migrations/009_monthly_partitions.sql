@@ -0,0 +1,153 @@
+-- Monthly partitioning of conversations, conversation_rollups,
+-- conversation_summaries, conversation_utterances and escalation_events.
+--
+-- Postgres cannot partition a table in place, so each table is rebuilt:
+-- a partitioned copy is created with one partition per month from the
+-- oldest row to three months ahead, the rows are copied, the old table is
+-- dropped and the copy takes its name. Foreign keys to conversations are
+-- dropped (see schema.sql). This rewrites every row of these tables under
+-- an exclusive lock: stop the API and run it in a maintenance window.
+
+BEGIN;
+
+-- Month arithmetic below must not follow a local DST shift.
+SET LOCAL TIME ZONE 'UTC';
+
+CREATE TABLE conversations_new (
+    conversation_id TEXT NOT NULL,
+    patient_name    TEXT NOT NULL DEFAULT 'Anonymous',
+    shutdown_reason TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    ended_at        TIMESTAMPTZ,
+    CONSTRAINT conversations_new_pkey PRIMARY KEY (conversation_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE escalation_events_new (
+    id              UUID NOT NULL DEFAULT gen_random_uuid(),
+    conversation_id TEXT NOT NULL,
+    event_type      TEXT NOT NULL CHECK (event_type IN ('passive_emotion', 'doctor_redirect')),
+    severity        TEXT CHECK (severity IN ('medium', 'high')),
+    question_text   TEXT,
+    reason          TEXT NOT NULL,
+    occurred_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT escalation_events_new_pkey PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+
+CREATE TABLE conversation_summaries_new (
+    conversation_id  TEXT NOT NULL,
+    topics_covered   TEXT[]   NOT NULL DEFAULT '{}',
+    questions_asked  JSONB    NOT NULL DEFAULT '[]',
+    perception_notes TEXT,
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT conversation_summaries_new_pkey PRIMARY KEY (conversation_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE conversation_utterances_new (
+    conversation_id TEXT NOT NULL,
+    seq             INT  NOT NULL,
+    role            TEXT NOT NULL,
+    spoken_at       TEXT,
+    content         TEXT NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT conversation_utterances_new_pkey PRIMARY KEY (conversation_id, seq, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE conversation_rollups_new (
+    conversation_id    TEXT NOT NULL,
+    patient_name       TEXT NOT NULL,
+    created_at         TIMESTAMPTZ NOT NULL,
+    ended_at           TIMESTAMPTZ,
+    shutdown_reason    TEXT,
+    escalation_count   INT NOT NULL DEFAULT 0,
+    max_severity       SMALLINT NOT NULL DEFAULT 0,
+    last_escalation_at TIMESTAMPTZ,
+    topics_covered     TEXT[] NOT NULL DEFAULT '{}',
+    summarized         BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT conversation_rollups_new_pkey PRIMARY KEY (conversation_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Partitions are named <table>_YYYY_MM, as services/partitions.py expects.
+DO $$
+DECLARE
+    tbl   TEXT;
+    month TIMESTAMPTZ;
+    first TIMESTAMPTZ := date_trunc('month', LEAST(
+        (SELECT MIN(created_at) FROM conversations),
+        (SELECT MIN(occurred_at) FROM escalation_events),
+        (SELECT MIN(created_at) FROM conversation_summaries),
+        NOW()
+    ) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    last  TIMESTAMPTZ := date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                         + INTERVAL '3 months';
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['conversations', 'escalation_events', 'conversation_summaries',
+                               'conversation_utterances', 'conversation_rollups'] LOOP
+        month := first;
+        WHILE month <= last LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                tbl || '_' || to_char(month AT TIME ZONE 'UTC', 'YYYY_MM'),
+                tbl || '_new',
+                month,
+                month + INTERVAL '1 month'
+            );
+            month := month + INTERVAL '1 month';
+        END LOOP;
+    END LOOP;
+END $$;
+
+INSERT INTO conversations_new (conversation_id, patient_name, shutdown_reason, created_at, ended_at)
+SELECT conversation_id, patient_name, shutdown_reason, created_at, ended_at
+FROM conversations;
+
+INSERT INTO escalation_events_new (id, conversation_id, event_type, severity, question_text, reason, occurred_at)
+SELECT id, conversation_id, event_type, severity, question_text, reason, occurred_at
+FROM escalation_events;
+
+INSERT INTO conversation_summaries_new (conversation_id, topics_covered, questions_asked, perception_notes, created_at)
+SELECT conversation_id, topics_covered, questions_asked, perception_notes, created_at
+FROM conversation_summaries;
+
+-- Utterances were stored with the summary, in the same transaction.
+INSERT INTO conversation_utterances_new (conversation_id, seq, role, spoken_at, content, created_at)
+SELECT u.conversation_id, u.seq, u.role, u.spoken_at, u.content, COALESCE(s.created_at, c.created_at)
+FROM conversation_utterances u
+JOIN conversations c USING (conversation_id)
+LEFT JOIN conversation_summaries s USING (conversation_id);
+
+INSERT INTO conversation_rollups_new (
+    conversation_id, patient_name, created_at, ended_at, shutdown_reason, escalation_count,
+    max_severity, last_escalation_at, topics_covered, summarized, updated_at
+)
+SELECT conversation_id, patient_name, created_at, ended_at, shutdown_reason, escalation_count,
+       max_severity, last_escalation_at, topics_covered, summarized, updated_at
+FROM conversation_rollups;
+
+DROP TABLE conversation_rollups, conversation_utterances, conversation_summaries,
+           escalation_events, conversations;
+
+ALTER TABLE conversations_new RENAME TO conversations;
+ALTER TABLE conversations RENAME CONSTRAINT conversations_new_pkey TO conversations_pkey;
+ALTER TABLE escalation_events_new RENAME TO escalation_events;
+ALTER TABLE escalation_events RENAME CONSTRAINT escalation_events_new_pkey TO escalation_events_pkey;
+ALTER TABLE conversation_summaries_new RENAME TO conversation_summaries;
+ALTER TABLE conversation_summaries RENAME CONSTRAINT conversation_summaries_new_pkey TO conversation_summaries_pkey;
+ALTER TABLE conversation_utterances_new RENAME TO conversation_utterances;
+ALTER TABLE conversation_utterances RENAME CONSTRAINT conversation_utterances_new_pkey TO conversation_utterances_pkey;
+ALTER TABLE conversation_rollups_new RENAME TO conversation_rollups;
+ALTER TABLE conversation_rollups RENAME CONSTRAINT conversation_rollups_new_pkey TO conversation_rollups_pkey;
+
+CREATE INDEX idx_conversations_created_at ON conversations(created_at, conversation_id);
+CREATE INDEX idx_escalations_conversation_id ON escalation_events(conversation_id);
+CREATE INDEX idx_escalations_occurred_at ON escalation_events(occurred_at);
+CREATE INDEX idx_summaries_created_at ON conversation_summaries(created_at DESC, conversation_id DESC);
+CREATE INDEX idx_summaries_topics ON conversation_summaries USING GIN (topics_covered);
+CREATE INDEX idx_summaries_questions_fts ON conversation_summaries USING GIN (
+    jsonb_to_tsvector('english', jsonb_path_query_array(questions_asked, '$[*].text'), '["string"]')
+);
+CREATE INDEX idx_utterances_content_fts ON conversation_utterances USING GIN (to_tsvector('english', content));
+CREATE INDEX idx_rollups_created_at ON conversation_rollups(created_at DESC, conversation_id DESC);
+CREATE INDEX idx_rollups_ended_at ON conversation_rollups(ended_at);
+
+COMMIT;
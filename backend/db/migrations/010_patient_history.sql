@@ -0,0 +1,29 @@
+-- Patient keys and per-patient rollups. Keys are only ever supplied by the
+-- client, so existing sessions have none and start with no history (a key
+-- derived from the name would merge patients who share one).
+
+BEGIN;
+
+ALTER TABLE conversations ADD COLUMN patient_key TEXT;
+ALTER TABLE conversation_rollups ADD COLUMN patient_key TEXT;
+
+CREATE INDEX idx_rollups_patient ON conversation_rollups(patient_key, created_at DESC, conversation_id DESC)
+    WHERE patient_key IS NOT NULL;
+
+CREATE TABLE patient_rollups (
+    patient_key        TEXT PRIMARY KEY,
+    patient_name       TEXT NOT NULL,
+    session_count      INT NOT NULL DEFAULT 0,
+    summarized_count   INT NOT NULL DEFAULT 0,
+    topic_counts       JSONB NOT NULL DEFAULT '{}',
+    question_count     INT NOT NULL DEFAULT 0,
+    recent_questions   JSONB NOT NULL DEFAULT '[]',
+    escalation_count   INT NOT NULL DEFAULT 0,
+    max_severity       SMALLINT NOT NULL DEFAULT 0,
+    first_session_at   TIMESTAMPTZ NOT NULL,
+    last_session_at    TIMESTAMPTZ NOT NULL,
+    last_escalation_at TIMESTAMPTZ,
+    updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMIT;
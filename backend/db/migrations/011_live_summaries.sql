@@ -0,0 +1,15 @@
+-- Live summary state moves from per-process memory to a table every worker
+-- reads. State held in memory by running workers is not carried over; those
+-- calls are summarized from scratch.
+
+BEGIN;
+
+CREATE TABLE live_summaries (
+    conversation_id TEXT PRIMARY KEY,
+    next_seq        INT NOT NULL DEFAULT 0,
+    state           JSONB NOT NULL,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX idx_live_summaries_updated_at ON live_summaries(updated_at);
+
+COMMIT;
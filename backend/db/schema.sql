@@ -1,29 +1,148 @@
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
+-- Tables that grow with sessions are partitioned by month (UTC) on their
+-- timestamp; services/partitions.py creates the partitions and retention.py
+-- archives and drops expired ones. A partitioned table's primary key must
+-- include the partition key, so these tables cannot be referenced by
+-- foreign keys: the write paths check that the conversation exists instead,
+-- and retention drops every table's month together.
+
 CREATE TABLE conversations (
-    conversation_id TEXT PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
     patient_name    TEXT NOT NULL DEFAULT 'Anonymous',
+    patient_key     TEXT,  -- links a patient's sessions (services/patient_history.py)
     shutdown_reason TEXT,
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-    ended_at        TIMESTAMPTZ
-);
+    ended_at        TIMESTAMPTZ,
+    PRIMARY KEY (conversation_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Date-range exports (services/export.py).
+CREATE INDEX idx_conversations_created_at ON conversations(created_at, conversation_id);
 
 CREATE TABLE escalation_events (
-    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    conversation_id TEXT NOT NULL REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+    id              UUID NOT NULL DEFAULT gen_random_uuid(),
+    conversation_id TEXT NOT NULL,
     event_type      TEXT NOT NULL CHECK (event_type IN ('passive_emotion', 'doctor_redirect')),
     severity        TEXT CHECK (severity IN ('medium', 'high')),
     question_text   TEXT,
     reason          TEXT NOT NULL,
-    occurred_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
+    occurred_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
 CREATE INDEX idx_escalations_conversation_id ON escalation_events(conversation_id);
+CREATE INDEX idx_escalations_occurred_at ON escalation_events(occurred_at);
 
 CREATE TABLE conversation_summaries (
-    conversation_id  TEXT PRIMARY KEY REFERENCES conversations(conversation_id) ON DELETE CASCADE,
-    raw_transcript   JSONB,
+    conversation_id  TEXT NOT NULL,
     topics_covered   TEXT[]   NOT NULL DEFAULT '{}',
     questions_asked  JSONB    NOT NULL DEFAULT '[]',
     perception_notes TEXT,
-    created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (conversation_id, created_at)
+) PARTITION BY RANGE (created_at);
+-- Search (services/search.py): newest-first keyset pages, topic filter, and
+-- full-text over the text of each asked question.
+CREATE INDEX idx_summaries_created_at ON conversation_summaries(created_at DESC, conversation_id DESC);
+CREATE INDEX idx_summaries_topics ON conversation_summaries USING GIN (topics_covered);
+CREATE INDEX idx_summaries_questions_fts ON conversation_summaries USING GIN (
+    jsonb_to_tsvector('english', jsonb_path_query_array(questions_asked, '$[*].text'), '["string"]')
+);
+
+-- Append-only transcript storage, one row per utterance; kept out of the
+-- summary row so summary reads and updates never touch transcript bytes.
+-- Written in the summary's transaction, so created_at (and the month) match
+-- the summary row.
+CREATE TABLE conversation_utterances (
+    conversation_id TEXT NOT NULL,
+    seq             INT  NOT NULL,
+    role            TEXT NOT NULL,
+    spoken_at       TEXT,  -- timestamp as sent by Tavus, if any
+    content         TEXT NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (conversation_id, seq, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE INDEX idx_utterances_content_fts ON conversation_utterances USING GIN (to_tsvector('english', content));
+
+-- One row per conversation for the dashboard list view (services/rollups.py),
+-- updated in the same transaction as each create, escalation, shutdown and
+-- summary insert.
+CREATE TABLE conversation_rollups (
+    conversation_id    TEXT NOT NULL,
+    patient_name       TEXT NOT NULL,
+    patient_key        TEXT,
+    created_at         TIMESTAMPTZ NOT NULL,
+    ended_at           TIMESTAMPTZ,
+    shutdown_reason    TEXT,
+    escalation_count   INT NOT NULL DEFAULT 0,
+    max_severity       SMALLINT NOT NULL DEFAULT 0,  -- 0 none, 1 medium, 2 high
+    last_escalation_at TIMESTAMPTZ,
+    topics_covered     TEXT[] NOT NULL DEFAULT '{}',
+    summarized         BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (conversation_id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE INDEX idx_rollups_created_at ON conversation_rollups(created_at DESC, conversation_id DESC);
+CREATE INDEX idx_rollups_ended_at ON conversation_rollups(ended_at);
+CREATE INDEX idx_rollups_patient ON conversation_rollups(patient_key, created_at DESC, conversation_id DESC)
+    WHERE patient_key IS NOT NULL;
+
+-- One row per patient across sessions (services/patient_history.py),
+-- updated in the same transaction as each create, summary insert and
+-- escalation. Not partitioned: it is one small row per patient.
+CREATE TABLE patient_rollups (
+    patient_key        TEXT PRIMARY KEY,
+    patient_name       TEXT NOT NULL,  -- as given for the latest session
+    session_count      INT NOT NULL DEFAULT 0,
+    summarized_count   INT NOT NULL DEFAULT 0,
+    topic_counts       JSONB NOT NULL DEFAULT '{}',  -- topic -> sessions covering it
+    question_count     INT NOT NULL DEFAULT 0,
+    recent_questions   JSONB NOT NULL DEFAULT '[]',  -- newest last, at most 50
+    escalation_count   INT NOT NULL DEFAULT 0,
+    max_severity       SMALLINT NOT NULL DEFAULT 0,  -- 0 none, 1 medium, 2 high
+    first_session_at   TIMESTAMPTZ NOT NULL,
+    last_session_at    TIMESTAMPTZ NOT NULL,
+    last_escalation_at TIMESTAMPTZ,
+    updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE webhook_inbox (
+    id              BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    event_type      TEXT NOT NULL,
+    body            JSONB NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'done', 'dead')),
+    attempts        INT NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    received_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    available_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    processed_at    TIMESTAMPTZ,
+    -- SHA-256 of the raw webhook body; redeliveries conflict and are dropped.
+    event_key       TEXT UNIQUE
+);
+CREATE INDEX idx_webhook_inbox_pending_conversation
+    ON webhook_inbox(conversation_id, id) WHERE status = 'pending';
+CREATE INDEX idx_webhook_inbox_pending_available
+    ON webhook_inbox(available_at, id) WHERE status = 'pending';
+CREATE INDEX idx_webhook_inbox_processed_at
+    ON webhook_inbox(processed_at) WHERE status <> 'pending';
+
+CREATE TABLE perception_counts (
+    conversation_id TEXT NOT NULL,
+    bucket          BIGINT NOT NULL DEFAULT 0,
+    label           TEXT NOT NULL,
+    count           INT NOT NULL,
+    first_seen_at   TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (conversation_id, bucket, label)
+);
+CREATE INDEX idx_perception_counts_updated_at ON perception_counts(updated_at);
+
+-- Summary state built from live utterances (services/live_summary.py).
+CREATE TABLE live_summaries (
+    conversation_id TEXT PRIMARY KEY,
+    next_seq        INT NOT NULL DEFAULT 0,
+    state           JSONB NOT NULL,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
+CREATE INDEX idx_live_summaries_updated_at ON live_summaries(updated_at);
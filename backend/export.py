@@ -0,0 +1,76 @@
+"""
+Export conversations, summaries and escalations for research and QA.
+
+    uv run python export.py --since 2025-01-01 --until 2026-01-01 \
+        --format parquet -o export.parquet
+
+Streams through a server-side cursor (or COPY for CSV) in one read-only
+snapshot, so memory stays flat and live traffic is not blocked. Parquet
+needs `uv sync --extra parquet`. Writes to stdout without -o.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from psycopg import AsyncConnection
+
+from config import DATABASE_URL
+from services.export import (
+    FORMATS,
+    ExportFormatUnavailableError,
+    export_chunks,
+)
+
+
+async def export(args) -> None:
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with await AsyncConnection.connect(DATABASE_URL) as conn:
+            async for chunk in export_chunks(
+                conn,
+                args.format,
+                since=args.since,
+                until=args.until,
+                include_transcript=args.include_transcript,
+            ):
+                out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export conversations with their summaries and escalations."
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="conversations created at or after (ISO date or timestamp)",
+    )
+    parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        help="conversations created before (ISO date or timestamp)",
+    )
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument(
+        "--include-transcript",
+        action="store_true",
+        help="add each conversation's stored utterances",
+    )
+    parser.add_argument(
+        "-o", "--output", help="file to write (default stdout)"
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(export(args))
+    except ExportFormatUnavailableError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ConversationCreateRequest(BaseModel):
     patient_name: str
+    # Stable identifier linking a patient's sessions (e.g. a clinic ID).
+    # Without one the session is not linked to any other.
+    patient_key: Optional[str] = Field(None, min_length=1, max_length=128)
 
 
 class ConversationCreateResponse(BaseModel):
@@ -23,9 +26,47 @@ class EscalationLogResponse(BaseModel):
     escalation_id: str
 
 
+class PerceptionObservation(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    emotion: Optional[str] = None
+    label: Optional[str] = None
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: list[BatchItemResult]
+
+
+class UtteranceItem(BaseModel):
+    # Position in the call, numbered by the client from 0.
+    seq: int = Field(ge=0)
+    role: str
+    content: str
+    timestamp: Optional[str] = None
+
+
+class UtteranceLogRequest(BaseModel):
+    utterances: list[UtteranceItem]
+
+
+class QuestionSource(BaseModel):
+    document: str
+    section: Optional[str] = None
+
+
 class QuestionItem(BaseModel):
     text: str
     timestamp: Optional[str] = None
+    source: Optional[QuestionSource] = None
 
 
 class EscalationItem(BaseModel):
@@ -45,3 +86,76 @@ class ConversationSummaryResponse(BaseModel):
     escalations: list[EscalationItem]
     ended_at: Optional[str]
     perception_notes: Optional[str]
+
+
+class TranscriptUtterance(BaseModel):
+    seq: int
+    role: str
+    content: str
+    timestamp: Optional[str] = None
+
+
+class TranscriptPage(BaseModel):
+    conversation_id: str
+    utterances: list[TranscriptUtterance]
+    next_after_seq: Optional[int] = None
+
+
+class SearchResult(BaseModel):
+    conversation_id: str
+    patient_name: str
+    summarized_at: str
+    topics_covered: list[str]
+    snippets: list[str]
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchResult]
+    next_cursor: Optional[str] = None
+
+
+class DashboardConversation(BaseModel):
+    conversation_id: str
+    patient_name: str
+    patient_key: Optional[str] = None
+    created_at: str
+    ended_at: Optional[str] = None
+    shutdown_reason: Optional[str] = None
+    escalation_count: int
+    highest_severity: Optional[Literal["medium", "high"]] = None
+    last_escalation_at: Optional[str] = None
+    topics_covered: list[str]
+    summarized: bool
+
+
+class DashboardResponse(BaseModel):
+    items: list[DashboardConversation]
+    next_cursor: Optional[str] = None
+
+
+class PatientTopic(BaseModel):
+    topic: str
+    sessions: int
+
+
+class PatientQuestion(BaseModel):
+    conversation_id: str
+    text: str
+    timestamp: Optional[str] = None
+
+
+class PatientHistoryResponse(BaseModel):
+    patient_key: str
+    patient_name: str
+    session_count: int
+    summarized_count: int
+    first_session_at: str
+    last_session_at: str
+    topics: list[PatientTopic]
+    question_count: int
+    recent_questions: list[PatientQuestion]
+    escalation_count: int
+    highest_severity: Optional[Literal["medium", "high"]] = None
+    last_escalation_at: Optional[str] = None
+    sessions: list[DashboardConversation]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,238 @@
+"""
+Recompute stored summaries after TOPIC_KEYWORDS or QUESTION_STARTERS change.
+
+    uv run python resummarize.py --workers 4 --max-rate 500
+
+Transcripts are streamed in conversation_id order through a server-side
+cursor, summarized in a process pool, and written back one pipelined
+transaction per batch (rows whose summary did not change are left
+untouched). Progress is checkpointed after every written batch, so an
+interrupted run picks up where it stopped; pass --restart to start over.
+Each read window is its own short transaction and --max-rate caps rows per
+second, so the job can run next to live traffic.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import psycopg
+
+from config import DATABASE_URL
+from services.summary_cache import SUMMARY_CHANGED_CHANNEL
+
+DEFAULT_CHECKPOINT = ".resummarize.checkpoint"
+
+
+def _summarize_batch(
+    rows: list[tuple[str, str]],
+) -> list[tuple[str, list[str], str]]:
+    """Runs in a pool process: parse each transcript and summarize it."""
+    from services.summarizer import generate_summary
+
+    results = []
+    for conversation_id, transcript in rows:
+        summary = generate_summary(json.loads(transcript))
+        results.append(
+            (
+                conversation_id,
+                summary["topics_covered"],
+                json.dumps(summary["questions_asked"]),
+            )
+        )
+    return results
+
+
+def _read_checkpoint(path: str) -> tuple[str, int]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return "", 0
+    return data["last_conversation_id"], data["processed"]
+
+
+def _write_checkpoint(path: str, last_id: str, processed: int) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"last_conversation_id": last_id, "processed": processed}, f)
+    os.replace(tmp, path)
+
+
+def _read_batches(conn: psycopg.Connection, after: str, args):
+    """Yield transcript batches after ``after``, one short transaction per window."""
+    while True:
+        with conn.transaction():
+            # Last conversation of this window; None once fewer remain.
+            row = conn.execute(
+                """SELECT conversation_id FROM conversation_summaries
+                   WHERE conversation_id > %s
+                   ORDER BY conversation_id
+                   OFFSET %s LIMIT 1""",
+                (after, args.window - 1),
+            ).fetchone()
+            until = row[0] if row else None
+            with conn.cursor(name="resummarize") as cur:
+                cur.itersize = args.batch_size
+                # Grouping walks the (conversation_id, seq) primary key, so
+                # each transcript is assembled as the cursor advances.
+                cur.execute(
+                    """SELECT u.conversation_id,
+                              json_agg(json_build_object(
+                                  'role', u.role, 'content', u.content, 'timestamp', u.spoken_at
+                              ) ORDER BY u.seq)::text
+                       FROM conversation_utterances u
+                       JOIN conversation_summaries s USING (conversation_id)
+                       WHERE u.conversation_id > %s
+                         AND (%s::text IS NULL OR u.conversation_id <= %s)
+                       GROUP BY u.conversation_id
+                       ORDER BY u.conversation_id""",
+                    (after, until, until),
+                )
+                while rows := cur.fetchmany(args.batch_size):
+                    yield rows
+        if until is None:
+            return
+        after = until
+
+
+def _write_batch(
+    conn: psycopg.Connection, results: list[tuple[str, list[str], str]]
+) -> int:
+    """Update changed summaries in one pipelined transaction. Returns rows changed.
+
+    Each changed row is announced on the summary cache's channel, so API
+    workers drop their cached copy when the transaction commits.
+    """
+    with conn.transaction(), conn.cursor() as cur:
+        cur.executemany(
+            """WITH updated AS (
+                   UPDATE conversation_summaries
+                   SET topics_covered = %s, questions_asked = %s::jsonb
+                   WHERE conversation_id = %s
+                     AND (topics_covered IS DISTINCT FROM %s::text[]
+                          OR questions_asked IS DISTINCT FROM %s::jsonb)
+                   RETURNING conversation_id
+               )
+               SELECT pg_notify(%s, conversation_id) FROM updated""",
+            [
+                (
+                    topics,
+                    questions,
+                    conversation_id,
+                    topics,
+                    questions,
+                    SUMMARY_CHANGED_CHANNEL,
+                )
+                for conversation_id, topics, questions in results
+            ],
+        )
+        return cur.rowcount
+
+
+def resummarize(args) -> None:
+    after, processed = ("", 0)
+    if not args.restart:
+        after, processed = _read_checkpoint(args.checkpoint)
+        if after:
+            print(f"Resuming after {after} ({processed} already processed)")
+
+    changed = 0
+    batches = 0
+    start = time.monotonic()
+    started_with = processed
+    with (
+        psycopg.connect(DATABASE_URL) as read_conn,
+        psycopg.connect(DATABASE_URL, autocommit=True) as write_conn,
+        ProcessPoolExecutor(max_workers=args.workers) as pool,
+    ):
+        read_conn.read_only = True
+        # Never queue behind live transactions for long; retry the batch
+        # on the next run instead.
+        write_conn.execute("SET lock_timeout = '2s'")
+        pending: deque[tuple[Future, str, int]] = deque()
+
+        def drain_one() -> None:
+            nonlocal processed, changed, batches
+            future, last_id, size = pending.popleft()
+            results = future.result()
+            processed += size
+            # A dry run must not move the checkpoint past rows it did not
+            # write, or the real run would skip them.
+            if not args.dry_run:
+                changed += _write_batch(write_conn, results)
+                _write_checkpoint(args.checkpoint, last_id, processed)
+
+            done = processed - started_with
+            elapsed = time.monotonic() - start
+            if args.max_rate and done / args.max_rate > elapsed:
+                time.sleep(done / args.max_rate - elapsed)
+            batches += 1
+            if batches % 20 == 0:
+                print(
+                    f"{processed} processed, {changed} changed, "
+                    f"{done / max(elapsed, 1e-9):.0f} rows/s"
+                )
+
+        for rows in _read_batches(read_conn, after, args):
+            # Results are written in read order, so the checkpoint never
+            # skips a batch that is still being summarized.
+            pending.append(
+                (pool.submit(_summarize_batch, rows), rows[-1][0], len(rows))
+            )
+            if len(pending) >= args.workers * 2:
+                drain_one()
+        while pending:
+            drain_one()
+
+    print(
+        f"Done: {processed} processed, {changed} changed"
+        + (" (dry run, nothing written)" if args.dry_run else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompute conversation_summaries from stored transcripts."
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=20000,
+        help="rows read per transaction before the cursor is reopened",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=0,
+        help="maximum rows per second (0 = unlimited)",
+    )
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoint"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="summarize but write neither summaries nor the checkpoint",
+    )
+    args = parser.parse_args()
+    try:
+        resummarize(args)
+    except KeyboardInterrupt:
+        if not args.dry_run:
+            print(
+                f"Interrupted; rerun to resume from {args.checkpoint}",
+                file=sys.stderr,
+            )
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
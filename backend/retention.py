@@ -0,0 +1,81 @@
+"""
+Archive and drop monthly partitions older than the retention window.
+
+    uv run python retention.py --retention-months 24 --archive-dir /mnt/archive
+
+Run it daily (cron or a scheduled job). Each run first creates the coming
+months' partitions, then, for every expired month, writes each table's
+partition to ``<archive-dir>/<table>/<YYYY-MM>.csv.gz`` and drops it.
+A partition is only dropped after its archive is complete (or with
+--no-archive). --dry-run lists what would be archived and dropped.
+"""
+
+import argparse
+import asyncio
+
+from psycopg import AsyncConnection
+
+from config import ARCHIVE_DIR, DATABASE_URL, RETENTION_MONTHS
+from services.partitions import (
+    archive_partition,
+    drop_partition,
+    ensure_partitions,
+    expired_partitions,
+    partition_name,
+)
+
+
+async def run(args) -> None:
+    async with await AsyncConnection.connect(
+        DATABASE_URL, autocommit=True
+    ) as conn:
+        for name in await ensure_partitions(conn):
+            print(f"created {name}")
+        expired = await expired_partitions(conn, args.retention_months)
+        if not expired:
+            print("nothing to archive")
+            return
+        for table, month in expired:
+            name = partition_name(table, month)
+            if args.dry_run:
+                print(f"would archive and drop {name}")
+                continue
+            if not args.no_archive:
+                path, rows = await archive_partition(
+                    conn, table, month, args.archive_dir
+                )
+                print(f"archived {name}: {rows} rows -> {path}")
+            await drop_partition(conn, table, month)
+            print(f"dropped {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Archive and drop expired monthly partitions."
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=RETENTION_MONTHS,
+        help="full months to keep before the current one "
+        f"(default {RETENTION_MONTHS})",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=ARCHIVE_DIR,
+        help=f"where archives are written (default {ARCHIVE_DIR})",
+    )
+    parser.add_argument(
+        "--no-archive",
+        action="store_true",
+        help="drop expired partitions without archiving them",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if args.retention_months < 1:
+        parser.error("--retention-months must be at least 1")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,160 @@
 import json
+import uuid
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
 
+from config import BATCH_MAX_BYTES, BATCH_MAX_ITEMS, PATIENT_HISTORY_CONTEXT
 from db.connection import db_conn
 from models.schemas import (
+    BatchItemResult,
+    BatchResponse,
     ConversationCreateRequest,
     ConversationCreateResponse,
     ConversationSummaryResponse,
-    EscalationItem,
     EscalationLogRequest,
     EscalationLogResponse,
+    PerceptionObservation,
+    TranscriptPage,
+    TranscriptUtterance,
+    UtteranceLogRequest,
 )
-from services.sse import register_listener, unregister_listener
+from services.escalation_stream import publish_escalations
+from services.idempotency import IdempotencyKeyReusedError, run_once
+from services.live_summary import UtteranceGapError, add_utterances
+from services.patient_history import (
+    history_context,
+    patient_escalated,
+    patient_session_started,
+)
+from services.rollups import rollup_created, rollup_escalations
+from services.sse import (
+    TooManyListenersError,
+    event_stream,
+    register_listener,
+    stream_stats,
+)
+from services.summary_cache import get_summary_json
+from services.summary_cache import invalidate as invalidate_summary
 from services.tavus import create_conversation, end_conversation
 from services.webhook_processor import buffer_perception
 
 router = APIRouter()
 
 
-@router.post("/conversations", response_model=ConversationCreateResponse)
-async def create_conversation_endpoint(req: ConversationCreateRequest):
-    result = await create_conversation(req.patient_name)
-    with db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "INSERT INTO conversations (conversation_id, patient_name) VALUES (%s, %s)",
-                (result["conversation_id"], req.patient_name),
+async def _read_batch(
+    request: Request, key: str, max_items: int | None = BATCH_MAX_ITEMS
+) -> list[tuple[object, str]]:
+    """Read a batch body as ``(item, parse_error)`` pairs.
+
+    Accepts a JSON object ``{key: [...]}`` or, with Content-Type
+    ``application/x-ndjson``, one JSON item per line (a malformed line only
+    rejects that item). The body is streamed and capped at BATCH_MAX_BYTES
+    and ``max_items`` (None for no item cap).
+    """
+    ndjson = request.headers.get("content-type", "").startswith(
+        "application/x-ndjson"
+    )
+    items: list[tuple[object, str]] = []
+    chunks: list[bytes] = []
+    pending = b""
+    size = 0
+
+    def add_line(line: bytes) -> None:
+        if not line.strip():
+            return
+        try:
+            items.append((json.loads(line), ""))
+        except ValueError as exc:
+            items.append((None, f"Invalid JSON: {exc}"))
+
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Batch too large")
+        if ndjson:
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                add_line(line)
+        else:
+            chunks.append(chunk)
+
+    if ndjson:
+        add_line(pending)
+    else:
+        try:
+            body = json.loads(b"".join(chunks) or b"{}")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+        values = body.get(key, []) if isinstance(body, dict) else None
+        if not isinstance(values, list):
+            raise HTTPException(
+                status_code=422, detail=f"'{key}' must be a list"
             )
+        items = [(value, "") for value in values]
+
+    if max_items is not None and len(items) > max_items:
+        raise HTTPException(status_code=413, detail="Too many items in batch")
+    return items
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'item'}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+async def _create_conversation(
+    patient_name: str, patient_key: str | None
+) -> dict:
+    history = (
+        await history_context(patient_key) if PATIENT_HISTORY_CONTEXT else None
+    )
+    result = await create_conversation(patient_name, history)
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "INSERT INTO conversations (conversation_id, patient_name, patient_key) VALUES (%s, %s, %s)",
+                (result["conversation_id"], patient_name, patient_key),
+            )
+        await rollup_created(
+            conn, result["conversation_id"], patient_name, patient_key
+        )
+        await patient_session_started(conn, patient_key, patient_name)
+    return result
+
+
+@router.post("/conversations", response_model=ConversationCreateResponse)
+async def create_conversation_endpoint(
+    req: ConversationCreateRequest,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255),
+):
+    """Start a Tavus session for the patient.
+
+    With an ``Idempotency-Key`` header, retries and concurrent duplicates
+    of the same request share one Tavus session and get the same response
+    (marked ``Idempotent-Replayed: true``). Sessions with the same
+    ``patient_key`` share a patient history; sessions without one are not
+    linked.
+    """
+    if idempotency_key is None:
+        return await _create_conversation(req.patient_name, req.patient_key)
+    try:
+        result, replayed = await run_once(
+            idempotency_key,
+            req.model_dump_json(),
+            lambda: _create_conversation(req.patient_name, req.patient_key),
+        )
+    except IdempotencyKeyReusedError:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request",
+        )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
     return result
 
 
@@ -46,93 +173,281 @@ async def end_conversation_endpoint(conversation_id: str):
     response_model=EscalationLogResponse,
 )
 async def log_escalation(conversation_id: str, req: EscalationLogRequest):
-    with db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 """INSERT INTO escalation_events
                    (conversation_id, event_type, severity, question_text, reason)
-                   VALUES (%s, %s, %s, %s, %s)
-                   RETURNING id""",
+                   SELECT %s, %s, %s, %s, %s
+                   WHERE EXISTS (SELECT 1 FROM conversations WHERE conversation_id = %s)
+                   RETURNING id, occurred_at""",
                 (
                     conversation_id,
                     req.event_type,
                     req.severity,
                     req.question_text,
                     req.reason,
+                    conversation_id,
                 ),
             )
-            escalation_id = cur.fetchone()[0]
+            row = await cur.fetchone()
+            if row is None:
+                raise HTTPException(
+                    status_code=404, detail="Conversation not found"
+                )
+            escalation_id, occurred_at = row
+        patient_name = await rollup_escalations(
+            conn, conversation_id, [req.severity]
+        )
+        await patient_escalated(conn, conversation_id, [req.severity])
+    await invalidate_summary(conversation_id)
+    await publish_escalations(
+        conversation_id,
+        patient_name,
+        [
+            {
+                "id": escalation_id,
+                "occurred_at": occurred_at,
+                **req.model_dump(),
+            }
+        ],
+    )
     return {"escalation_id": str(escalation_id)}
 
 
+@router.post(
+    "/conversations/{conversation_id}/escalations/batch",
+    response_model=BatchResponse,
+)
+async def log_escalations_batch(conversation_id: str, request: Request):
+    """Log many escalations in one multi-row INSERT, validating each item."""
+    results: list[BatchItemResult] = []
+    valid: list[tuple[str, EscalationLogRequest]] = []
+    for index, (item, error) in enumerate(
+        await _read_batch(request, "escalations")
+    ):
+        if not error:
+            try:
+                req = EscalationLogRequest.model_validate(item)
+            except ValidationError as exc:
+                error = _validation_message(exc)
+        if error:
+            results.append(BatchItemResult(index=index, ok=False, error=error))
+            continue
+        escalation_id = str(uuid.uuid4())
+        valid.append((escalation_id, req))
+        results.append(BatchItemResult(index=index, ok=True, id=escalation_id))
+
+    if valid:
+        async with db_conn() as conn:
+            cur = await conn.execute(
+                """INSERT INTO escalation_events
+                   (id, conversation_id, event_type, severity, question_text, reason)
+                   SELECT id, %s, event_type, severity, question_text, reason
+                   FROM unnest(%s::uuid[], %s::text[], %s::text[], %s::text[], %s::text[])
+                        AS t(id, event_type, severity, question_text, reason)
+                   WHERE EXISTS (SELECT 1 FROM conversations WHERE conversation_id = %s)
+                   RETURNING occurred_at""",
+                (
+                    conversation_id,
+                    [escalation_id for escalation_id, _ in valid],
+                    [req.event_type for _, req in valid],
+                    [req.severity for _, req in valid],
+                    [req.question_text for _, req in valid],
+                    [req.reason for _, req in valid],
+                    conversation_id,
+                ),
+            )
+            row = await cur.fetchone()
+            if row is None:
+                raise HTTPException(
+                    status_code=404, detail="Conversation not found"
+                )
+            # Every row shares the transaction's NOW().
+            occurred_at = row[0]
+            severities = [req.severity for _, req in valid]
+            patient_name = await rollup_escalations(
+                conn, conversation_id, severities
+            )
+            await patient_escalated(conn, conversation_id, severities)
+        await invalidate_summary(conversation_id)
+        await publish_escalations(
+            conversation_id,
+            patient_name,
+            [
+                {
+                    "id": escalation_id,
+                    "occurred_at": occurred_at,
+                    **req.model_dump(),
+                }
+                for escalation_id, req in valid
+            ],
+        )
+
+    return BatchResponse(
+        accepted=len(valid),
+        rejected=len(results) - len(valid),
+        results=results,
+    )
+
+
+def _validate_observations(
+    items: list[tuple[object, str]],
+) -> tuple[list[dict], list[BatchItemResult]]:
+    observations: list[dict] = []
+    results: list[BatchItemResult] = []
+    for index, (item, error) in enumerate(items):
+        if not error:
+            try:
+                obs = PerceptionObservation.model_validate(item)
+            except ValidationError as exc:
+                error = _validation_message(exc)
+        if error:
+            results.append(BatchItemResult(index=index, ok=False, error=error))
+            continue
+        observations.append(obs.model_dump(exclude_none=True))
+        results.append(BatchItemResult(index=index, ok=True))
+    return observations, results
+
+
 @router.post("/conversations/{conversation_id}/perception")
 async def log_perception(conversation_id: str, request: Request):
-    """Accept accumulated perception observations from the frontend."""
-    body = await request.json()
-    observations = body.get("observations", [])
-    buffer_perception(conversation_id, observations)
+    """Accept accumulated perception observations from the frontend.
+
+    The frontend posts a whole session's observations at the end of the
+    call, so only the byte cap applies here, not BATCH_MAX_ITEMS.
+    """
+    observations, _ = _validate_observations(
+        await _read_batch(request, "observations", max_items=None)
+    )
+    await buffer_perception(conversation_id, observations)
     return {"ok": True}
 
 
+@router.post(
+    "/conversations/{conversation_id}/perception/batch",
+    response_model=BatchResponse,
+)
+async def log_perception_batch(conversation_id: str, request: Request):
+    """Like /perception, but reports a validation result per observation."""
+    observations, results = _validate_observations(
+        await _read_batch(request, "observations")
+    )
+    await buffer_perception(conversation_id, observations)
+    return BatchResponse(
+        accepted=len(observations),
+        rejected=len(results) - len(observations),
+        results=results,
+    )
+
+
+@router.post("/conversations/{conversation_id}/utterances")
+async def log_utterances(conversation_id: str, req: UtteranceLogRequest):
+    """Feed live utterances into the incremental summarizer.
+
+    Utterances must have consecutive ``seq`` numbers. A batch that skips
+    numbers the summarizer has not seen gets 409 with the next one expected.
+    """
+    utterances = [u.model_dump() for u in req.utterances]
+    if not utterances:
+        return {"ok": True}
+    first = utterances[0]["seq"]
+    if any(u["seq"] != first + i for i, u in enumerate(utterances)):
+        raise HTTPException(
+            status_code=422, detail="Utterance seq must be consecutive"
+        )
+    try:
+        next_seq = await add_utterances(conversation_id, utterances)
+    except UtteranceGapError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"ok": True, "next_seq": next_seq}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison: weak, against each tag in the list."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
 @router.get(
     "/conversations/{conversation_id}/summary",
     response_model=ConversationSummaryResponse,
 )
-async def get_summary(conversation_id: str):
-    with db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """SELECT c.patient_name, c.ended_at,
-                          s.topics_covered, s.questions_asked, s.perception_notes
-                   FROM conversations c
-                   JOIN conversation_summaries s USING (conversation_id)
-                   WHERE c.conversation_id = %s""",
-                (conversation_id,),
-            )
-            row = cur.fetchone()
-            if not row:
-                raise HTTPException(
-                    status_code=404, detail="Summary not ready"
-                )
+async def get_summary(conversation_id: str, request: Request):
+    """Serve the cached, pre-serialized summary with an ETag.
 
-            cur.execute(
-                """SELECT event_type, severity, question_text, reason, occurred_at
-                   FROM escalation_events WHERE conversation_id = %s
-                   ORDER BY occurred_at""",
-                (conversation_id,),
+    A matching If-None-Match gets 304 without a body.
+    """
+    cached = await get_summary_json(conversation_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Summary not ready")
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/conversations/{conversation_id}/transcript",
+    response_model=TranscriptPage,
+)
+async def get_transcript(
+    conversation_id: str,
+    after_seq: int = -1,
+    limit: int = Query(200, ge=1, le=1000),
+):
+    """Page through the stored transcript in utterance order."""
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """SELECT seq, role, content, spoken_at
+                   FROM conversation_utterances
+                   WHERE conversation_id = %s AND seq > %s
+                   ORDER BY seq
+                   LIMIT %s""",
+                (conversation_id, after_seq, limit + 1),
             )
-            escalations = [
-                EscalationItem(
-                    event_type=r[0],
-                    severity=r[1],
-                    question_text=r[2],
-                    reason=r[3],
-                    occurred_at=r[4].isoformat() if r[4] else None,
+            rows = await cur.fetchall()
+            if not rows and after_seq < 0:
+                await cur.execute(
+                    "SELECT 1 FROM conversation_summaries WHERE conversation_id = %s",
+                    (conversation_id,),
                 )
-                for r in cur.fetchall()
-            ]
+                if not await cur.fetchone():
+                    raise HTTPException(
+                        status_code=404, detail="Transcript not ready"
+                    )
 
-    return ConversationSummaryResponse(
+    utterances = [
+        TranscriptUtterance(seq=r[0], role=r[1], content=r[2], timestamp=r[3])
+        for r in rows[:limit]
+    ]
+    return TranscriptPage(
         conversation_id=conversation_id,
-        patient_name=row[0],
-        topics_covered=row[2] or [],
-        questions_asked=row[3] or [],
-        escalation_count=len(escalations),
-        escalations=escalations,
-        ended_at=row[1].isoformat() if row[1] else None,
-        perception_notes=row[4],
+        utterances=utterances,
+        next_after_seq=utterances[-1].seq if len(rows) > limit else None,
     )
 
 
 @router.get("/conversations/{conversation_id}/stream")
 async def stream_summary(conversation_id: str):
-    queue = register_listener(conversation_id)
+    try:
+        queue = register_listener(conversation_id)
+    except TooManyListenersError:
+        raise HTTPException(
+            status_code=429, detail="Too many open streams for conversation"
+        )
+
+    return StreamingResponse(
+        event_stream(conversation_id, queue), media_type="text/event-stream"
+    )
 
-    async def event_generator():
-        try:
-            event = await queue.get()
-            yield f"data: {json.dumps(event)}\n\n"
-        finally:
-            unregister_listener(conversation_id, queue)
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@router.get("/streams/stats")
+async def get_stream_stats():
+    """Open SSE streams in this worker."""
+    return stream_stats()
@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from config import DASHBOARD_ENABLED
+from models.schemas import DashboardResponse, PatientHistoryResponse
+from services.escalation_stream import (
+    TooManyConsolesError,
+    console_stream,
+    open_console,
+)
+from services.pagination import InvalidCursorError
+from services.patient_history import get_patient_history
+from services.rollups import list_conversations
+
+router = APIRouter()
+
+
+def _require_dashboard() -> None:
+    if not DASHBOARD_ENABLED:
+        raise HTTPException(status_code=404, detail="Dashboard disabled")
+
+
+@router.get("/dashboard/conversations", response_model=DashboardResponse)
+async def dashboard_conversations(
+    status: Literal["active", "ended", "summarized"] | None = None,
+    min_severity: Literal["medium", "high"] | None = None,
+    topic: list[str] | None = Query(None),
+    ended_since: datetime | None = None,
+    ended_until: datetime | None = None,
+    escalated_since: datetime | None = None,
+    patient_key: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+):
+    """Care-team list view, newest conversation first.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    _require_dashboard()
+    try:
+        return await list_conversations(
+            status=status,
+            min_severity=min_severity,
+            topics=topic,
+            ended_since=ended_since,
+            ended_until=ended_until,
+            escalated_since=escalated_since,
+            patient_key=patient_key,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get(
+    "/dashboard/patients/{patient_key}",
+    response_model=PatientHistoryResponse,
+)
+async def patient_history(
+    patient_key: str, sessions: int = Query(20, ge=1, le=200)
+):
+    """A patient's history across sessions, with their latest sessions.
+
+    Page through older sessions with
+    ``/dashboard/conversations?patient_key=`` and the returned cursor.
+    """
+    _require_dashboard()
+    history = await get_patient_history(patient_key)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    page = await list_conversations(patient_key=patient_key, limit=sessions)
+    return {
+        **history,
+        "sessions": page["items"],
+        "next_cursor": page["next_cursor"],
+    }
+
+
+@router.get("/dashboard/escalations/stream")
+async def stream_escalations(
+    request: Request,
+    min_severity: Literal["medium", "high"] | None = None,
+):
+    """Server-Sent Events for every new escalation, across conversations.
+
+    An ``event: resync`` means escalations were missed (the console fell
+    behind, or reconnected); reload the list with ``escalated_since``.
+    """
+    _require_dashboard()
+    try:
+        console = open_console(min_severity)
+    except TooManyConsolesError:
+        raise HTTPException(
+            status_code=429, detail="Too many open escalation streams"
+        )
+
+    return StreamingResponse(
+        console_stream(console, resync="last-event-id" in request.headers),
+        media_type="text/event-stream",
+    )
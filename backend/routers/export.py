@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from config import EXPORT_ENABLED
+from db.connection import db_conn
+from services.export import (
+    MEDIA_TYPES,
+    ExportFormatUnavailableError,
+    check_format,
+    export_chunks,
+)
+
+router = APIRouter()
+
+
+@router.get("/export")
+async def export(
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    include_transcript: bool = False,
+):
+    """Stream every conversation created in [since, until) with its summary
+    and escalations. Disabled unless EXPORT_ENABLED is set."""
+    if not EXPORT_ENABLED:
+        raise HTTPException(status_code=404, detail="Export disabled")
+    try:
+        check_format(format)
+    except ExportFormatUnavailableError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def body():
+        # The pooled connection is held for the whole download.
+        async with db_conn() as conn:
+            async for chunk in export_chunks(
+                conn,
+                format,
+                since=since,
+                until=until,
+                include_transcript=include_transcript,
+            ):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="export.{format}"'
+        },
+    )
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from config import PROFILER_ENABLED
+from services import profiler
+from services.metrics import render
+
+router = APIRouter()
+
+
+def _require_profiler() -> None:
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Process metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        await render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/debug/profiler")
+async def profiler_status():
+    _require_profiler()
+    return profiler.status()
+
+
+@router.post("/debug/profiler/start")
+async def start_profiler(interval_ms: float = 10):
+    """Start sampling stacks; replaces the previous run's samples."""
+    _require_profiler()
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(
+            status_code=422, detail="interval_ms must be between 1 and 1000"
+        )
+    profiler.start(interval_ms / 1000)
+    return profiler.status()
+
+
+@router.post("/debug/profiler/stop")
+async def stop_profiler():
+    _require_profiler()
+    profiler.stop()
+    return profiler.status()
+
+
+@router.get("/debug/profiler/folded", response_class=PlainTextResponse)
+async def profiler_folded(limit: int | None = None):
+    """Sampled stacks in folded format (flamegraph.pl / speedscope)."""
+    _require_profiler()
+    return profiler.folded(limit)
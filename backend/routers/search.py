@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from config import DASHBOARD_ENABLED
+from models.schemas import SearchResponse
+from services.pagination import InvalidCursorError
+from services.search import search_conversations
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: Literal["questions", "transcript"] = "questions",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    topic: list[str] | None = Query(None),
+    role: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+):
+    """Search patient questions (or full transcripts) across conversations.
+
+    ``q`` uses web search syntax, e.g. ``ohss or bleeding``. Pass the
+    returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    if not DASHBOARD_ENABLED:
+        raise HTTPException(status_code=404, detail="Search disabled")
+    try:
+        return await search_conversations(
+            q,
+            scope=scope,
+            since=since,
+            until=until,
+            topics=topic,
+            role=role,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,18 +1,44 @@
+import json
+
 from fastapi import APIRouter, Request
 
-from services.webhook_processor import process_webhook
+from services.webhook_inbox import (
+    enqueue_webhook,
+    event_key,
+    inbox_stats,
+    seen_recently,
+)
 
 router = APIRouter()
 
 
 @router.post("/webhooks/tavus")
 async def tavus_webhook(request: Request):
-    body = await request.json()
+    """Persist the raw event to the inbox and acknowledge immediately.
+
+    Redeliveries of an event already received are acknowledged without
+    being parsed or enqueued.
+    """
+    raw = await request.body()
+    key = event_key(raw)
+    if seen_recently(key):
+        return {"received": True, "duplicate": True}
+
+    body = json.loads(raw)
     event_type = body.get("event_type", "")
     conversation_id = body.get("conversation_id", "")
-    payload = body.get("properties", body)
 
     if event_type and conversation_id:
-        await process_webhook(event_type, conversation_id, payload)
+        if (
+            await enqueue_webhook(event_type, conversation_id, body, key)
+            is None
+        ):
+            return {"received": True, "duplicate": True}
 
     return {"received": True}
+
+
+@router.get("/webhooks/inbox")
+async def webhook_inbox_stats():
+    """Inbox depth and processing lag."""
+    return await inbox_stats()
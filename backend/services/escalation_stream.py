@@ -0,0 +1,193 @@
+"""Live escalation feed for care-team consoles, across all conversations.
+
+log_escalation and log_escalations_batch publish each new escalation
+(doctor redirects and passive-emotion distress notices) over services.pubsub,
+so every worker receives it once. A worker serializes each event once as an
+SSE frame and hands the same string to every connected console whose
+severity filter matches, so fan-out is a queue put per console.
+
+Each console has a bounded queue. A console that falls behind is not allowed
+to hold memory or slow the others: its backlog is dropped and replaced with a
+single ``resync`` event, and the console should reload
+``GET /api/dashboard/conversations?escalated_since=<last seen>``. The same
+event is sent first when a browser reconnects with Last-Event-ID, since
+escalations published while it was away were not kept.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+
+from config import (
+    ESCALATION_STREAM_MAX_CLIENTS,
+    ESCALATION_STREAM_QUEUE_SIZE,
+    SSE_HEARTBEAT_SECONDS,
+)
+from services.metrics import Counter, gauge_labels, register_gauge
+from services.pubsub import publish, subscribe
+from services.rollups import SEVERITY_RANKS
+
+logger = logging.getLogger(__name__)
+
+ESCALATIONS_CHANNEL = "escalations"
+# pg_notify payloads must stay under 8000 bytes. Field caps are on their
+# UTF-8 JSON encoding, so one event always fits with room to spare.
+_MAX_PAYLOAD_BYTES = 7000
+_MAX_TEXT_BYTES = 1000
+_MAX_NAME_BYTES = 200
+_RESYNC = "event: resync\ndata: {}\n\n"
+
+escalation_stream_resyncs = Counter(
+    "escalation_stream_resyncs_total",
+    "Escalation stream backlogs dropped because a console fell behind.",
+)
+
+
+class TooManyConsolesError(Exception):
+    """This worker already serves ESCALATION_STREAM_MAX_CLIENTS streams."""
+
+
+class _Console:
+    __slots__ = ("min_rank", "queue")
+
+    def __init__(self, min_rank: int):
+        self.min_rank = min_rank
+        # None ends the stream.
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(
+            maxsize=ESCALATION_STREAM_QUEUE_SIZE
+        )
+
+    def offer(self, frame: str) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+            escalation_stream_resyncs.inc()
+
+
+_consoles: set[_Console] = set()
+
+
+def _encoded_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode())
+
+
+def _truncate(text: str | None, max_bytes: int) -> str | None:
+    """Cut ``text`` so its JSON string encoding fits in ``max_bytes``."""
+    if not text or _encoded_size(text) <= max_bytes:
+        return text
+    size = 2
+    for index, char in enumerate(text):
+        # Escapes ("\n", "\u0001") and multi-byte characters count in full.
+        size += _encoded_size(char) - 2
+        if size > max_bytes:
+            return text[:index]
+    return text
+
+
+async def publish_escalations(
+    conversation_id: str, patient_name: str | None, escalations: list[dict]
+) -> None:
+    """Broadcast newly committed escalations to consoles on every worker.
+
+    Each escalation has id, event_type, severity, question_text, reason and
+    occurred_at (a datetime). Called after the escalations have committed,
+    so a failed publish is logged rather than raised.
+    """
+    payloads: list[list[str]] = [[]]
+    size = 0
+    for e in escalations:
+        item = json.dumps(
+            {
+                "id": str(e["id"]),
+                "conversation_id": conversation_id,
+                "patient_name": _truncate(patient_name, _MAX_NAME_BYTES),
+                "event_type": e["event_type"],
+                "severity": e["severity"],
+                "question_text": _truncate(
+                    e["question_text"], _MAX_TEXT_BYTES
+                ),
+                "reason": _truncate(e["reason"], _MAX_TEXT_BYTES),
+                "occurred_at": e["occurred_at"].isoformat(),
+            },
+            ensure_ascii=False,
+        )
+        item_size = len(item.encode())
+        if payloads[-1] and size + item_size > _MAX_PAYLOAD_BYTES:
+            payloads.append([])
+            size = 0
+        payloads[-1].append(item)
+        size += item_size + 1
+    for items in payloads:
+        if not items:
+            continue
+        try:
+            await publish(ESCALATIONS_CHANNEL, "[" + ",".join(items) + "]")
+        except Exception:
+            logger.exception(
+                "Escalations not published for %s", conversation_id
+            )
+
+
+def _deliver(payload: str) -> None:
+    if not _consoles:
+        return
+    for event in json.loads(payload):
+        rank = SEVERITY_RANKS.get(event["severity"], 0)
+        frame = f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+        for console in _consoles:
+            if rank >= console.min_rank:
+                console.offer(frame)
+
+
+subscribe(ESCALATIONS_CHANNEL, _deliver)
+
+
+def open_console(min_severity: str | None = None) -> _Console:
+    if len(_consoles) >= ESCALATION_STREAM_MAX_CLIENTS:
+        raise TooManyConsolesError()
+    console = _Console(SEVERITY_RANKS.get(min_severity, 0))
+    _consoles.add(console)
+    return console
+
+
+async def console_stream(
+    console: _Console, resync: bool = False
+) -> AsyncIterator[str]:
+    """Yield escalation frames as SSE, with heartbeats, until disconnect."""
+    try:
+        if resync:
+            yield _RESYNC
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    console.queue.get(), SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if frame is None:
+                return
+            yield frame
+    finally:
+        _consoles.discard(console)
+
+
+def close_consoles() -> None:
+    """End every console stream in this worker (graceful shutdown)."""
+    for console in _consoles:
+        while not console.queue.empty():
+            console.queue.get_nowait()
+        console.queue.put_nowait(None)
+    # Closed consoles receive nothing more, so the sentinel stays queued.
+    _consoles.clear()
+
+
+register_gauge(
+    "escalation_stream_consoles",
+    "Open escalation streams in this worker.",
+    lambda: {gauge_labels(): len(_consoles)},
+)
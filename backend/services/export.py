@@ -0,0 +1,254 @@
+"""Bulk export of conversations, summaries and escalations.
+
+One row per conversation created in ``[since, until)``, with its summary,
+its escalations and optionally its transcript. The export runs in a single
+REPEATABLE READ READ ONLY transaction, so it sees one consistent snapshot
+and takes no locks beyond the ACCESS SHARE every SELECT takes; writers are
+never blocked. Rows are streamed, never collected:
+
+- ``csv``: ``COPY (...) TO STDOUT``, passed through as Postgres sends it.
+  Nested columns are JSON text.
+- ``ndjson``: Postgres renders each row with ``row_to_json``; the rows are
+  read through a server-side cursor CHUNK_ROWS at a time.
+- ``parquet`` (needs pyarrow, ``uv sync --extra parquet``): each chunk from
+  the server-side cursor becomes one row group with nested list/struct
+  columns, and the bytes are yielded as soon as it is written.
+
+Used by ``GET /api/export`` and by ``export.py``.
+"""
+
+import asyncio
+import importlib.util
+from datetime import datetime
+from typing import AsyncIterator
+
+from psycopg import AsyncConnection
+
+CHUNK_ROWS = 2000
+FORMATS = ("ndjson", "csv", "parquet")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportFormatUnavailableError(Exception):
+    """The requested format needs an optional dependency that is missing."""
+
+
+# Columns in output order. Keep in step with _parquet_schema().
+_SELECT = """SELECT c.conversation_id,
+                    c.patient_name,
+                    c.patient_key,
+                    c.created_at,
+                    c.ended_at,
+                    c.shutdown_reason,
+                    s.created_at AS summarized_at,
+                    to_json(s.topics_covered) AS topics_covered,
+                    s.questions_asked,
+                    s.perception_notes,
+                    (SELECT COALESCE(json_agg(json_build_object(
+                                'id', e.id,
+                                'event_type', e.event_type,
+                                'severity', e.severity,
+                                'question_text', e.question_text,
+                                'reason', e.reason,
+                                'occurred_at', e.occurred_at
+                            ) ORDER BY e.occurred_at), '[]')
+                     FROM escalation_events e
+                     WHERE e.conversation_id = c.conversation_id) AS escalations
+                    {transcript}
+             FROM conversations c
+             LEFT JOIN conversation_summaries s USING (conversation_id)
+             WHERE (%(since)s::timestamptz IS NULL OR c.created_at >= %(since)s)
+               AND (%(until)s::timestamptz IS NULL OR c.created_at < %(until)s)
+             ORDER BY c.created_at, c.conversation_id"""
+_TRANSCRIPT = """, (SELECT json_agg(json_build_object(
+                                'role', u.role,
+                                'content', u.content,
+                                'timestamp', u.spoken_at
+                            ) ORDER BY u.seq)
+                     FROM conversation_utterances u
+                     WHERE u.conversation_id = c.conversation_id) AS transcript"""
+
+
+def check_format(fmt: str) -> None:
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ExportFormatUnavailableError(
+            "Parquet export needs pyarrow: uv sync --extra parquet"
+        )
+
+
+async def export_chunks(
+    conn: AsyncConnection,
+    fmt: str,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    include_transcript: bool = False,
+) -> AsyncIterator[bytes]:
+    """Yield the export as byte chunks. ``conn`` must not be in a transaction."""
+    check_format(fmt)
+    query = _SELECT.format(
+        transcript=_TRANSCRIPT if include_transcript else ""
+    )
+    params = {"since": since, "until": until}
+    async with conn.transaction():
+        await conn.execute(
+            "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"
+        )
+        if fmt == "csv":
+            async with conn.cursor() as cur:
+                async with cur.copy(
+                    f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)",
+                    params,
+                ) as copy:
+                    async for data in copy:
+                        yield bytes(data)
+        elif fmt == "ndjson":
+            async with conn.cursor(name="export") as cur:
+                await cur.execute(
+                    f"SELECT row_to_json(t)::text FROM ({query}) t", params
+                )
+                while rows := await cur.fetchmany(CHUNK_ROWS):
+                    yield "".join(r[0] + "\n" for r in rows).encode()
+        else:
+            async for data in _parquet_chunks(
+                conn, query, params, include_transcript
+            ):
+                yield data
+
+
+class _Sink:
+    """Write-only file object that hands written bytes back in chunks."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self.parts: list[bytes] = []
+        self.position = 0
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _parquet_schema(include_transcript: bool):
+    import pyarrow as pa
+
+    timestamp = pa.timestamp("us", tz="UTC")
+    fields = [
+        ("conversation_id", pa.string()),
+        ("patient_name", pa.string()),
+        ("patient_key", pa.string()),
+        ("created_at", timestamp),
+        ("ended_at", timestamp),
+        ("shutdown_reason", pa.string()),
+        ("summarized_at", timestamp),
+        ("topics_covered", pa.list_(pa.string())),
+        (
+            "questions_asked",
+            pa.list_(
+                pa.struct(
+                    [
+                        ("text", pa.string()),
+                        ("timestamp", pa.string()),
+                        (
+                            "source",
+                            pa.struct(
+                                [
+                                    ("document", pa.string()),
+                                    ("section", pa.string()),
+                                ]
+                            ),
+                        ),
+                    ]
+                )
+            ),
+        ),
+        ("perception_notes", pa.string()),
+        (
+            "escalations",
+            pa.list_(
+                pa.struct(
+                    [
+                        ("id", pa.string()),
+                        ("event_type", pa.string()),
+                        ("severity", pa.string()),
+                        ("question_text", pa.string()),
+                        ("reason", pa.string()),
+                        ("occurred_at", pa.string()),
+                    ]
+                )
+            ),
+        ),
+    ]
+    if include_transcript:
+        fields.append(
+            (
+                "transcript",
+                pa.list_(
+                    pa.struct(
+                        [
+                            ("role", pa.string()),
+                            ("content", pa.string()),
+                            ("timestamp", pa.string()),
+                        ]
+                    )
+                ),
+            )
+        )
+    return pa.schema(fields)
+
+
+async def _parquet_chunks(
+    conn: AsyncConnection,
+    query: str,
+    params: dict,
+    include_transcript: bool,
+) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(include_transcript)
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    def write(rows: list[tuple]) -> bytes:
+        columns = list(zip(*rows))
+        writer.write_table(
+            pa.Table.from_arrays(
+                [
+                    pa.array(column, type=field.type)
+                    for column, field in zip(columns, schema)
+                ],
+                schema=schema,
+            )
+        )
+        return sink.take()
+
+    try:
+        async with conn.cursor(name="export") as cur:
+            await cur.execute(query, params)
+            while rows := await cur.fetchmany(CHUNK_ROWS):
+                # Encoding is CPU-bound; keep it off the event loop.
+                yield await asyncio.to_thread(write, rows)
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,84 @@
+"""Idempotency keys for POST endpoints that create billed resources.
+
+A request carrying an ``Idempotency-Key`` runs at most once per key within
+IDEMPOTENCY_TTL_SECONDS: the first caller starts the work, concurrent
+callers with the same key await that same task, and later callers get the
+cached result. Only successes are cached, so a retry after a failure runs
+again. Reusing a key with a different request body is an error.
+
+The work runs as its own task, so a client that disconnects mid-request
+does not cancel the Tavus call that its retry is about to wait on. State is
+per process, like the other in-memory caches; a retry that lands on
+another worker is not deduplicated.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from config import IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_SECONDS
+from services.metrics import Counter
+
+idempotent_replays = Counter(
+    "idempotent_replays_total",
+    "Requests answered from an earlier or in-flight request with the same "
+    "Idempotency-Key, by source (cached or coalesced).",
+)
+
+
+class IdempotencyKeyReusedError(Exception):
+    """The key was already used for a request with a different body."""
+
+
+# key -> (expires_at, fingerprint, result)
+_results: OrderedDict[str, tuple[float, str, dict]] = OrderedDict()
+# key -> (fingerprint, task)
+_in_flight: dict[str, tuple[str, asyncio.Task]] = {}
+
+
+async def run_once(
+    key: str, fingerprint: str, work: Callable[[], Awaitable[dict]]
+) -> tuple[dict, bool]:
+    """Run ``work`` once per key. Returns ``(result, replayed)``.
+
+    ``fingerprint`` identifies the request body the key was first used with.
+    """
+    cached = _results.get(key)
+    if cached is not None:
+        expires_at, first_fingerprint, result = cached
+        if expires_at > time.monotonic():
+            if first_fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError(key)
+            idempotent_replays.inc(source="cached")
+            return result, True
+        del _results[key]
+
+    running = _in_flight.get(key)
+    if running is not None:
+        first_fingerprint, task = running
+        if first_fingerprint != fingerprint:
+            raise IdempotencyKeyReusedError(key)
+        idempotent_replays.inc(source="coalesced")
+        return await asyncio.shield(task), True
+
+    task = asyncio.create_task(_run(key, fingerprint, work))
+    _in_flight[key] = (fingerprint, task)
+    return await asyncio.shield(task), False
+
+
+async def _run(
+    key: str, fingerprint: str, work: Callable[[], Awaitable[dict]]
+) -> dict:
+    try:
+        result = await work()
+    finally:
+        _in_flight.pop(key, None)
+    _results[key] = (
+        time.monotonic() + IDEMPOTENCY_TTL_SECONDS,
+        fingerprint,
+        result,
+    )
+    while len(_results) > IDEMPOTENCY_MAX_KEYS:
+        _results.popitem(last=False)
+    return result
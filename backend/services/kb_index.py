@@ -0,0 +1,258 @@
+"""BM25 index over the knowledge-base documents in data/.
+
+Each document is split into sections at its headings (short lines ending in
+a colon, ALL-CAPS lines, numbered FAQ questions). The index stores one
+precomputed BM25 weight per (term, section) in a float32 matrix, written
+as ``weights.npy`` next to a small ``meta.json`` holding the vocabulary,
+section labels and the documents' content hashes. Loading memory-maps the
+matrix, so every worker (and every resummarize.py process) shares one copy
+of the pages.
+
+Scoring a batch of questions is one gather of the rows for their terms and
+one ``np.add.reduceat``. That costs well under a millisecond for a
+transcript's worth of questions and makes no network calls. numpy is only
+imported when the index is first loaded, so it stays off the import path
+of worker boot.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import string
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from config import KB_INDEX_DIR
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+INDEX_VERSION = 1
+K1 = 1.2
+B = 0.75
+# Questions scoring below this are left without a source rather than
+# pointed at a weak match.
+MIN_SCORE = 2.0
+
+STOPWORDS = frozenset(
+    """a about after all also am an and any are as at be been before being
+    but by can could did do does doing for from get got had has have having
+    he her how i if in into is it its just me more most my no not now of on
+    once only or other our out over own same she should so some such than
+    that the their them then there these they this those to too under until
+    up very was we were what when where which while who whom why will with
+    would you your yours""".split()
+)
+
+_SEPARATORS = str.maketrans({c: " " for c in string.punctuation + "‘’“”–—"})
+_NUMBERED_QUESTION = re.compile(r"^\d+\.\s+(.*\?)$")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens without stopwords; plural "s" is dropped."""
+    tokens = []
+    for token in text.lower().translate(_SEPARATORS).split():
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _heading(line: str) -> str | None:
+    line = line.strip()
+    if not line or len(line) > 80 or line[0] in "-*•(":
+        return None
+    match = _NUMBERED_QUESTION.match(line)
+    if match:
+        return match.group(1)
+    if line.endswith(":"):
+        return line[:-1].strip()
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 4 and all(c.isupper() for c in letters):
+        return line
+    return None
+
+
+def split_sections(text: str) -> list[tuple[str | None, str]]:
+    """Split a document into ``(heading, body)`` sections."""
+    sections: list[tuple[str | None, list[str]]] = [(None, [])]
+    for line in text.splitlines():
+        heading = _heading(line)
+        if heading is not None:
+            sections.append((heading, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [
+        (heading, "\n".join(lines))
+        for heading, lines in sections
+        if tokenize("\n".join(lines))
+    ]
+
+
+def _document_hashes(data_dir: Path) -> dict[str, str]:
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(data_dir.glob("*.txt"))
+    }
+
+
+class KnowledgeIndex:
+    def __init__(self, weights: "np.ndarray", meta: dict):
+        self.weights = weights
+        self.meta = meta
+        self.sections = meta["sections"]
+        self.term_ids = {term: i for i, term in enumerate(meta["vocab"])}
+
+    def match(self, questions: list[str]) -> list[dict | None]:
+        """Best section for each question, or None below MIN_SCORE."""
+        import numpy as np
+
+        if not questions:
+            return []
+        ids: list[int] = []
+        offsets: list[int] = []
+        for question in questions:
+            offsets.append(len(ids))
+            ids.extend(
+                {
+                    self.term_ids[t]
+                    for t in tokenize(question)
+                    if t in self.term_ids
+                }
+            )
+        if not ids:
+            return [None] * len(questions)
+
+        # Rows for every query term, summed per question. Questions without
+        # any known term get an all-zero row.
+        rows = self.weights[np.asarray(ids)]
+        sizes = np.diff(np.asarray(offsets + [len(ids)]))
+        scores = np.zeros(
+            (len(questions), self.weights.shape[1]), dtype=np.float32
+        )
+        nonempty = sizes > 0
+        scores[nonempty] = np.add.reduceat(
+            rows, np.asarray(offsets)[nonempty], axis=0
+        )
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(questions)), best]
+        return [
+            ({**self.sections[section]} if score >= MIN_SCORE else None)
+            for section, score in zip(best.tolist(), best_scores.tolist())
+        ]
+
+
+def build_index(
+    data_dir: Path = DATA_DIR, index_dir: Path = Path(KB_INDEX_DIR)
+) -> KnowledgeIndex:
+    """Tokenize data/, compute BM25 weights and write the index files."""
+    import numpy as np
+
+    sections: list[dict] = []
+    section_terms: list[dict[str, int]] = []
+    for path in sorted(data_dir.glob("*.txt")):
+        document = path.stem
+        for heading, body in split_sections(path.read_text()):
+            counts: dict[str, int] = {}
+            # The heading is part of the body, so it is counted too.
+            for token in tokenize(body):
+                counts[token] = counts.get(token, 0) + 1
+            sections.append({"document": document, "section": heading})
+            section_terms.append(counts)
+
+    vocab = sorted({t for counts in section_terms for t in counts})
+    term_ids = {term: i for i, term in enumerate(vocab)}
+    lengths = [sum(counts.values()) for counts in section_terms]
+    avg_length = sum(lengths) / max(len(lengths), 1)
+    doc_freq = [0] * len(vocab)
+    for counts in section_terms:
+        for term in counts:
+            doc_freq[term_ids[term]] += 1
+
+    n = len(sections)
+    weights = np.zeros((len(vocab), n), dtype=np.float32)
+    for s, counts in enumerate(section_terms):
+        norm = K1 * (1 - B + B * lengths[s] / avg_length)
+        for term, tf in counts.items():
+            t = term_ids[term]
+            idf = math.log(1 + (n - doc_freq[t] + 0.5) / (doc_freq[t] + 0.5))
+            weights[t, s] = idf * tf * (K1 + 1) / (tf + norm)
+
+    meta = {
+        "version": INDEX_VERSION,
+        "documents": _document_hashes(data_dir),
+        "sections": sections,
+        "vocab": vocab,
+    }
+    index_dir.mkdir(parents=True, exist_ok=True)
+    tmp = index_dir / "weights.tmp.npy"
+    np.save(tmp, weights)
+    os.replace(tmp, index_dir / "weights.npy")
+    (index_dir / "meta.tmp.json").write_text(json.dumps(meta))
+    os.replace(index_dir / "meta.tmp.json", index_dir / "meta.json")
+    logger.info(
+        "Built knowledge-base index: %s sections, %s terms", n, len(vocab)
+    )
+    return KnowledgeIndex(weights, meta)
+
+
+def load_index(
+    data_dir: Path = DATA_DIR, index_dir: Path = Path(KB_INDEX_DIR)
+) -> KnowledgeIndex | None:
+    """Memory-map the index, or None if it is missing or out of date."""
+    import numpy as np
+
+    try:
+        meta = json.loads((index_dir / "meta.json").read_text())
+        weights = np.load(index_dir / "weights.npy", mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get("version") != INDEX_VERSION or meta.get(
+        "documents"
+    ) != _document_hashes(data_dir):
+        return None
+    return KnowledgeIndex(weights, meta)
+
+
+_index: KnowledgeIndex | None = None
+_unavailable = False
+_lock = threading.Lock()
+
+
+def get_index() -> KnowledgeIndex | None:
+    """The process-wide index, rebuilt first if data/ changed.
+
+    Returns None (and summaries carry no sources) if it cannot be built.
+    """
+    global _index, _unavailable
+    if _index is None and not _unavailable:
+        # Startup prewarms this in a thread; a summary may ask meanwhile.
+        with _lock:
+            if _index is None and not _unavailable:
+                try:
+                    _index = load_index() or build_index()
+                except OSError:
+                    logger.exception("Knowledge-base index unavailable")
+                    _unavailable = True
+    return _index
+
+
+def attach_sources(questions: list[dict]) -> list[dict]:
+    """Copy of ``questions`` with a ``source`` on each one that matches."""
+    index = get_index()
+    if index is None or not questions:
+        return list(questions)
+    sources = index.match([q["text"] for q in questions])
+    return [
+        {**q, "source": source} if source else q
+        for q, source in zip(questions, sources)
+    ]
@@ -0,0 +1,113 @@
+"""Graceful drain for rolling deploys.
+
+On SIGTERM (or SIGINT) uvicorn stops accepting connections, but then waits
+for open responses to finish before the lifespan shutdown runs. SSE streams
+never finish on their own, so the drain has to start at the signal, not at
+lifespan shutdown. ``install_drain_handler`` chains a handler in front of the
+server's own, and ``begin_drain`` then:
+
+- answers new requests on kept-alive connections with 503 and
+  ``Connection: close`` (DrainMiddleware), so load balancers and clients
+  move to another instance;
+- ends every summary and escalation SSE stream (EventSource reconnects to
+  another instance);
+- stops webhook inbox workers after their in-flight event, leaving pending
+  events to the other workers.
+
+Buffered perception is flushed by the lifespan shutdown, after the last
+in-flight request that could still add to it has completed.
+"""
+
+import asyncio
+import logging
+import signal
+
+from services.escalation_stream import close_consoles
+from services.sse import close_streams
+from services.webhook_inbox import stop_workers
+
+logger = logging.getLogger(__name__)
+
+_draining = False
+_drain_task: asyncio.Task | None = None
+_previous_handlers: dict[int, object] = {}
+
+
+def draining() -> bool:
+    return _draining
+
+
+async def _drain() -> None:
+    global _draining
+    _draining = True
+    logger.info("Draining: closing streams and stopping webhook workers")
+    close_streams()
+    close_consoles()
+    await stop_workers()
+
+
+def begin_drain() -> asyncio.Task:
+    """Stop taking work and release long-lived streams.
+
+    Idempotent: every call returns the same task, which the lifespan
+    shutdown awaits.
+    """
+    global _drain_task
+    if _drain_task is None:
+        _drain_task = asyncio.get_running_loop().create_task(_drain())
+    return _drain_task
+
+
+def install_drain_handler() -> None:
+    """Start draining as soon as the process is asked to stop."""
+    loop = asyncio.get_running_loop()
+
+    def handle(signum, frame):
+        # Signal handlers may interrupt the loop itself; only this call is
+        # safe to make from here.
+        loop.call_soon_threadsafe(begin_drain)
+        previous = _previous_handlers.get(signum)
+        if callable(previous):
+            previous(signum, frame)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            _previous_handlers[signum] = signal.signal(signum, handle)
+        except ValueError:
+            # Not the main thread (e.g. under a test client): nothing to chain.
+            return
+
+
+def uninstall_drain_handler() -> None:
+    for signum, previous in _previous_handlers.items():
+        signal.signal(signum, previous)
+    _previous_handlers.clear()
+
+
+class DrainMiddleware:
+    """Reject new HTTP requests with 503 once draining has started."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _draining:
+            await self.app(scope, receive, send)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"connection", b"close"),
+                    (b"retry-after", b"1"),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b'{"detail":"Server is shutting down"}',
+            }
+        )
@@ -0,0 +1,118 @@
+"""Per-conversation live summaries fed utterance by utterance during the call.
+
+When the final transcript arrives, handle_transcript_ready only reconciles
+the tail the live state has not seen yet, so time-to-summary after hang-up
+does not grow with session length.
+
+The state is a row of ``live_summaries``, so the worker that claims
+transcription_ready sees every utterance, whichever worker received it.
+The client numbers utterances from 0; the row records the next number it
+expects, so a retried batch is applied once and a batch that would leave a
+gap is rejected with UtteranceGapError. The state is therefore always an
+exact prefix of the call. If it is not a prefix of the final transcript
+(or there is none) the summary is computed from scratch;
+``live_summary_reconciles_total`` counts each outcome. Rows of calls that
+never produce a transcript are purged after LIVE_SUMMARY_TTL_SECONDS.
+"""
+
+import json
+import time
+
+from psycopg import AsyncConnection
+
+from config import LIVE_SUMMARY_TTL_SECONDS
+from db.connection import db_conn
+from services.metrics import Counter
+from services.summarizer import SummaryState, reconcile_summary
+
+_PURGE_INTERVAL_SECONDS = 300
+_next_purge = 0.0
+
+live_summary_reconciles = Counter(
+    "live_summary_reconciles_total",
+    "Final summaries by live state: hit (only the tail was summarized), "
+    "miss (it did not match the transcript) or absent.",
+)
+
+
+class UtteranceGapError(Exception):
+    """The batch starts after the next utterance the live state expects."""
+
+    def __init__(self, expected_seq: int):
+        super().__init__(f"Expected utterance seq {expected_seq}")
+        self.expected_seq = expected_seq
+
+
+async def add_utterances(conversation_id: str, utterances: list[dict]) -> int:
+    """Fold newly spoken utterances into the conversation's live summary.
+
+    ``utterances`` carry consecutive ``seq`` numbers; ones already applied
+    are skipped. Returns the next ``seq`` expected.
+    """
+    global _next_purge
+    async with db_conn() as conn:
+        await conn.execute(
+            """INSERT INTO live_summaries (conversation_id, state)
+               VALUES (%s, %s::jsonb) ON CONFLICT DO NOTHING""",
+            (conversation_id, json.dumps(SummaryState().to_dict())),
+        )
+        next_seq, data = await (
+            await conn.execute(
+                """SELECT next_seq, state FROM live_summaries
+                   WHERE conversation_id = %s FOR UPDATE""",
+                (conversation_id,),
+            )
+        ).fetchone()
+        fresh = [u for u in utterances if u["seq"] >= next_seq]
+        if not fresh:
+            return next_seq
+        if fresh[0]["seq"] != next_seq:
+            raise UtteranceGapError(next_seq)
+        state = SummaryState.from_dict(data)
+        state.extend(fresh)
+        next_seq += len(fresh)
+        await conn.execute(
+            """UPDATE live_summaries
+               SET next_seq = %s, state = %s::jsonb, updated_at = NOW()
+               WHERE conversation_id = %s""",
+            (next_seq, json.dumps(state.to_dict()), conversation_id),
+        )
+        if time.monotonic() >= _next_purge:
+            _next_purge = time.monotonic() + _PURGE_INTERVAL_SECONDS
+            await conn.execute(
+                "DELETE FROM live_summaries WHERE updated_at < NOW() - make_interval(secs => %s)",
+                (LIVE_SUMMARY_TTL_SECONDS,),
+            )
+    return next_seq
+
+
+async def load_live_summary(conversation_id: str) -> SummaryState | None:
+    async with db_conn() as conn:
+        row = await (
+            await conn.execute(
+                "SELECT state FROM live_summaries WHERE conversation_id = %s",
+                (conversation_id,),
+            )
+        ).fetchone()
+    return SummaryState.from_dict(row[0]) if row else None
+
+
+def finalize_summary(
+    state: SummaryState | None, transcript: list[dict]
+) -> dict:
+    """Reconcile the live state (if any) with the final transcript."""
+    summary, used = reconcile_summary(state or SummaryState(), transcript)
+    if state is None:
+        live_summary_reconciles.inc(result="absent")
+    else:
+        live_summary_reconciles.inc(result="hit" if used else "miss")
+    return summary
+
+
+async def discard_live_summary(
+    conn: AsyncConnection, conversation_id: str
+) -> None:
+    await conn.execute(
+        "DELETE FROM live_summaries WHERE conversation_id = %s",
+        (conversation_id,),
+    )
@@ -0,0 +1,227 @@
+"""In-process metrics with a Prometheus text exposition.
+
+Counters and histograms are updated on the hot path with a dict lookup and
+a couple of additions, so instrumentation stays cheap enough to leave on.
+Gauges are collected lazily when the endpoint is scraped. Values are per
+process; with several uvicorn workers, scrape each one (or run a single
+worker behind the scraper).
+"""
+
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator
+
+# Latency buckets in seconds, from sub-millisecond pool checkouts up to
+# slow Tavus calls.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+Labels = tuple[tuple[str, str], ...]
+GaugeCollector = Callable[
+    [], "dict[Labels, float] | Awaitable[dict[Labels, float]]"
+]
+
+_metrics: list["Counter | Histogram"] = []
+_gauges: list[tuple[str, str, GaugeCollector]] = []
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: dict[Labels, float] = {}
+        _metrics.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[Labels, list[float]] = {}
+        _metrics.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, series in sorted(self.values.items()):
+            cumulative = 0
+            bounds = [*self.buckets, "+Inf"]
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_format_labels(labels)} {series[-1]}"
+            )
+            lines.append(
+                f"{self.name}_count{_format_labels(labels)} {cumulative}"
+            )
+        return lines
+
+
+def register_gauge(name: str, help: str, collect: GaugeCollector) -> None:
+    """Register a gauge whose samples are computed at scrape time.
+
+    ``collect`` returns ``{labels: value}`` (labels as built by
+    ``gauge_labels``) and may be a coroutine function.
+    """
+    _gauges.append((name, help, collect))
+
+
+def gauge_labels(**labels) -> Labels:
+    return _labels(labels)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing each HTTP request by its route template.
+
+    Timing stops when the response headers are sent, so long-lived SSE
+    streams are measured by their time-to-first-byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            recorded = True
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(scope.get("route"), "path", "unmatched"),
+                status=status,
+            )
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            if not recorded:
+                record(500)
+
+
+async def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for name, help, collect in _gauges:
+        samples = collect()
+        if inspect.isawaitable(samples):
+            samples = await samples
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(samples.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, until response headers.",
+)
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+)
+tavus_request_duration = Histogram(
+    "tavus_request_duration_seconds",
+    "Latency of individual Tavus API attempts.",
+)
+tavus_errors = Counter(
+    "tavus_errors_total",
+    "Failed Tavus API attempts by reason.",
+)
+summary_generation = Histogram(
+    "summary_generation_seconds",
+    "Time to reconcile and generate a conversation summary.",
+)
+webhook_lag = Histogram(
+    "webhook_lag_seconds",
+    "Time from webhook receipt to the end of processing "
+    "(for transcription_ready: until summary_ready is published).",
+    LAG_BUCKETS,
+)
+webhook_duplicates = Counter(
+    "webhook_duplicates_total",
+    "Redelivered webhooks dropped before processing, by where they were "
+    "caught (memory: this worker's recent keys, db: the inbox's unique key).",
+)
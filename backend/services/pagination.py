@@ -0,0 +1,28 @@
+"""Opaque keyset cursors for newest-first listings.
+
+A cursor encodes the (timestamp, conversation_id) of the last row on a page;
+the next page asks for rows strictly before it in
+``ORDER BY <timestamp> DESC, conversation_id DESC`` order.
+"""
+
+import base64
+from datetime import datetime
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(at: datetime, conversation_id: str) -> str:
+    raw = f"{at.isoformat()}|{conversation_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        at, conversation_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return datetime.fromisoformat(at), conversation_id
+    except ValueError as exc:
+        raise InvalidCursorError(str(exc)) from exc
@@ -0,0 +1,185 @@
+"""Monthly partitions for conversation data, and their retention.
+
+Every table that grows with sessions is range-partitioned by month on its
+timestamp (PARTITIONED_TABLES), in UTC. A month's rows for all of them are
+removed together by dropping that month's partitions, so retention never
+deletes rows one by one: no dead tuples, no vacuum debt and no row locks
+on the tables live traffic writes to. Queries with a time range only touch
+the months they cover; lookups by conversation_id probe one index per
+partition, a number that RETENTION_MONTHS keeps constant.
+
+- ``ensure_partitions`` creates the current month and PARTITION_PREMAKE_MONTHS
+  ahead. The app runs it at startup and ``retention.py`` on every run. New
+  partitions are created standalone and attached, which takes only a SHARE
+  UPDATE EXCLUSIVE lock on the parent, so reads and writes carry on.
+- ``archive_partition`` writes a month of one table to
+  ``<ARCHIVE_DIR>/<table>/<YYYY-MM>.csv.gz`` (``COPY ... FROM`` restores it).
+- ``drop_partition`` detaches it CONCURRENTLY, then drops it.
+
+Rows of a conversation that crosses a month boundary (an escalation or
+summary just after midnight on the 1st) land in the next month and are
+dropped one month after the conversation itself.
+"""
+
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+
+from psycopg import AsyncConnection, sql
+
+from config import PARTITION_PREMAKE_MONTHS
+
+# Parent table -> partition key.
+PARTITIONED_TABLES = {
+    "conversations": "created_at",
+    "conversation_rollups": "created_at",
+    "conversation_summaries": "created_at",
+    "conversation_utterances": "created_at",
+    "escalation_events": "occurred_at",
+}
+
+# Serializes partition DDL across workers starting at the same time.
+_DDL_LOCK_KEY = 0x70617274  # "part"
+_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def month_start(value: date | None = None) -> date:
+    value = value or datetime.now(timezone.utc).date()
+    return value.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def _bound(month: date) -> sql.Literal:
+    return sql.Literal(f"{month.isoformat()} 00:00:00+00")
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[date]:
+    """Months that currently have a partition of ``table``, oldest first."""
+    cur = await conn.execute(
+        """SELECT c.relname FROM pg_inherits i
+           JOIN pg_class c ON c.oid = i.inhrelid
+           WHERE i.inhparent = %s::regclass""",
+        (table,),
+    )
+    months = []
+    for (name,) in await cur.fetchall():
+        match = _SUFFIX.search(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+async def ensure_partitions(
+    conn: AsyncConnection, months_ahead: int = PARTITION_PREMAKE_MONTHS
+) -> list[str]:
+    """Create any missing partitions from this month to ``months_ahead``.
+
+    Returns the names of the partitions created.
+    """
+    first = month_start()
+    wanted = [add_months(first, n) for n in range(months_ahead + 1)]
+    created = []
+    async with conn.transaction():
+        await conn.execute(
+            "SELECT pg_advisory_xact_lock(%s)", (_DDL_LOCK_KEY,)
+        )
+        for table in PARTITIONED_TABLES:
+            existing = set(await list_partitions(conn, table))
+            for month in wanted:
+                if month in existing:
+                    continue
+                name = partition_name(table, month)
+                await conn.execute(
+                    sql.SQL(
+                        "CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    ).format(sql.Identifier(name), sql.Identifier(table))
+                )
+                await conn.execute(
+                    sql.SQL(
+                        "ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM ({}) TO ({})"
+                    ).format(
+                        sql.Identifier(table),
+                        sql.Identifier(name),
+                        _bound(month),
+                        _bound(add_months(month, 1)),
+                    )
+                )
+                created.append(name)
+    return created
+
+
+async def expired_partitions(
+    conn: AsyncConnection, retention_months: int
+) -> list[tuple[str, date]]:
+    """``(table, month)`` for every partition older than the retention window."""
+    cutoff = add_months(month_start(), -retention_months)
+    expired = []
+    for table in PARTITIONED_TABLES:
+        for month in await list_partitions(conn, table):
+            if month < cutoff:
+                expired.append((table, month))
+    return sorted(expired, key=lambda item: (item[1], item[0]))
+
+
+async def archive_partition(
+    conn: AsyncConnection, table: str, month: date, archive_dir: str
+) -> tuple[str, int]:
+    """Write one partition to a gzipped CSV. Returns ``(path, rows)``.
+
+    The file is written under a temporary name, synced and then renamed,
+    so a file with the final name is always complete.
+    """
+    directory = os.path.join(archive_dir, table)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{month:%Y-%m}.csv.gz")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+            async with conn.cursor() as cur:
+                async with cur.copy(
+                    sql.SQL(
+                        "COPY {} TO STDOUT WITH (FORMAT csv, HEADER)"
+                    ).format(sql.Identifier(partition_name(table, month)))
+                ) as copy:
+                    async for data in copy:
+                        out.write(data)
+                rows = cur.rowcount
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+    return path, rows
+
+
+async def drop_partition(
+    conn: AsyncConnection, table: str, month: date
+) -> None:
+    """Detach and drop one partition. ``conn`` must be in autocommit mode.
+
+    DETACH ... CONCURRENTLY does not block queries on the parent. If an
+    earlier run was interrupted between its two transactions, the partition
+    is left "detach pending" and is finalized instead.
+    """
+    name = partition_name(table, month)
+    cur = await conn.execute(
+        """SELECT i.inhdetachpending FROM pg_inherits i
+           WHERE i.inhrelid = %s::regclass""",
+        (name,),
+    )
+    row = await cur.fetchone()
+    if row is not None:
+        mode = "FINALIZE" if row[0] else "CONCURRENTLY"
+        await conn.execute(
+            sql.SQL("ALTER TABLE {} DETACH PARTITION {} " + mode).format(
+                sql.Identifier(table), sql.Identifier(name)
+            )
+        )
+    await conn.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
@@ -0,0 +1,174 @@
+"""Per-patient history across sessions.
+
+Each conversation may carry a ``patient_key``: the key the client passed at
+creation (e.g. a clinic identifier). Keys are never derived from the patient
+name, which would merge different patients who share a name and put one
+patient's history in another's persona context. ``patient_rollups`` holds
+one row per key with everything the history view shows, updated
+incrementally in the same transaction as the write it reflects, so serving a
+history never scans the patient's sessions:
+
+- create_conversation_endpoint -> ``patient_session_started``
+- handle_transcript_ready (summary inserted) -> ``patient_summarized``
+- log_escalation / log_escalations_batch -> ``patient_escalated``
+
+Topics are counted per session and only the newest MAX_QUESTIONS questions
+are kept, so a row stays small however many sessions a patient has. The
+rollup outlives retention: sessions whose partitions were dropped still
+count, but no longer appear in the session list.
+"""
+
+import json
+
+from psycopg import AsyncConnection
+
+from db.connection import db_conn
+from services.rollups import SEVERITY_NAMES, SEVERITY_RANKS
+
+MAX_QUESTIONS = 50
+
+
+async def patient_session_started(
+    conn: AsyncConnection, patient_key: str | None, patient_name: str
+) -> None:
+    if patient_key is None:
+        return
+    await conn.execute(
+        """INSERT INTO patient_rollups
+           (patient_key, patient_name, session_count, first_session_at, last_session_at)
+           VALUES (%s, %s, 1, NOW(), NOW())
+           ON CONFLICT (patient_key) DO UPDATE
+           SET patient_name = EXCLUDED.patient_name,
+               session_count = patient_rollups.session_count + 1,
+               last_session_at = EXCLUDED.last_session_at,
+               updated_at = NOW()""",
+        (patient_key, patient_name),
+    )
+
+
+async def patient_summarized(
+    conn: AsyncConnection,
+    conversation_id: str,
+    topics_covered: list[str],
+    questions_asked: list[dict],
+) -> None:
+    """Fold one new summary into its patient's rollup."""
+    questions = [
+        {
+            "conversation_id": conversation_id,
+            "text": q["text"],
+            "timestamp": q.get("timestamp"),
+        }
+        for q in questions_asked
+    ]
+    await conn.execute(
+        """UPDATE patient_rollups p
+           SET summarized_count = p.summarized_count + 1,
+               topic_counts = p.topic_counts || COALESCE(
+                   (SELECT jsonb_object_agg(t, COALESCE((p.topic_counts ->> t)::int, 0) + 1)
+                    FROM unnest(%(topics)s::text[]) AS t), '{}'),
+               question_count = p.question_count + %(question_count)s,
+               recent_questions = (
+                   SELECT COALESCE(jsonb_agg(q ORDER BY n), '[]')
+                   FROM (SELECT q, n
+                         FROM jsonb_array_elements(p.recent_questions || %(questions)s::jsonb)
+                              WITH ORDINALITY AS e(q, n)
+                         ORDER BY n DESC
+                         LIMIT %(max_questions)s) AS kept),
+               updated_at = NOW()
+           FROM conversations c
+           WHERE c.conversation_id = %(cid)s AND p.patient_key = c.patient_key""",
+        {
+            "cid": conversation_id,
+            "topics": topics_covered,
+            "question_count": len(questions),
+            "questions": json.dumps(questions),
+            "max_questions": MAX_QUESTIONS,
+        },
+    )
+
+
+async def patient_escalated(
+    conn: AsyncConnection,
+    conversation_id: str,
+    severities: list[str | None],
+) -> None:
+    if not severities:
+        return
+    await conn.execute(
+        """UPDATE patient_rollups p
+           SET escalation_count = p.escalation_count + %s,
+               max_severity = GREATEST(p.max_severity, %s),
+               last_escalation_at = NOW(),
+               updated_at = NOW()
+           FROM conversations c
+           WHERE c.conversation_id = %s AND p.patient_key = c.patient_key""",
+        (
+            len(severities),
+            max(SEVERITY_RANKS.get(s, 0) for s in severities),
+            conversation_id,
+        ),
+    )
+
+
+async def get_patient_history(patient_key: str) -> dict | None:
+    """The patient's rollup, topics most covered first, or None if unknown."""
+    async with db_conn() as conn:
+        cur = await conn.execute(
+            """SELECT patient_name, session_count, summarized_count,
+                      first_session_at, last_session_at, topic_counts,
+                      question_count, recent_questions, escalation_count,
+                      max_severity, last_escalation_at
+               FROM patient_rollups WHERE patient_key = %s""",
+            (patient_key,),
+        )
+        row = await cur.fetchone()
+    if row is None:
+        return None
+    return {
+        "patient_key": patient_key,
+        "patient_name": row[0],
+        "session_count": row[1],
+        "summarized_count": row[2],
+        "first_session_at": row[3].isoformat(),
+        "last_session_at": row[4].isoformat(),
+        "topics": [
+            {"topic": topic, "sessions": sessions}
+            for topic, sessions in sorted(
+                row[5].items(), key=lambda item: (-item[1], item[0])
+            )
+        ],
+        "question_count": row[6],
+        "recent_questions": row[7][::-1],
+        "escalation_count": row[8],
+        "highest_severity": SEVERITY_NAMES.get(row[9]),
+        "last_escalation_at": row[10].isoformat() if row[10] else None,
+    }
+
+
+async def history_context(patient_key: str | None) -> str | None:
+    """A short recap of earlier sessions for the persona's context.
+
+    ``patient_key`` must be the caller-supplied key of this session.
+    """
+    if patient_key is None:
+        return None
+    history = await get_patient_history(patient_key)
+    if history is None or not history["summarized_count"]:
+        return None
+    lines = [
+        f"Returning patient: {history['summarized_count']} earlier "
+        f"session(s), most recently on {history['last_session_at'][:10]}."
+    ]
+    topics = [t["topic"] for t in history["topics"][:6]]
+    if topics:
+        lines.append(f"Topics already covered: {', '.join(topics)}.")
+    questions = history["recent_questions"][:5]
+    if questions:
+        lines.append("Questions they asked before:")
+        lines.extend(f"- {q['text']}" for q in questions)
+    lines.append(
+        "Build on what they have already learned and focus on what is new "
+        "or still unclear."
+    )
+    return "\n".join(lines)
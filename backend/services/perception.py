@@ -0,0 +1,136 @@
+"""Compact per-conversation accumulator for Raven-1 emotional observations.
+
+Observations are folded in as they arrive instead of being kept as dicts:
+labels are interned to small integers shared by every accumulator, counts
+live in an ``array`` indexed by label id, and distress is a single flag.
+Memory per conversation is O(distinct labels) and notes are compiled in
+O(labels), regardless of how many observations a session produces.
+"""
+
+import time
+from array import array
+
+DISTRESS_LABELS = frozenset(("distress", "panic", "distressed"))
+
+_label_ids: dict[str, int] = {}
+_label_names: list[str] = []
+
+
+def intern_label(label: str) -> int:
+    label_id = _label_ids.get(label)
+    if label_id is None:
+        label_id = _label_ids[label] = len(_label_names)
+        _label_names.append(label)
+    return label_id
+
+
+def observation_label(observation: dict) -> str:
+    return observation.get(
+        "emotion", observation.get("label", "neutral")
+    ).lower()
+
+
+class PerceptionAccumulator:
+    """Running emotion counts for one conversation.
+
+    With ``bucket_seconds`` > 0, counts are also kept per wall-clock bucket
+    (``int(epoch // bucket_seconds)``), so buckets line up across workers.
+    """
+
+    __slots__ = ("counts", "order", "distress", "bucket_seconds", "buckets")
+
+    def __init__(self, bucket_seconds: float = 0):
+        self.counts = array("I")
+        # Label ids in first-seen order; keeps tie-breaking and wording stable.
+        self.order: list[int] = []
+        self.distress = False
+        self.bucket_seconds = bucket_seconds
+        self.buckets: dict[int, array] = {}
+
+    def add_label(self, label: str, n: int = 1, bucket: int = 0) -> None:
+        label_id = intern_label(label)
+        if label_id >= len(self.counts):
+            self.counts.extend([0] * (label_id + 1 - len(self.counts)))
+        if self.counts[label_id] == 0:
+            self.order.append(label_id)
+        self.counts[label_id] += n
+        if label in DISTRESS_LABELS:
+            self.distress = True
+        if self.bucket_seconds:
+            counts = self.buckets.setdefault(bucket, array("I"))
+            if label_id >= len(counts):
+                counts.extend([0] * (label_id + 1 - len(counts)))
+            counts[label_id] += n
+
+    def add(self, observation: dict, at: float | None = None) -> None:
+        bucket = 0
+        if self.bucket_seconds:
+            at = time.time() if at is None else at
+            bucket = int(at // self.bucket_seconds)
+        self.add_label(observation_label(observation), bucket=bucket)
+
+    def extend(self, observations: list[dict]) -> None:
+        at = time.time()
+        for observation in observations:
+            self.add(observation, at)
+
+    def merge(self, other: "PerceptionAccumulator") -> None:
+        if other.bucket_seconds and other.buckets:
+            for bucket, counts in other.buckets.items():
+                for label_id, n in enumerate(counts):
+                    if n:
+                        self.add_label(_label_names[label_id], n, bucket)
+            return
+        for label_id in other.order:
+            self.add_label(_label_names[label_id], other.counts[label_id])
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def label_counts(self) -> dict[str, int]:
+        """Counts by label, in first-seen order."""
+        return {_label_names[i]: self.counts[i] for i in self.order}
+
+    def bucket_counts(self) -> dict[int, dict[str, int]]:
+        return {
+            bucket: {_label_names[i]: n for i, n in enumerate(counts) if n}
+            for bucket, counts in sorted(self.buckets.items())
+        }
+
+    def notes(self) -> str | None:
+        """Rule-based compilation of the accumulated observations."""
+        emotion_counts = self.label_counts()
+        if not emotion_counts:
+            return None
+
+        dominant = max(emotion_counts, key=lambda k: emotion_counts[k])
+        total = sum(emotion_counts.values())
+
+        parts = [
+            f"Maya observed that you were mostly {dominant} throughout the session."
+        ]
+
+        secondary = {
+            k: v
+            for k, v in emotion_counts.items()
+            if k != dominant and v / total > 0.15
+        }
+        if secondary:
+            labels = " and ".join(secondary.keys())
+            parts.append(f"There were some moments of {labels}.")
+
+        if self.distress:
+            parts.append(
+                "Some signs of distress were noted — your care team has been informed."
+            )
+        else:
+            parts.append("No signs of high distress were detected.")
+
+        return " ".join(parts)
+
+
+def compile_perception_notes(events: list[dict]) -> str | None:
+    """Rule-based compilation of Raven-1 emotional observations."""
+    accumulator = PerceptionAccumulator()
+    accumulator.extend(events)
+    return accumulator.notes()
@@ -0,0 +1,329 @@
+"""Holds Raven-1 perception until transcript_ready drains it.
+
+Observations are folded into a PerceptionAccumulator on arrival, so a
+conversation's buffered perception is a handful of counters rather than a
+list of event dicts. Two backends share one interface:
+
+- ``MemoryPerceptionStore`` keeps accumulators in process memory with a cap
+  on conversations, and evicts conversations that have not been touched for
+  PERCEPTION_TTL_SECONDS (e.g. sessions that never produce a transcript).
+- ``PostgresPerceptionStore`` keeps per-label counters in
+  ``perception_counts`` so every uvicorn worker sees the same buffer and a
+  restart loses nothing. Draining is a single DELETE ... RETURNING inside the
+  caller's transaction, so two workers can never both compile the same
+  observations.
+
+On graceful shutdown the memory store ``flush``es its buffers into
+``perception_counts`` too and announces the flushed conversations over
+services.pubsub. Callers ``reclaim`` a conversation before opening their
+transaction; for an announced conversation that moves the counters a stopped
+worker left into memory, so a rolling deploy does not lose perception for
+calls that are still in progress. Other conversations never touch the table,
+and rows nobody reclaims are purged after PERCEPTION_TTL_SECONDS.
+"""
+
+import time
+from collections import OrderedDict
+
+from psycopg import AsyncConnection
+
+from config import (
+    PERCEPTION_BUCKET_SECONDS,
+    PERCEPTION_MAX_CONVERSATIONS,
+    PERCEPTION_STORE,
+    PERCEPTION_TTL_SECONDS,
+)
+from db.connection import db_conn
+from services.metrics import gauge_labels, register_gauge
+from services.perception import PerceptionAccumulator
+from services.pubsub import publish, subscribe
+
+_PURGE_INTERVAL_SECONDS = 300
+PERCEPTION_FLUSHED_CHANNEL = "perception_flushed"
+
+
+def _count_rows(
+    accumulator: PerceptionAccumulator,
+) -> list[tuple[int, str, int]]:
+    """``(bucket, label, count)`` rows for perception_counts."""
+    if accumulator.bucket_seconds:
+        return [
+            (bucket, label, n)
+            for bucket, labels in accumulator.bucket_counts().items()
+            for label, n in labels.items()
+        ]
+    return [(0, label, n) for label, n in accumulator.label_counts().items()]
+
+
+async def _add_counts(
+    conn: AsyncConnection,
+    conversation_id: str,
+    rows: list[tuple[int, str, int]],
+) -> None:
+    buckets, labels, counts = map(list, zip(*rows))
+    await conn.execute(
+        """INSERT INTO perception_counts (conversation_id, bucket, label, count)
+           SELECT %s, b, l, c
+           FROM unnest(%s::bigint[], %s::text[], %s::int[]) WITH ORDINALITY AS t(b, l, c, n)
+           ORDER BY n
+           ON CONFLICT (conversation_id, bucket, label)
+           DO UPDATE SET count = perception_counts.count + EXCLUDED.count,
+                         updated_at = NOW()""",
+        (conversation_id, buckets, labels, counts),
+    )
+
+
+async def _take_counts(
+    conn: AsyncConnection, conversation_id: str, bucket_seconds: float
+) -> PerceptionAccumulator:
+    """DELETE ... RETURNING the conversation's counters as an accumulator."""
+    rows = await (
+        await conn.execute(
+            """DELETE FROM perception_counts
+               WHERE conversation_id = %s
+               RETURNING bucket, label, count, first_seen_at""",
+            (conversation_id,),
+        )
+    ).fetchall()
+    accumulator = PerceptionAccumulator(bucket_seconds)
+    for bucket, label, n, _ in sorted(rows, key=lambda r: r[3]):
+        accumulator.add_label(label, n, bucket)
+    return accumulator
+
+
+async def _purge_counts(conn: AsyncConnection, ttl_seconds: float) -> None:
+    await conn.execute(
+        "DELETE FROM perception_counts WHERE updated_at < NOW() - make_interval(secs => %s)",
+        (ttl_seconds,),
+    )
+
+
+class MemoryPerceptionStore:
+    durable = False
+
+    def __init__(
+        self,
+        max_conversations: int = PERCEPTION_MAX_CONVERSATIONS,
+        ttl_seconds: float = PERCEPTION_TTL_SECONDS,
+        bucket_seconds: float = PERCEPTION_BUCKET_SECONDS,
+    ):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+        # conversation_id -> (last touched, accumulator); oldest touch first
+        self._buffers: OrderedDict[
+            str, tuple[float, PerceptionAccumulator]
+        ] = OrderedDict()
+        # Conversations with counters flushed by a stopped worker, reloaded
+        # from the table at every purge (the first reclaim included).
+        self._spilled: set[str] = set()
+        self._announced: set[str] = set()
+        self._next_purge = 0.0
+
+    def _evict(self, now: float) -> None:
+        while self._buffers:
+            conversation_id, (touched, _) = next(iter(self._buffers.items()))
+            if (
+                len(self._buffers) <= self.max_conversations
+                and now - touched < self.ttl_seconds
+            ):
+                break
+            del self._buffers[conversation_id]
+
+    def _touch(self, conversation_id: str) -> PerceptionAccumulator:
+        now = time.monotonic()
+        entry = self._buffers.pop(conversation_id, None)
+        accumulator = (
+            entry[1] if entry else PerceptionAccumulator(self.bucket_seconds)
+        )
+        self._buffers[conversation_id] = (now, accumulator)
+        self._evict(now)
+        return accumulator
+
+    async def append(
+        self, conversation_id: str, observations: list[dict]
+    ) -> None:
+        self._touch(conversation_id).extend(observations)
+
+    def _on_flushed(self, conversation_id: str) -> None:
+        self._announced.add(conversation_id)
+
+    async def reclaim(self, conversation_id: str) -> None:
+        """Move counters flushed by a stopped worker into memory.
+
+        Call it before opening the transaction that drains. Only announced
+        conversations touch the table, apart from a periodic purge of rows
+        nobody reclaimed.
+        """
+        now = time.monotonic()
+        if (
+            now < self._next_purge
+            and conversation_id not in self._spilled
+            and conversation_id not in self._announced
+        ):
+            return
+        async with db_conn() as conn:
+            if now >= self._next_purge:
+                self._next_purge = now + _PURGE_INTERVAL_SECONDS
+                await _purge_counts(conn, self.ttl_seconds)
+                cur = await conn.execute(
+                    "SELECT DISTINCT conversation_id FROM perception_counts"
+                )
+                self._spilled = {row[0] for row in await cur.fetchall()}
+            self._spilled |= self._announced
+            self._announced.clear()
+            if conversation_id not in self._spilled:
+                return
+            self._spilled.discard(conversation_id)
+            accumulator = await _take_counts(
+                conn, conversation_id, self.bucket_seconds
+            )
+        if len(accumulator):
+            self._touch(conversation_id).merge(accumulator)
+
+    async def drain(
+        self, conversation_id: str, conn: AsyncConnection | None = None
+    ) -> PerceptionAccumulator:
+        """Remove and return the buffered perception.
+
+        Only memory is read; ``reclaim`` has already brought in anything a
+        stopped worker flushed, so ``restore`` can put it all back.
+        """
+        self._evict(time.monotonic())
+        entry = self._buffers.pop(conversation_id, None)
+        if entry is None:
+            return PerceptionAccumulator(self.bucket_seconds)
+        return entry[1]
+
+    async def restore(
+        self, conversation_id: str, accumulator: PerceptionAccumulator
+    ) -> None:
+        """Merge drained perception back after the caller's transaction failed."""
+        if len(accumulator):
+            self._touch(conversation_id).merge(accumulator)
+
+    async def flush(self) -> int:
+        """Move every buffer into perception_counts. Returns conversations.
+
+        Called on shutdown; whichever worker drains the conversation next
+        picks the counters up.
+        """
+        buffers = [
+            (conversation_id, rows)
+            for conversation_id, (_, accumulator) in self._buffers.items()
+            if (rows := _count_rows(accumulator))
+        ]
+        if not buffers:
+            return 0
+        async with db_conn() as conn:
+            for conversation_id, rows in buffers:
+                await _add_counts(conn, conversation_id, rows)
+        self._buffers.clear()
+        for conversation_id, _ in buffers:
+            await publish(PERCEPTION_FLUSHED_CHANNEL, conversation_id)
+        return len(buffers)
+
+    def sizes(self) -> dict[str, int]:
+        return {cid: len(acc) for cid, (_, acc) in self._buffers.items()}
+
+    async def totals(self) -> tuple[int, int]:
+        """(buffered conversations, buffered observations)."""
+        return len(self._buffers), sum(
+            len(acc) for _, acc in self._buffers.values()
+        )
+
+
+class PostgresPerceptionStore:
+    durable = True
+
+    def __init__(
+        self,
+        ttl_seconds: float = PERCEPTION_TTL_SECONDS,
+        bucket_seconds: float = PERCEPTION_BUCKET_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+        self._next_purge = 0.0
+
+    async def append(
+        self, conversation_id: str, observations: list[dict]
+    ) -> None:
+        """Fold observations locally, then upsert one row per (bucket, label)."""
+        accumulator = PerceptionAccumulator(self.bucket_seconds)
+        accumulator.extend(observations)
+        rows = _count_rows(accumulator)
+        if not rows:
+            return
+        async with db_conn() as conn:
+            await _add_counts(conn, conversation_id, rows)
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + _PURGE_INTERVAL_SECONDS
+                await _purge_counts(conn, self.ttl_seconds)
+
+    async def reclaim(self, conversation_id: str) -> None:
+        """No-op: every worker drains from the same table."""
+
+    async def drain(
+        self, conversation_id: str, conn: AsyncConnection | None = None
+    ) -> PerceptionAccumulator:
+        """Remove and return the buffered counters.
+
+        Pass ``conn`` to make the drain part of the caller's transaction: if it
+        rolls back, the counters stay buffered.
+        """
+        if conn is None:
+            async with db_conn() as own_conn:
+                return await _take_counts(
+                    own_conn, conversation_id, self.bucket_seconds
+                )
+        return await _take_counts(conn, conversation_id, self.bucket_seconds)
+
+    async def restore(
+        self, conversation_id: str, accumulator: PerceptionAccumulator
+    ) -> None:
+        """No-op: a rolled-back drain already left the rows in place."""
+
+    async def flush(self) -> int:
+        """No-op: counters are already in Postgres."""
+        return 0
+
+    def sizes(self) -> dict[str, int]:
+        return {}
+
+    async def totals(self) -> tuple[int, int]:
+        """(buffered conversations, buffered observations)."""
+        async with db_conn() as conn:
+            row = await (
+                await conn.execute(
+                    "SELECT COUNT(DISTINCT conversation_id), COALESCE(SUM(count), 0) FROM perception_counts"
+                )
+            ).fetchone()
+        return row[0], int(row[1])
+
+
+def _make_store():
+    if PERCEPTION_STORE == "postgres":
+        return PostgresPerceptionStore()
+    if PERCEPTION_STORE == "memory":
+        store = MemoryPerceptionStore()
+        subscribe(PERCEPTION_FLUSHED_CHANNEL, store._on_flushed)
+        return store
+    raise RuntimeError(f"Unknown PERCEPTION_STORE: {PERCEPTION_STORE}")
+
+
+perception_store = _make_store()
+
+
+async def _perception_gauges() -> dict:
+    conversations, observations = await perception_store.totals()
+    return {
+        gauge_labels(unit="conversations"): conversations,
+        gauge_labels(unit="observations"): observations,
+    }
+
+
+register_gauge(
+    "perception_buffered",
+    "Perception buffered until transcript_ready.",
+    _perception_gauges,
+)
@@ -0,0 +1,91 @@
+"""Sampling profiler that can be switched on and off in a running process.
+
+A daemon thread snapshots every other thread's stack with
+``sys._current_frames()`` at a fixed interval and counts identical stacks.
+The event loop is never paused, so overhead is bounded by the sampling rate
+and the profiler can be started briefly in production to see where the
+loop spends its time (a slow handler, summary generation, JSON parsing).
+Results use the "folded" format that flamegraph.pl and speedscope read.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+
+_MAX_DEPTH = 64
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_stop = threading.Event()
+_samples: Counter[str] = Counter()
+_started_at: float | None = None
+_interval = 0.01
+
+
+def _folded(frame) -> str:
+    names = []
+    while frame is not None and len(names) < _MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _run() -> None:
+    own_id = threading.get_ident()
+    while not _stop.wait(_interval):
+        stacks = [
+            _folded(frame)
+            for thread_id, frame in sys._current_frames().items()
+            if thread_id != own_id
+        ]
+        with _lock:
+            _samples.update(stacks)
+
+
+def start(interval: float = 0.01) -> bool:
+    """Start sampling every ``interval`` seconds. False if already running."""
+    global _thread, _started_at, _interval
+    with _lock:
+        if _thread is not None:
+            return False
+        _samples.clear()
+        _stop.clear()
+        _interval = interval
+        _started_at = time.time()
+        _thread = threading.Thread(
+            target=_run, name="sampling-profiler", daemon=True
+        )
+        _thread.start()
+    return True
+
+
+def stop() -> bool:
+    """Stop sampling, keeping the samples for ``folded()``."""
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+    if thread is None:
+        return False
+    _stop.set()
+    thread.join()
+    return True
+
+
+def status() -> dict:
+    with _lock:
+        return {
+            "running": _thread is not None,
+            "started_at": _started_at,
+            "interval_seconds": _interval,
+            "samples": sum(_samples.values()),
+            "distinct_stacks": len(_samples),
+        }
+
+
+def folded(limit: int | None = None) -> str:
+    """Collected stacks, most frequent first, one ``stack count`` per line."""
+    with _lock:
+        top = _samples.most_common(limit)
+    return "".join(f"{stack} {count}\n" for stack, count in top)
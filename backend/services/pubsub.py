@@ -0,0 +1,93 @@
+"""Cross-worker pub/sub over Postgres LISTEN/NOTIFY.
+
+Every process keeps one dedicated autocommit connection that LISTENs on all
+subscribed channels and dispatches notifications to local callbacks, so a
+publish from any worker (or host) reaches subscribers everywhere — including
+the publishing process itself. With PUBSUB_BACKEND=memory, publish dispatches
+in-process only (single-worker development).
+
+Delivery is best-effort: notifications sent while the listener is
+reconnecting are lost, so subscribers must tolerate missed events.
+"""
+
+import asyncio
+import logging
+from typing import Callable
+
+from psycopg import AsyncConnection, sql
+
+from config import DATABASE_URL, PUBSUB_BACKEND
+from db.connection import db_conn
+
+logger = logging.getLogger(__name__)
+
+_subscribers: dict[str, list[Callable[[str], None]]] = {}
+_listener: asyncio.Task | None = None
+
+
+def subscribe(channel: str, callback: Callable[[str], None]) -> None:
+    """Call ``callback(payload)`` for every message published on ``channel``."""
+    _subscribers.setdefault(channel, []).append(callback)
+
+
+def _dispatch(channel: str, payload: str) -> None:
+    for callback in _subscribers.get(channel, []):
+        try:
+            callback(payload)
+        except Exception:
+            logger.exception("Pub/sub callback failed on %s", channel)
+
+
+async def publish(channel: str, payload: str = "") -> None:
+    if PUBSUB_BACKEND == "memory":
+        _dispatch(channel, payload)
+        return
+    async with db_conn() as conn:
+        await conn.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+
+
+async def _listen_forever() -> None:
+    backoff = 0.5
+    while True:
+        try:
+            conn = await AsyncConnection.connect(DATABASE_URL, autocommit=True)
+            async with conn:
+                listening: set[str] = set()
+                backoff = 0.5
+                while True:
+                    for channel in set(_subscribers) - listening:
+                        await conn.execute(
+                            sql.SQL("LISTEN {}").format(
+                                sql.Identifier(channel)
+                            )
+                        )
+                        listening.add(channel)
+                    # The timeout lets newly subscribed channels get LISTENed.
+                    async for notify in conn.notifies(timeout=1.0):
+                        _dispatch(notify.channel, notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(
+                "Pub/sub listener lost its connection; retrying in %.1fs",
+                backoff,
+            )
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+async def start_listener() -> None:
+    global _listener
+    if PUBSUB_BACKEND == "postgres" and _listener is None:
+        _listener = asyncio.create_task(_listen_forever())
+
+
+async def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
@@ -0,0 +1,177 @@
+"""Per-conversation rollups for the care-team dashboard.
+
+``conversation_rollups`` holds one row per conversation with everything the
+list view shows, so a dashboard page is a single index scan instead of a
+join over conversations, escalation_events and conversation_summaries.
+Rows are updated by the write paths themselves, inside the same
+transaction as the change they reflect:
+
+- create_conversation_endpoint -> ``rollup_created``
+- log_escalation / log_escalations_batch -> ``rollup_escalations``
+- handle_shutdown -> ``rollup_ended``
+- handle_transcript_ready (summary inserted) -> ``rollup_summarized``
+"""
+
+from datetime import datetime
+
+from psycopg import AsyncConnection
+
+from db.connection import db_conn
+from services.pagination import decode_cursor, encode_cursor
+
+# Severity is stored as a rank so the highest one is a GREATEST() away.
+SEVERITY_RANKS = {None: 0, "medium": 1, "high": 2}
+SEVERITY_NAMES = {rank: name for name, rank in SEVERITY_RANKS.items()}
+
+
+async def rollup_created(
+    conn: AsyncConnection,
+    conversation_id: str,
+    patient_name: str,
+    patient_key: str | None = None,
+) -> None:
+    # NOW() is the transaction start time, so created_at matches the
+    # conversations row inserted in the same transaction.
+    await conn.execute(
+        """INSERT INTO conversation_rollups (conversation_id, patient_name, patient_key, created_at)
+           VALUES (%s, %s, %s, NOW())
+           ON CONFLICT (conversation_id, created_at) DO NOTHING""",
+        (conversation_id, patient_name, patient_key),
+    )
+
+
+async def rollup_escalations(
+    conn: AsyncConnection,
+    conversation_id: str,
+    severities: list[str | None],
+) -> str | None:
+    """Fold newly logged escalations into the conversation's rollup.
+
+    Returns the patient name, for the live escalation stream.
+    """
+    if not severities:
+        return None
+    cur = await conn.execute(
+        """UPDATE conversation_rollups
+           SET escalation_count = escalation_count + %s,
+               max_severity = GREATEST(max_severity, %s),
+               last_escalation_at = NOW(),
+               updated_at = NOW()
+           WHERE conversation_id = %s
+           RETURNING patient_name""",
+        (
+            len(severities),
+            max(SEVERITY_RANKS.get(s, 0) for s in severities),
+            conversation_id,
+        ),
+    )
+    row = await cur.fetchone()
+    return row[0] if row else None
+
+
+async def rollup_ended(
+    conn: AsyncConnection, conversation_id: str, shutdown_reason: str
+) -> None:
+    await conn.execute(
+        """UPDATE conversation_rollups
+           SET ended_at = NOW(), shutdown_reason = %s, updated_at = NOW()
+           WHERE conversation_id = %s""",
+        (shutdown_reason, conversation_id),
+    )
+
+
+async def rollup_summarized(
+    conn: AsyncConnection, conversation_id: str, topics_covered: list[str]
+) -> None:
+    await conn.execute(
+        """UPDATE conversation_rollups
+           SET topics_covered = %s, summarized = TRUE, updated_at = NOW()
+           WHERE conversation_id = %s""",
+        (topics_covered, conversation_id),
+    )
+
+
+async def list_conversations(
+    *,
+    status: str | None = None,
+    min_severity: str | None = None,
+    topics: list[str] | None = None,
+    ended_since: datetime | None = None,
+    ended_until: datetime | None = None,
+    escalated_since: datetime | None = None,
+    patient_key: str | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> dict:
+    """Newest conversations first, filtered, with a keyset cursor.
+
+    ``status`` is "active" (not ended), "ended" or "summarized".
+    ``escalated_since`` keeps conversations whose latest escalation is at
+    or after that time.
+    ``patient_key`` keeps one patient's sessions.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    params = {
+        "status": status,
+        "min_severity": SEVERITY_RANKS.get(min_severity, 0),
+        "topics": topics or None,
+        "ended_since": ended_since,
+        "ended_until": ended_until,
+        "escalated_since": escalated_since,
+        "patient_key": patient_key,
+        "after_created_at": after[0] if after else None,
+        "after_id": after[1] if after else None,
+        "limit": limit + 1,
+    }
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """SELECT conversation_id, patient_name, created_at, ended_at,
+                          shutdown_reason, escalation_count, max_severity,
+                          last_escalation_at, topics_covered, summarized,
+                          patient_key
+                   FROM conversation_rollups
+                   WHERE (%(status)s::text IS NULL
+                          OR (%(status)s = 'active' AND ended_at IS NULL)
+                          OR (%(status)s = 'ended' AND ended_at IS NOT NULL)
+                          OR (%(status)s = 'summarized' AND summarized))
+                     AND max_severity >= %(min_severity)s
+                     AND (%(topics)s::text[] IS NULL OR topics_covered && %(topics)s)
+                     AND (%(ended_since)s::timestamptz IS NULL OR ended_at >= %(ended_since)s)
+                     AND (%(ended_until)s::timestamptz IS NULL OR ended_at < %(ended_until)s)
+                     AND (%(escalated_since)s::timestamptz IS NULL
+                          OR last_escalation_at >= %(escalated_since)s)
+                     AND (%(patient_key)s::text IS NULL OR patient_key = %(patient_key)s)
+                     AND (%(after_created_at)s::timestamptz IS NULL
+                          OR (created_at, conversation_id)
+                             < (%(after_created_at)s, %(after_id)s::text))
+                   ORDER BY created_at DESC, conversation_id DESC
+                   LIMIT %(limit)s""",
+                params,
+            )
+            rows = await cur.fetchall()
+
+    page = rows[:limit]
+    return {
+        "items": [
+            {
+                "conversation_id": r[0],
+                "patient_name": r[1],
+                "patient_key": r[10],
+                "created_at": r[2].isoformat(),
+                "ended_at": r[3].isoformat() if r[3] else None,
+                "shutdown_reason": r[4],
+                "escalation_count": r[5],
+                "highest_severity": SEVERITY_NAMES.get(r[6]),
+                "last_escalation_at": r[7].isoformat() if r[7] else None,
+                "topics_covered": r[8] or [],
+                "summarized": r[9],
+            }
+            for r in page
+        ],
+        "next_cursor": (
+            encode_cursor(page[-1][2], page[-1][0])
+            if len(rows) > limit
+            else None
+        ),
+    }
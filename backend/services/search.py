@@ -0,0 +1,120 @@
+"""Full-text search over patient questions and stored transcripts.
+
+Both scopes are served from GIN expression indexes (see schema.sql), which
+Postgres maintains on every insert, so new summaries and utterances are
+searchable as soon as handle_transcript_ready commits. Queries use
+``websearch_to_tsquery`` syntax ("ohss or bleeding", quoted phrases,
+-exclusions). Results are ordered newest summary first and paged with a
+keyset cursor on (created_at, conversation_id), so deep pages cost the same
+as the first.
+"""
+
+from datetime import datetime
+
+from db.connection import db_conn
+from services.pagination import decode_cursor, encode_cursor
+
+HEADLINE_OPTIONS = "MaxWords=25, MinWords=8, MaxFragments=2"
+MAX_SNIPPETS = 3
+
+# The to_tsvector expressions below must stay identical to the index
+# definitions in schema.sql for the planner to use them.
+_TSQUERY = "websearch_to_tsquery('english', %(query)s)"
+_QUESTION_MATCH = f"""jsonb_to_tsvector('english',
+           jsonb_path_query_array(s.questions_asked, '$[*].text'), '["string"]'
+       ) @@ {_TSQUERY}"""
+_TRANSCRIPT_MATCH = f"""s.conversation_id IN (
+           SELECT u.conversation_id FROM conversation_utterances u
+           WHERE to_tsvector('english', u.content) @@ {_TSQUERY}
+             AND (%(role)s::text IS NULL OR u.role = %(role)s)
+       )"""
+
+_QUESTION_SNIPPETS = f"""ARRAY(
+           SELECT ts_headline('english', qa->>'text', {_TSQUERY}, %(headline)s)
+           FROM jsonb_array_elements(s.questions_asked) qa
+           WHERE to_tsvector('english', qa->>'text') @@ {_TSQUERY}
+           LIMIT %(max_snippets)s
+       )"""
+_TRANSCRIPT_SNIPPETS = f"""ARRAY(
+           SELECT ts_headline('english', u.content, {_TSQUERY}, %(headline)s)
+           FROM conversation_utterances u
+           WHERE u.conversation_id = s.conversation_id
+             AND to_tsvector('english', u.content) @@ {_TSQUERY}
+             AND (%(role)s::text IS NULL OR u.role = %(role)s)
+           ORDER BY u.seq
+           LIMIT %(max_snippets)s
+       )"""
+
+
+async def search_conversations(
+    query: str,
+    *,
+    scope: str = "questions",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    topics: list[str] | None = None,
+    role: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> dict:
+    """Conversations matching ``query``, with highlighted snippets.
+
+    ``scope`` is "questions" (patient questions in the summary) or
+    "transcript" (every stored utterance, optionally only ``role``).
+    ``topics`` matches conversations covering any of the given topics.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    match, snippets = (
+        (_QUESTION_MATCH, _QUESTION_SNIPPETS)
+        if scope == "questions"
+        else (_TRANSCRIPT_MATCH, _TRANSCRIPT_SNIPPETS)
+    )
+    params = {
+        "query": query,
+        "since": since,
+        "until": until,
+        "topics": topics or None,
+        "role": role,
+        "after_created_at": after[0] if after else None,
+        "after_id": after[1] if after else None,
+        "limit": limit + 1,
+        "headline": HEADLINE_OPTIONS,
+        "max_snippets": MAX_SNIPPETS,
+    }
+    sql = f"""SELECT s.conversation_id, c.patient_name, s.created_at,
+                     s.topics_covered, {snippets}
+              FROM conversation_summaries s
+              JOIN conversations c USING (conversation_id)
+              WHERE {match}
+                AND (%(since)s::timestamptz IS NULL OR s.created_at >= %(since)s)
+                AND (%(until)s::timestamptz IS NULL OR s.created_at < %(until)s)
+                AND (%(topics)s::text[] IS NULL OR s.topics_covered && %(topics)s)
+                AND (%(after_created_at)s::timestamptz IS NULL
+                     OR (s.created_at, s.conversation_id)
+                        < (%(after_created_at)s, %(after_id)s::text))
+              ORDER BY s.created_at DESC, s.conversation_id DESC
+              LIMIT %(limit)s"""
+
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            rows = await cur.fetchall()
+
+    page = rows[:limit]
+    return {
+        "results": [
+            {
+                "conversation_id": r[0],
+                "patient_name": r[1],
+                "summarized_at": r[2].isoformat(),
+                "topics_covered": r[3] or [],
+                "snippets": r[4],
+            }
+            for r in page
+        ],
+        "next_cursor": (
+            encode_cursor(page[-1][2], page[-1][0])
+            if len(rows) > limit
+            else None
+        ),
+    }
@@ -1,14 +1,37 @@
-"""SSE notification hub — decouples webhook processing from router layer."""
+"""SSE notification hub — decouples webhook processing from router layer.
+
+Listeners are registered in the process serving the stream; summary-ready
+events travel over services.pubsub so they reach listeners on every worker.
+"""
 
 import asyncio
+import json
+from typing import AsyncIterator
+
+from config import (
+    SSE_HEARTBEAT_SECONDS,
+    SSE_IDLE_TIMEOUT_SECONDS,
+    SSE_MAX_LISTENERS_PER_CONVERSATION,
+)
+from services.metrics import gauge_labels, register_gauge
+from services.pubsub import publish, subscribe
+
+SUMMARY_READY_CHANNEL = "summary_ready"
 
 _sse_queues: dict[str, list[asyncio.Queue]] = {}
 
 
+class TooManyListenersError(Exception):
+    """The conversation already has SSE_MAX_LISTENERS_PER_CONVERSATION streams."""
+
+
 def register_listener(conversation_id: str) -> asyncio.Queue:
     """Register a new SSE listener for a conversation. Returns the queue to await."""
-    queue: asyncio.Queue = asyncio.Queue()
-    _sse_queues.setdefault(conversation_id, []).append(queue)
+    listeners = _sse_queues.setdefault(conversation_id, [])
+    if len(listeners) >= SSE_MAX_LISTENERS_PER_CONVERSATION:
+        raise TooManyListenersError(conversation_id)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    listeners.append(queue)
     return queue
 
 
@@ -17,9 +40,68 @@ def unregister_listener(conversation_id: str, queue: asyncio.Queue) -> None:
     listeners = _sse_queues.get(conversation_id, [])
     if queue in listeners:
         listeners.remove(queue)
+    if not listeners:
+        _sse_queues.pop(conversation_id, None)
 
 
-def notify_summary_ready(conversation_id: str) -> None:
-    """Push a summarized event to all SSE listeners for a conversation."""
+async def notify_summary_ready(conversation_id: str) -> None:
+    """Publish a summarized event to SSE listeners on every worker."""
+    await publish(SUMMARY_READY_CHANNEL, conversation_id)
+
+
+def _deliver_summary_ready(conversation_id: str) -> None:
     for q in _sse_queues.pop(conversation_id, []):
-        q.put_nowait({"status": "summarized"})
+        if not q.full():
+            q.put_nowait({"status": "summarized"})
+
+
+subscribe(SUMMARY_READY_CHANNEL, _deliver_summary_ready)
+
+
+async def event_stream(
+    conversation_id: str, queue: asyncio.Queue
+) -> AsyncIterator[str]:
+    """Yield the summary event as SSE, with heartbeats, until idle timeout."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SSE_IDLE_TIMEOUT_SECONDS
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), min(SSE_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                # Closed for shutdown; EventSource reconnects elsewhere.
+                return
+            yield f"data: {json.dumps(event)}\n\n"
+            return
+    finally:
+        unregister_listener(conversation_id, queue)
+
+
+def close_streams() -> None:
+    """End every open summary stream in this worker (graceful shutdown)."""
+    for listeners in list(_sse_queues.values()):
+        for q in listeners:
+            if not q.full():
+                q.put_nowait(None)
+
+
+def stream_stats() -> dict:
+    return {
+        "open_streams": sum(len(qs) for qs in _sse_queues.values()),
+        "conversations": len(_sse_queues),
+    }
+
+
+register_gauge(
+    "sse_open_streams",
+    "Open summary streams in this worker.",
+    lambda: {gauge_labels(): stream_stats()["open_streams"]},
+)
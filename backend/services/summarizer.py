@@ -1,5 +1,11 @@
 """Rule-based transcript summarizer — no external LLM calls."""
 
+import hashlib
+import string
+from typing import Iterator
+
+from services.kb_index import attach_sources
+
 TOPIC_KEYWORDS: dict[str, list[str]] = {
     "Anesthesia & sedation": ["anesthesia", "sedation", "asleep", "awake"],
     "Ovarian stimulation": ["stimulation", "injection", "gonal", "medication"],
@@ -47,6 +53,189 @@ QUESTION_STARTERS = {
 }
 
 
+class TopicMatcher:
+    """Match every taxonomy keyword in a single pass over the tokens.
+
+    Keywords match whole words only (an optional plural "s" is allowed), so
+    "rate" no longer fires on "separate" nor "eat" on "great". The lookup
+    table is built once; scanning costs one dict probe per token regardless
+    of how many keywords the taxonomy holds.
+    """
+
+    _SEPARATORS = str.maketrans(
+        {
+            c: " "
+            for c in string.punctuation
+            + "\u2018\u2019\u201c\u201d\u2013\u2014\u2026"
+        }
+    )
+
+    def __init__(self, taxonomy: dict[str, list[str]]):
+        self.topics = list(taxonomy)
+        # first token -> [(remaining tokens, topics)]
+        self._index: dict[str, list[tuple[tuple[str, ...], list[str]]]] = {}
+        for topic, keywords in taxonomy.items():
+            for kw in keywords:
+                tokens = tuple(kw.lower().translate(self._SEPARATORS).split())
+                plural = tokens[:-1] + (tokens[-1] + "s",)
+                for variant in {tokens, plural}:
+                    entries = self._index.setdefault(variant[0], [])
+                    for rest, topics in entries:
+                        if rest == variant[1:]:
+                            if topic not in topics:
+                                topics.append(topic)
+                            break
+                    else:
+                        entries.append((variant[1:], [topic]))
+
+    def scan(self, text: str) -> Iterator[str]:
+        """Yield the topic of every keyword occurrence in ``text``."""
+        tokens = text.lower().translate(self._SEPARATORS).split()
+        index = self._index
+        for i in [i for i, tok in enumerate(tokens) if tok in index]:
+            for rest, topics in index[tokens[i]]:
+                if (
+                    not rest
+                    or tuple(tokens[i + 1 : i + 1 + len(rest)]) == rest
+                ):
+                    yield from topics
+
+
+_matcher = TopicMatcher(TOPIC_KEYWORDS)
+
+
+def is_question(content: str) -> bool:
+    first_word = content.split()[0].lower().rstrip(",.?")
+    return "?" in content or first_word in QUESTION_STARTERS
+
+
+class SummaryState:
+    """Running summary that consumes a transcript one utterance at a time.
+
+    Entries use the same shape as ``generate_summary`` input. System prompt
+    entries (role "system") are skipped. Besides the persisted fields,
+    ``result()`` returns per-topic hit counts and the timestamp of each
+    topic's first mention.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        # Hash chained over every consumed entry_key, in order.
+        self.prefix_digest = b""
+        self.topic_hits: dict[str, int] = {}
+        self.first_mentions: dict[str, str | None] = {}
+        # Position of each question / first mention among consumed entries,
+        # so timestamps can be taken from the final transcript.
+        self.first_mention_indexes: dict[str, int] = {}
+        self.question_indexes: list[int] = []
+        self.questions_asked: list[dict] = []
+
+    @staticmethod
+    def entry_key(entry: dict) -> tuple:
+        """Identity of an utterance, stable across live events and the final transcript."""
+        return (entry.get("role") == "user", entry.get("content", "").strip())
+
+    @staticmethod
+    def _chain(digest: bytes, key: tuple) -> bytes:
+        return hashlib.sha256(
+            digest + (b"u" if key[0] else b"r") + key[1].encode()
+        ).digest()
+
+    def add(self, entry: dict) -> None:
+        if entry.get("role") == "system":
+            return
+        index = self.count
+        content = entry.get("content", "")
+        for topic in _matcher.scan(content):
+            if topic not in self.topic_hits:
+                self.topic_hits[topic] = 0
+                self.first_mentions[topic] = entry.get("timestamp")
+                self.first_mention_indexes[topic] = index
+            self.topic_hits[topic] += 1
+
+        key = self.entry_key(entry)
+        self.prefix_digest = self._chain(self.prefix_digest, key)
+        self.count += 1
+
+        content = key[1]
+        if key[0] and content and is_question(content):
+            self.question_indexes.append(index)
+            self.questions_asked.append(
+                {
+                    "text": content,
+                    "timestamp": entry.get("timestamp"),
+                }
+            )
+
+    def extend(self, entries: list[dict]) -> None:
+        for entry in entries:
+            self.add(entry)
+
+    def covers_prefix_of(self, utterances: list[dict]) -> bool:
+        """Whether this state consumed exactly the first ``count`` utterances.
+
+        Hashes the whole prefix, so a dropped or reordered live utterance
+        anywhere in it is detected. Hashing is far cheaper than rescanning
+        the prefix for topics.
+        """
+        if self.count == 0:
+            return True
+        if len(utterances) < self.count:
+            return False
+        digest = b""
+        for entry in utterances[: self.count]:
+            digest = self._chain(digest, self.entry_key(entry))
+        return digest == self.prefix_digest
+
+    def restamp(self, utterances: list[dict]) -> None:
+        """Take question and first-mention timestamps from ``utterances``.
+
+        Live utterances carry no timestamps; the final transcript does.
+        ``utterances`` must be the sequence this state consumed.
+        """
+        for question, index in zip(
+            self.questions_asked, self.question_indexes
+        ):
+            question["timestamp"] = utterances[index].get("timestamp")
+        for topic, index in self.first_mention_indexes.items():
+            self.first_mentions[topic] = utterances[index].get("timestamp")
+
+    def to_dict(self) -> dict:
+        """JSON-serializable state; dicts are kept as pairs to keep order."""
+        return {
+            "count": self.count,
+            "prefix_digest": self.prefix_digest.hex(),
+            "topic_hits": list(self.topic_hits.items()),
+            "first_mentions": list(self.first_mentions.items()),
+            "first_mention_indexes": list(self.first_mention_indexes.items()),
+            "question_indexes": self.question_indexes,
+            "questions_asked": self.questions_asked,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SummaryState":
+        state = cls()
+        state.count = data["count"]
+        state.prefix_digest = bytes.fromhex(data["prefix_digest"])
+        state.topic_hits = dict(data["topic_hits"])
+        state.first_mentions = dict(data["first_mentions"])
+        state.first_mention_indexes = dict(data["first_mention_indexes"])
+        state.question_indexes = data["question_indexes"]
+        state.questions_asked = data["questions_asked"]
+        return state
+
+    def result(self) -> dict:
+        return {
+            "topics_covered": [
+                t for t in _matcher.topics if t in self.topic_hits
+            ],
+            # Scored together in one pass over the knowledge-base index.
+            "questions_asked": attach_sources(self.questions_asked),
+            "topic_hits": dict(self.topic_hits),
+            "topic_first_mentions": dict(self.first_mentions),
+        }
+
+
 def generate_summary(transcript: list[dict]) -> dict:
     """Extract topics covered and questions asked from a transcript.
 
@@ -55,33 +244,25 @@ def generate_summary(transcript: list[dict]) -> dict:
       - "content": str
       - "timestamp": str (optional)
     """
-    full_text = " ".join(
-        entry.get("content", "") for entry in transcript
-    ).lower()
-
-    topics_covered = [
-        topic
-        for topic, keywords in TOPIC_KEYWORDS.items()
-        if any(kw in full_text for kw in keywords)
-    ]
-
-    questions_asked = []
-    for entry in transcript:
-        if entry.get("role") != "user":
-            continue
-        content = entry.get("content", "").strip()
-        if not content:
-            continue
-        first_word = content.split()[0].lower().rstrip(",.?")
-        if "?" in content or first_word in QUESTION_STARTERS:
-            questions_asked.append(
-                {
-                    "text": content,
-                    "timestamp": entry.get("timestamp"),
-                }
-            )
+    state = SummaryState()
+    state.extend(transcript)
+    return state.result()
+
 
-    return {
-        "topics_covered": topics_covered,
-        "questions_asked": questions_asked,
-    }
+def reconcile_summary(
+    state: SummaryState, transcript: list[dict]
+) -> tuple[dict, bool]:
+    """Finish a live SummaryState against the final transcript.
+
+    When the live state matches the start of the transcript only the
+    remaining tail is processed and timestamps are taken from the
+    transcript; otherwise the transcript is summarized from scratch. Either
+    way the summary equals ``generate_summary(transcript)``. Returns the
+    summary and whether the live state was used.
+    """
+    utterances = [e for e in transcript if e.get("role") != "system"]
+    if not state.covers_prefix_of(utterances):
+        return generate_summary(utterances), False
+    state.extend(utterances[state.count :])
+    state.restamp(utterances)
+    return state.result(), True
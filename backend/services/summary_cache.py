@@ -0,0 +1,128 @@
+"""Pre-serialized summary responses, cached per conversation.
+
+``GET /conversations/{id}/summary`` is polled by the summary page. The
+response body is assembled by Postgres in one query (summary, conversation
+and escalations via json_build_object) and kept as bytes together with its
+ETag in a bounded LRU, so repeated reads neither touch the database nor
+build response models. Writes that change a summary call ``invalidate``,
+which evicts the entry on every worker over services.pubsub:
+
+- log_escalation / log_escalations_batch (new escalations)
+- buffer_perception (perception notes added to an existing summary)
+- handle_shutdown (ended_at set)
+
+``resummarize.py`` runs outside the API, so it sends the same notification
+with pg_notify in the transaction that rewrites a summary (with the memory
+pub/sub backend nothing receives it and the TTL applies).
+
+Pub/sub delivery is best-effort, so entries also expire after
+SUMMARY_CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+from config import SUMMARY_CACHE_MAX_CONVERSATIONS, SUMMARY_CACHE_TTL_SECONDS
+from db.connection import db_conn
+from services.metrics import gauge_labels, register_gauge
+from services.pubsub import publish, subscribe
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CHANGED_CHANNEL = "summary_changed"
+
+# conversation_id -> (expires_at, body, etag)
+_entries: OrderedDict[str, tuple[float, bytes, str]] = OrderedDict()
+# Bumped on every invalidation; a read that raced one is not cached.
+_generation = 0
+
+
+async def get_summary_json(conversation_id: str) -> tuple[bytes, str] | None:
+    """The serialized summary and its ETag, or None if not summarized yet."""
+    entry = _entries.get(conversation_id)
+    if entry is not None:
+        expires_at, body, etag = entry
+        if expires_at > time.monotonic():
+            _entries.move_to_end(conversation_id)
+            return body, etag
+        del _entries[conversation_id]
+
+    generation = _generation
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """SELECT json_build_object(
+                              'conversation_id', c.conversation_id,
+                              'patient_name', c.patient_name,
+                              'topics_covered', s.topics_covered,
+                              'questions_asked', s.questions_asked,
+                              'escalation_count', e.count,
+                              'escalations', e.items,
+                              'ended_at', c.ended_at,
+                              'perception_notes', s.perception_notes
+                          )::text
+                   FROM conversations c
+                   JOIN conversation_summaries s USING (conversation_id)
+                   CROSS JOIN LATERAL (
+                       SELECT count(*) AS count,
+                              COALESCE(json_agg(json_build_object(
+                                  'event_type', event_type,
+                                  'severity', severity,
+                                  'question_text', question_text,
+                                  'reason', reason,
+                                  'occurred_at', occurred_at
+                              ) ORDER BY occurred_at), '[]') AS items
+                       FROM escalation_events
+                       WHERE conversation_id = c.conversation_id
+                   ) e
+                   WHERE c.conversation_id = %s""",
+                (conversation_id,),
+            )
+            row = await cur.fetchone()
+    if row is None:
+        return None
+
+    body = row[0].encode()
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    if generation == _generation:
+        _entries[conversation_id] = (
+            time.monotonic() + SUMMARY_CACHE_TTL_SECONDS,
+            body,
+            etag,
+        )
+        while len(_entries) > SUMMARY_CACHE_MAX_CONVERSATIONS:
+            _entries.popitem(last=False)
+    return body, etag
+
+
+async def invalidate(conversation_id: str) -> None:
+    """Drop the cached summary on every worker.
+
+    Callers invalidate after their write has committed, so a failed publish
+    is logged rather than raised: this worker still evicts, and the others
+    serve the stale entry until the TTL.
+    """
+    _evict(conversation_id)
+    try:
+        await publish(SUMMARY_CHANGED_CHANNEL, conversation_id)
+    except Exception:
+        logger.exception(
+            "Summary invalidation not published for %s", conversation_id
+        )
+
+
+def _evict(conversation_id: str) -> None:
+    global _generation
+    _generation += 1
+    _entries.pop(conversation_id, None)
+
+
+subscribe(SUMMARY_CHANGED_CHANNEL, _evict)
+
+register_gauge(
+    "summary_cache_entries",
+    "Serialized summaries cached in this worker.",
+    lambda: {gauge_labels(): len(_entries)},
+)
@@ -1,46 +1,274 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import re
+import time
+
 import httpx
 
-from config import TAVUS_API_KEY, TAVUS_PERSONA_ID, WEBHOOK_URL
+from config import (
+    TAVUS_API_KEY,
+    TAVUS_BASE_URL,
+    TAVUS_BREAKER_RESET_SECONDS,
+    TAVUS_BREAKER_THRESHOLD,
+    TAVUS_HTTP2,
+    TAVUS_MAX_CONNECTIONS,
+    TAVUS_MAX_IN_FLIGHT,
+    TAVUS_MAX_RETRIES,
+    TAVUS_PERSONA_ID,
+    TAVUS_RETRY_BASE_SECONDS,
+    TAVUS_TIMEOUT,
+    WEBHOOK_URL,
+)
+from services.metrics import (
+    gauge_labels,
+    register_gauge,
+    tavus_errors,
+    tavus_request_duration,
+)
+
+logger = logging.getLogger(__name__)
 
-TAVUS_BASE = "https://tavusapi.com"
+TAVUS_BASE = TAVUS_BASE_URL
 HEADERS = {"x-api-key": TAVUS_API_KEY, "Content-Type": "application/json"}
 
+_RETRYABLE_STATUS = {429, 502, 503, 504}
+# Errors raised before any byte of the request reached Tavus — safe to retry
+# even for calls that create resources.
+_NOT_SENT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+# Resource ids in paths are folded so metrics have one series per endpoint.
+_PATH_ID = re.compile(r"(/(?:conversations|personas|documents)/)[^/]+")
+
+
+class TavusUnavailableError(RuntimeError):
+    """Tavus is degraded (circuit open) or saturated; fail fast."""
+
+
+class _CircuitBreaker:
+    """Opens after consecutive failures; lets one trial call through per cool-down."""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open":
+            raise TavusUnavailableError("Tavus circuit breaker is open")
+        if state == "half_open":
+            # Re-arm the window so concurrent callers keep failing fast
+            # while this one probes Tavus.
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is None and self.failures >= self.threshold:
+            logger.warning(
+                "Tavus circuit breaker opened after %s failures", self.failures
+            )
+            self.opened_at = time.monotonic()
+        elif self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+_client: httpx.AsyncClient | None = None
+_in_flight = asyncio.Semaphore(TAVUS_MAX_IN_FLIGHT)
+_breaker = _CircuitBreaker(
+    TAVUS_BREAKER_THRESHOLD, TAVUS_BREAKER_RESET_SECONDS
+)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared keep-alive client so calls reuse TCP+TLS connections."""
+    global _client
+    if _client is None:
+        http2 = TAVUS_HTTP2 and importlib.util.find_spec("h2") is not None
+        if TAVUS_HTTP2 and not http2:
+            logger.warning(
+                "TAVUS_HTTP2 is set but the 'h2' package is missing; "
+                "install httpx[http2]. Falling back to HTTP/1.1."
+            )
+        _client = httpx.AsyncClient(
+            base_url=TAVUS_BASE,
+            headers=HEADERS,
+            timeout=TAVUS_TIMEOUT,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=TAVUS_MAX_CONNECTIONS,
+                max_keepalive_connections=TAVUS_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+async def open_client() -> None:
+    """Create the client and open a keep-alive connection ahead of traffic.
 
-async def create_conversation(patient_name: str) -> dict:
-    """Create a Tavus conversation. Returns {conversation_id, conversation_url}."""
+    The pre-connect is best effort: any response (even 404) leaves a warm
+    TCP+TLS connection in the pool, and a failure only costs a warning.
+    """
+    client = get_client()
+    try:
+        await client.head("/", timeout=5)
+    except httpx.HTTPError as exc:
+        logger.warning("Could not pre-connect to Tavus: %r", exc)
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def tavus_request(
+    method: str,
+    path: str,
+    *,
+    json: dict | list | None = None,
+    idempotent: bool = False,
+    timeout: float | None = None,
+) -> httpx.Response:
+    """Send a request to Tavus through the shared client.
+
+    At most TAVUS_MAX_IN_FLIGHT calls run concurrently. Idempotent calls are
+    retried with jittered backoff on transport errors and 429/5xx responses;
+    non-idempotent calls are only retried when the request was never sent.
+    Raises TavusUnavailableError while the circuit breaker is open.
+    """
+    client = get_client()
+    endpoint = method + " " + _PATH_ID.sub(r"\1{id}", path)
+    try:
+        await asyncio.wait_for(_in_flight.acquire(), TAVUS_TIMEOUT)
+    except asyncio.TimeoutError:
+        tavus_errors.inc(endpoint=endpoint, reason="saturated")
+        raise TavusUnavailableError("Too many in-flight Tavus calls")
+
+    try:
+        for attempt in range(TAVUS_MAX_RETRIES + 1):
+            try:
+                _breaker.before_call()
+            except TavusUnavailableError:
+                tavus_errors.inc(endpoint=endpoint, reason="breaker_open")
+                raise
+            retry = attempt < TAVUS_MAX_RETRIES
+            start = time.perf_counter()
+            try:
+                resp = await client.request(
+                    method,
+                    path,
+                    json=json,
+                    timeout=timeout if timeout is not None else TAVUS_TIMEOUT,
+                )
+            except httpx.TransportError as exc:
+                tavus_request_duration.observe(
+                    time.perf_counter() - start, endpoint=endpoint
+                )
+                tavus_errors.inc(endpoint=endpoint, reason=type(exc).__name__)
+                _breaker.record_failure()
+                if not retry or not (
+                    idempotent or isinstance(exc, _NOT_SENT_ERRORS)
+                ):
+                    raise
+            else:
+                tavus_request_duration.observe(
+                    time.perf_counter() - start, endpoint=endpoint
+                )
+                if resp.status_code >= 400:
+                    tavus_errors.inc(
+                        endpoint=endpoint, reason=str(resp.status_code)
+                    )
+                if resp.status_code < 500:
+                    _breaker.record_success()
+                else:
+                    _breaker.record_failure()
+                if not (
+                    retry
+                    and idempotent
+                    and resp.status_code in _RETRYABLE_STATUS
+                ):
+                    return resp
+            await asyncio.sleep(
+                random.uniform(0, TAVUS_RETRY_BASE_SECONDS * 2**attempt)
+            )
+    finally:
+        _in_flight.release()
+
+
+def _client_gauges() -> dict:
+    state = _breaker.state
+    return {
+        gauge_labels(state=s): int(s == state)
+        for s in ("closed", "open", "half_open")
+    }
+
+
+register_gauge(
+    "tavus_circuit_breaker",
+    "1 for the current Tavus circuit breaker state.",
+    _client_gauges,
+)
+
+
+async def create_conversation(
+    patient_name: str, history: str | None = None
+) -> dict:
+    """Create a Tavus conversation. Returns {conversation_id, conversation_url}.
+
+    ``history`` is a recap of the patient's earlier sessions, appended to
+    the conversational context.
+    """
+    context = (
+        f"Pre-procedure educational session for a patient preparing for egg retrieval at UCSF.\n"
+        f"Patient name: {patient_name}. Address them by name throughout the conversation.\n"
+        f"Your role is educational and supportive only — not diagnostic.\n\n"
+        f"Clinic contacts:\n"
+        f"- M-F 8am-5pm: 4 1 5, 3 5 3, 7 4 7 5 (option 2 for Nurse)\n"
+        f"- After-hours / Weekends: 4 1 5, 5 6 1, 9 0 2 0\n"
+        f"- UCSF ER: 4 1 5, 3 5 3, 1 2 3 8"
+    )
+    if history:
+        context += f"\n\n{history}"
     payload = {
         "persona_id": TAVUS_PERSONA_ID,
-        "conversational_context": (
-            f"Pre-procedure educational session for a patient preparing for egg retrieval at UCSF.\n"
-            f"Patient name: {patient_name}. Address them by name throughout the conversation.\n"
-            f"Your role is educational and supportive only — not diagnostic.\n\n"
-            f"Clinic contacts:\n"
-            f"- M-F 8am-5pm: 4 1 5, 3 5 3, 7 4 7 5 (option 2 for Nurse)\n"
-            f"- After-hours / Weekends: 4 1 5, 5 6 1, 9 0 2 0\n"
-            f"- UCSF ER: 4 1 5, 3 5 3, 1 2 3 8"
-        ),
+        "conversational_context": context,
         "callback_url": f"{WEBHOOK_URL}/api/webhooks/tavus",
         "document_tags": ["egg-retrieval-companion"],
         "document_retrieval_strategy": "quality",
     }
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(
-            f"{TAVUS_BASE}/v2/conversations", json=payload, headers=HEADERS
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return {
-            "conversation_id": data["conversation_id"],
-            "conversation_url": data["conversation_url"],
-        }
+    resp = await tavus_request("POST", "/v2/conversations", json=payload)
+    resp.raise_for_status()
+    data = resp.json()
+    return {
+        "conversation_id": data["conversation_id"],
+        "conversation_url": data["conversation_url"],
+    }
 
 
 async def end_conversation(conversation_id: str) -> bool:
     """Gracefully end a conversation. Returns True on success."""
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(
-            f"{TAVUS_BASE}/v2/conversations/{conversation_id}/end",
-            headers=HEADERS,
-        )
-        return resp.is_success
+    resp = await tavus_request(
+        "POST", f"/v2/conversations/{conversation_id}/end", idempotent=True
+    )
+    return resp.is_success
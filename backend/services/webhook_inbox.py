@@ -0,0 +1,286 @@
+"""Durable webhook inbox — acknowledge Tavus first, process in the background.
+
+The webhook route only persists the raw event. A pool of workers claims
+pending rows with FOR UPDATE SKIP LOCKED, so several workers (and several
+uvicorn processes) can drain the inbox concurrently. A row is only claimable
+when no older pending event exists for the same conversation, which keeps
+per-conversation ordering. Claiming sets a lease on ``available_at``; a worker
+that dies mid-event lets the lease expire and the event is redelivered
+(at-least-once). Failures are retried with jittered exponential backoff until
+WEBHOOK_MAX_ATTEMPTS, after which the row is parked as ``dead``.
+
+Tavus retries deliveries it did not see acknowledged, so each event is keyed
+by the SHA-256 of its raw body. Keys seen recently by this worker are
+rejected from memory before the body is parsed; the unique ``event_key`` on
+the inbox catches the rest (other workers, restarts) for as long as rows
+are retained (WEBHOOK_INBOX_RETENTION_HOURS).
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from psycopg.types.json import Jsonb
+
+from config import (
+    WEBHOOK_DEDUP_MEMORY_SIZE,
+    WEBHOOK_INBOX_RETENTION_HOURS,
+    WEBHOOK_LEASE_SECONDS,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_POLL_INTERVAL,
+    WEBHOOK_RETRY_BASE_SECONDS,
+    WEBHOOK_RETRY_MAX_SECONDS,
+    WEBHOOK_WORKERS,
+)
+from db.connection import db_conn
+from services.metrics import (
+    gauge_labels,
+    register_gauge,
+    webhook_duplicates,
+    webhook_lag,
+)
+from services.webhook_processor import process_webhook
+
+logger = logging.getLogger(__name__)
+
+_PURGE_INTERVAL_SECONDS = 3600
+
+_workers: list[asyncio.Task] = []
+_wakeup = asyncio.Event()
+_stopping = False
+_in_flight = 0
+_recent_keys: OrderedDict[str, None] = OrderedDict()
+
+
+def event_key(raw_body: bytes) -> str:
+    return hashlib.sha256(raw_body).hexdigest()
+
+
+def _remember(key: str) -> None:
+    _recent_keys[key] = None
+    _recent_keys.move_to_end(key)
+    while len(_recent_keys) > WEBHOOK_DEDUP_MEMORY_SIZE:
+        _recent_keys.popitem(last=False)
+
+
+def seen_recently(key: str) -> bool:
+    """True if this worker already accepted an event with ``key``."""
+    if key in _recent_keys:
+        webhook_duplicates.inc(caught_by="memory")
+        return True
+    return False
+
+
+async def enqueue_webhook(
+    event_type: str, conversation_id: str, body: dict, key: str
+) -> int | None:
+    """Persist a raw webhook event and wake a local worker.
+
+    Returns the inbox id, or None if an event with ``key`` is already in the
+    inbox.
+    """
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """INSERT INTO webhook_inbox (conversation_id, event_type, body, event_key)
+                   VALUES (%s, %s, %s, %s)
+                   ON CONFLICT (event_key) DO NOTHING
+                   RETURNING id""",
+                (conversation_id, event_type, Jsonb(body), key),
+            )
+            row = await cur.fetchone()
+    _remember(key)
+    if row is None:
+        webhook_duplicates.inc(caught_by="db")
+        return None
+    _wakeup.set()
+    return row[0]
+
+
+async def _claim() -> tuple | None:
+    """Lease the oldest deliverable event whose conversation has no older pending one."""
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """UPDATE webhook_inbox
+                   SET attempts = attempts + 1,
+                       available_at = NOW() + make_interval(secs => %s)
+                   WHERE id = (
+                       SELECT i.id FROM webhook_inbox i
+                       WHERE i.status = 'pending' AND i.available_at <= NOW()
+                         AND NOT EXISTS (
+                             SELECT 1 FROM webhook_inbox e
+                             WHERE e.conversation_id = i.conversation_id
+                               AND e.status = 'pending' AND e.id < i.id
+                         )
+                       ORDER BY i.available_at, i.id
+                       LIMIT 1
+                       FOR UPDATE SKIP LOCKED
+                   )
+                   RETURNING id, conversation_id, event_type, body, attempts, received_at""",
+                (WEBHOOK_LEASE_SECONDS,),
+            )
+            return await cur.fetchone()
+
+
+async def _complete(inbox_id: int) -> None:
+    async with db_conn() as conn:
+        await conn.execute(
+            "UPDATE webhook_inbox SET status = 'done', processed_at = NOW(), last_error = NULL WHERE id = %s",
+            (inbox_id,),
+        )
+
+
+async def _fail(inbox_id: int, attempts: int, error: str) -> None:
+    """Schedule a retry with jittered backoff, or park the event as dead."""
+    if attempts >= WEBHOOK_MAX_ATTEMPTS:
+        logger.error(
+            "Webhook inbox event %s dead after %s attempts: %s",
+            inbox_id,
+            attempts,
+            error,
+        )
+        sql = """UPDATE webhook_inbox
+                 SET status = 'dead', processed_at = NOW(), last_error = %s
+                 WHERE id = %s"""
+        params = (error, inbox_id)
+    else:
+        delay = min(
+            WEBHOOK_RETRY_MAX_SECONDS,
+            WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        ) * random.uniform(0.5, 1.0)
+        logger.warning(
+            "Webhook inbox event %s failed (attempt %s), retrying in %.1fs: %s",
+            inbox_id,
+            attempts,
+            delay,
+            error,
+        )
+        sql = """UPDATE webhook_inbox
+                 SET available_at = NOW() + make_interval(secs => %s), last_error = %s
+                 WHERE id = %s"""
+        params = (delay, error, inbox_id)
+    async with db_conn() as conn:
+        await conn.execute(sql, params)
+
+
+async def _purge_processed() -> None:
+    async with db_conn() as conn:
+        await conn.execute(
+            """DELETE FROM webhook_inbox
+               WHERE status <> 'pending'
+                 AND processed_at < NOW() - %s * INTERVAL '1 hour'""",
+            (WEBHOOK_INBOX_RETENTION_HOURS,),
+        )
+
+
+async def _idle() -> None:
+    try:
+        await asyncio.wait_for(_wakeup.wait(), WEBHOOK_POLL_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    _wakeup.clear()
+
+
+async def _worker(worker_id: int) -> None:
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    next_purge = loop.time()
+    while not _stopping:
+        try:
+            if worker_id == 0 and loop.time() >= next_purge:
+                next_purge = loop.time() + _PURGE_INTERVAL_SECONDS
+                await _purge_processed()
+            row = await _claim()
+        except Exception:
+            logger.exception(
+                "Webhook inbox worker %s failed to claim", worker_id
+            )
+            await asyncio.sleep(WEBHOOK_POLL_INTERVAL)
+            continue
+
+        if row is None:
+            await _idle()
+            continue
+
+        inbox_id, conversation_id, event_type, body, attempts, received_at = (
+            row
+        )
+        _in_flight += 1
+        try:
+            try:
+                await process_webhook(
+                    event_type, conversation_id, body.get("properties", body)
+                )
+            except Exception as exc:
+                await _fail(inbox_id, attempts, repr(exc))
+            else:
+                webhook_lag.observe(
+                    (datetime.now(timezone.utc) - received_at).total_seconds(),
+                    event_type=event_type,
+                )
+                await _complete(inbox_id)
+        except Exception:
+            # The lease expires and the event is redelivered.
+            logger.exception(
+                "Webhook inbox worker %s failed to record event %s",
+                worker_id,
+                inbox_id,
+            )
+        finally:
+            _in_flight -= 1
+
+
+def start_workers(count: int = WEBHOOK_WORKERS) -> None:
+    global _stopping
+    _stopping = False
+    for worker_id in range(count):
+        _workers.append(asyncio.create_task(_worker(worker_id)))
+
+
+async def stop_workers(timeout: float = 30.0) -> None:
+    """Let workers finish their current event, then stop them."""
+    global _stopping
+    _stopping = True
+    _wakeup.set()
+    if not _workers:
+        return
+    _, pending = await asyncio.wait(_workers, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    _workers.clear()
+
+
+async def inbox_stats() -> dict:
+    """Inbox depth and processing lag, for sizing WEBHOOK_WORKERS."""
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("""SELECT
+                       COUNT(*) FILTER (WHERE status = 'pending'),
+                       COUNT(*) FILTER (WHERE status = 'pending' AND attempts > 0),
+                       COUNT(*) FILTER (WHERE status = 'dead'),
+                       EXTRACT(EPOCH FROM NOW() - MIN(received_at) FILTER (WHERE status = 'pending')),
+                       EXTRACT(EPOCH FROM AVG(processed_at - received_at) FILTER (
+                           WHERE status = 'done' AND processed_at > NOW() - INTERVAL '5 minutes'
+                       ))
+                   FROM webhook_inbox""")
+            pending, retrying, dead, oldest_age, avg_lag = await cur.fetchone()
+    return {
+        "pending": pending,
+        "retrying": retrying,
+        "dead": dead,
+        "oldest_pending_age_seconds": float(oldest_age or 0),
+        "avg_processing_lag_seconds_5m": float(avg_lag or 0),
+        "workers": len(_workers),
+        "in_flight": _in_flight,
+    }
+
+
+register_gauge(
+    "webhook_inbox_in_flight",
+    "Webhook events being processed by this worker's inbox tasks.",
+    lambda: {gauge_labels(): _in_flight},
+)
@@ -2,14 +2,25 @@
 
 import json
 
+from psycopg import AsyncCursor
+
 from db.connection import db_conn
+from services.live_summary import (
+    discard_live_summary,
+    finalize_summary,
+    load_live_summary,
+)
+from services.metrics import summary_generation
+from services.patient_history import patient_summarized
+from services.perception import PerceptionAccumulator
+from services.perception_store import perception_store
+from services.rollups import rollup_ended, rollup_summarized
 from services.sse import notify_summary_ready
-from services.summarizer import generate_summary
+from services.summary_cache import invalidate as invalidate_summary
 
-# In-memory buffer: holds Raven-1 observations until transcript_ready drains them.
-# Both webhook events and frontend flushes write here; the race between them
+# perception_store accumulates Raven-1 observations until transcript_ready drains them.
+# Both webhook events and frontend flushes write there; the race between them
 # is resolved in buffer_perception() by checking if the summary row exists yet.
-_perception_buffer: dict[str, list[dict]] = {}
 
 
 async def process_webhook(
@@ -17,126 +28,170 @@ async def process_webhook(
 ) -> None:
     """Route a Tavus webhook event to the appropriate handler."""
     if event_type == "system.shutdown":
-        handle_shutdown(
+        await handle_shutdown(
             conversation_id, payload.get("shutdown_reason", "unknown")
         )
     elif event_type == "application.perception_analysis":
-        handle_perception_analysis(conversation_id, payload)
+        await handle_perception_analysis(conversation_id, payload)
     elif event_type == "application.transcription_ready":
-        handle_transcript_ready(conversation_id, payload.get("transcript", []))
+        await handle_transcript_ready(
+            conversation_id, payload.get("transcript", [])
+        )
 
 
-def handle_shutdown(conversation_id: str, shutdown_reason: str) -> None:
-    """Mark conversation as ended with its shutdown reason."""
-    with db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE conversations SET ended_at = NOW(), shutdown_reason = %s WHERE conversation_id = %s",
+async def handle_shutdown(conversation_id: str, shutdown_reason: str) -> None:
+    """Mark conversation as ended with its shutdown reason (first one wins)."""
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "UPDATE conversations SET ended_at = NOW(), shutdown_reason = %s WHERE conversation_id = %s AND ended_at IS NULL",
                 (shutdown_reason, conversation_id),
             )
+            if cur.rowcount == 0:
+                return
+        await rollup_ended(conn, conversation_id, shutdown_reason)
+    await invalidate_summary(conversation_id)
 
 
-def handle_perception_analysis(conversation_id: str, payload: dict) -> None:
+async def handle_perception_analysis(
+    conversation_id: str, payload: dict
+) -> None:
     """Buffer a Raven-1 perception event until transcript is ready."""
-    _perception_buffer.setdefault(conversation_id, []).append(payload)
+    await perception_store.append(conversation_id, [payload])
 
 
-def buffer_perception(conversation_id: str, observations: list[dict]) -> None:
+async def buffer_perception(
+    conversation_id: str, observations: list[dict]
+) -> None:
     """
     Accept accumulated emotion observations from the frontend.
 
     If a summary row already exists (race: transcript webhook arrived first),
     compile the notes and update the row directly.
     """
-    _perception_buffer.setdefault(conversation_id, []).extend(observations)
-
-    with db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+    await perception_store.append(conversation_id, observations)
+    await perception_store.reclaim(conversation_id)
+
+    drained = PerceptionAccumulator()
+    notes = None
+    try:
+        async with db_conn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT 1 FROM conversation_summaries WHERE conversation_id = %s",
+                    (conversation_id,),
+                )
+                if await cur.fetchone():
+                    drained = await perception_store.drain(
+                        conversation_id, conn
+                    )
+                    notes = drained.notes()
+                    if notes:
+                        await cur.execute(
+                            "UPDATE conversation_summaries SET perception_notes = %s WHERE conversation_id = %s",
+                            (notes, conversation_id),
+                        )
+    except Exception:
+        await perception_store.restore(conversation_id, drained)
+        raise
+    if notes:
+        await invalidate_summary(conversation_id)
+
+
+async def _summary_exists(conversation_id: str) -> bool:
+    async with db_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 "SELECT 1 FROM conversation_summaries WHERE conversation_id = %s",
                 (conversation_id,),
             )
-            if cur.fetchone():
-                all_obs = _perception_buffer.pop(conversation_id, [])
-                notes = compile_perception_notes(all_obs)
-                if notes:
-                    cur.execute(
-                        "UPDATE conversation_summaries SET perception_notes = %s WHERE conversation_id = %s",
-                        (notes, conversation_id),
-                    )
-
-
-def compile_perception_notes(events: list[dict]) -> str | None:
-    """Rule-based compilation of Raven-1 emotional observations."""
-    if not events:
-        return None
-
-    emotion_counts: dict[str, int] = {}
-    distress_detected = False
-
-    for event in events:
-        label = event.get("emotion", event.get("label", "neutral")).lower()
-        emotion_counts[label] = emotion_counts.get(label, 0) + 1
-        if label in ("distress", "panic", "distressed"):
-            distress_detected = True
-
-    if not emotion_counts:
-        return None
-
-    dominant = max(emotion_counts, key=lambda k: emotion_counts[k])
-    total = sum(emotion_counts.values())
+            return await cur.fetchone() is not None
 
-    parts = [
-        f"Maya observed that you were mostly {dominant} throughout the session."
-    ]
 
-    secondary = {
-        k: v
-        for k, v in emotion_counts.items()
-        if k != dominant and v / total > 0.15
-    }
-    if secondary:
-        labels = " and ".join(secondary.keys())
-        parts.append(f"There were some moments of {labels}.")
-
-    if distress_detected:
-        parts.append(
-            "Some signs of distress were noted — your care team has been informed."
-        )
-    else:
-        parts.append("No signs of high distress were detected.")
-
-    return " ".join(parts)
+async def _store_transcript(
+    cur: AsyncCursor, conversation_id: str, transcript: list[dict]
+) -> None:
+    """COPY the transcript into conversation_utterances, one row per entry."""
+    async with cur.copy(
+        """COPY conversation_utterances
+           (conversation_id, seq, role, spoken_at, content) FROM STDIN"""
+    ) as copy:
+        for seq, entry in enumerate(transcript):
+            await copy.write_row(
+                (
+                    conversation_id,
+                    seq,
+                    entry.get("role", ""),
+                    entry.get("timestamp"),
+                    entry.get("content", ""),
+                )
+            )
 
 
-def handle_transcript_ready(
+async def handle_transcript_ready(
     conversation_id: str, transcript: list[dict]
 ) -> None:
     """
     Generate and persist the conversation summary. Idempotent on duplicate webhooks.
 
+    The transcript is stored with the summary row in the same transaction.
     Emits SSE only when a new summary row is inserted.
     """
-    buffered = _perception_buffer.pop(conversation_id, [])
-    summary = generate_summary(transcript)
-    perception_notes = compile_perception_notes(buffered)
-
-    with db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """INSERT INTO conversation_summaries
-                   (conversation_id, raw_transcript, topics_covered, questions_asked, perception_notes)
-                   VALUES (%s, %s, %s, %s, %s)
-                   ON CONFLICT (conversation_id) DO NOTHING""",
-                (
-                    conversation_id,
-                    json.dumps(transcript),
-                    summary["topics_covered"],
-                    json.dumps(summary["questions_asked"]),
-                    perception_notes,
-                ),
-            )
-            inserted = cur.rowcount > 0
+    # A redelivered event (expired lease, retry after a late failure) must
+    # not pay for summarization only to be skipped by the insert below.
+    if await _summary_exists(conversation_id):
+        async with db_conn() as conn:
+            await discard_live_summary(conn, conversation_id)
+        return
+
+    live_state = await load_live_summary(conversation_id)
+    with summary_generation.time():
+        summary = finalize_summary(live_state, transcript)
+
+    await perception_store.reclaim(conversation_id)
+    buffered = PerceptionAccumulator()
+    try:
+        async with db_conn() as conn:
+            buffered = await perception_store.drain(conversation_id, conn)
+            perception_notes = buffered.notes()
+            async with conn.cursor() as cur:
+                # The partitioned table cannot have a unique key on
+                # conversation_id alone; the lock makes the NOT EXISTS check
+                # and the insert atomic per conversation instead.
+                await cur.execute(
+                    "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))",
+                    (conversation_id,),
+                )
+                await cur.execute(
+                    """INSERT INTO conversation_summaries
+                       (conversation_id, topics_covered, questions_asked, perception_notes)
+                       SELECT %(cid)s, %(topics)s, %(questions)s, %(notes)s
+                       WHERE EXISTS (SELECT 1 FROM conversations WHERE conversation_id = %(cid)s)
+                         AND NOT EXISTS (SELECT 1 FROM conversation_summaries
+                                         WHERE conversation_id = %(cid)s)""",
+                    {
+                        "cid": conversation_id,
+                        "topics": summary["topics_covered"],
+                        "questions": json.dumps(summary["questions_asked"]),
+                        "notes": perception_notes,
+                    },
+                )
+                inserted = cur.rowcount > 0
+                await discard_live_summary(conn, conversation_id)
+                if inserted:
+                    await _store_transcript(cur, conversation_id, transcript)
+                    await rollup_summarized(
+                        conn, conversation_id, summary["topics_covered"]
+                    )
+                    await patient_summarized(
+                        conn,
+                        conversation_id,
+                        summary["topics_covered"],
+                        summary["questions_asked"],
+                    )
+    except Exception:
+        await perception_store.restore(conversation_id, buffered)
+        raise
 
     if inserted:
-        notify_summary_ready(conversation_id)
+        await notify_summary_ready(conversation_id)
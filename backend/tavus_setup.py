@@ -1,20 +1,29 @@
 """
-One-time Tavus setup — run both functions before starting the server.
-Copy the returned TAVUS_PERSONA_ID into .env.
+Tavus knowledge base and persona setup.
+
+`sync` does everything in one run and is safe to repeat: it uploads new or
+changed documents from data/, waits for Tavus to process them, retires
+replaced ones and creates or updates the persona. `upload` and `persona`
+are the original one-shot steps. Copy the returned TAVUS_PERSONA_ID into .env.
+`index` (also run by `sync`) rebuilds the local BM25 index the summarizer
+uses to link patient questions to these documents.
 """
 
 import sys
 import asyncio
+import hashlib
+import json
+import os
+import random
+from pathlib import Path
+
 from config import (
-    TAVUS_API_KEY,
+    TAVUS_PERSONA_ID,
     TAVUS_REPLICA_ID,
     WEBHOOK_URL,
 )
-
-import httpx
-
-TAVUS_BASE = "https://tavusapi.com"
-HEADERS = {"x-api-key": TAVUS_API_KEY, "Content-Type": "application/json"}
+from services.kb_index import build_index
+from services.tavus import close_client, tavus_request
 
 DOCUMENT_TAG = "egg-retrieval-companion"
 DOCUMENTS = [
@@ -100,76 +109,267 @@ TOOLS = [
 
 async def upload_documents() -> list[str]:
     """Upload knowledge-base docs to Tavus. Returns list of document IDs."""
-    async with httpx.AsyncClient(timeout=60) as client:
-        doc_ids: list[str] = []
-        for filename in DOCUMENTS:
-            doc_name = filename.removesuffix(".txt")
-            payload = {
-                "document_name": doc_name,
-                "document_url": f"{WEBHOOK_URL}/static/{filename}",
-                "tags": [DOCUMENT_TAG],
-            }
-            resp = await client.post(
-                f"{TAVUS_BASE}/v2/documents", json=payload, headers=HEADERS
+    doc_ids: list[str] = []
+    for filename in DOCUMENTS:
+        doc_name = filename.removesuffix(".txt")
+        payload = {
+            "document_name": doc_name,
+            "document_url": f"{WEBHOOK_URL}/static/{filename}",
+            "tags": [DOCUMENT_TAG],
+        }
+        resp = await tavus_request(
+            "POST", "/v2/documents", json=payload, timeout=60
+        )
+        if not resp.is_success:
+            print(
+                f"ERROR uploading {doc_name}: {resp.status_code} {resp.text}",
+                file=sys.stderr,
             )
-            if not resp.is_success:
-                print(
-                    f"ERROR uploading {doc_name}: {resp.status_code} {resp.text}",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-            doc_id = resp.json()["document_id"]
-            doc_ids.append(doc_id)
-            print(f"Uploaded {doc_name} → {doc_id}")
+            sys.exit(1)
+        doc_id = resp.json()["document_id"]
+        doc_ids.append(doc_id)
+        print(f"Uploaded {doc_name} → {doc_id}")
     print(
         f"\nAll {len(doc_ids)} documents uploaded. Wait a few minutes for processing, then run create_persona()."
     )
     return doc_ids
 
 
+def _persona_payload() -> dict:
+    return {
+        "persona_name": "Maya - UCSF Egg Retrieval Companion",
+        "system_prompt": SYSTEM_PROMPT,
+        "default_replica_id": TAVUS_REPLICA_ID,
+        "layers": {
+            "llm": {
+                "tools": TOOLS,
+                "extra_body": {"temperature": 0.2, "top_p": 0.9},
+            },
+            "perception": {"perception_model": "raven-1"},
+        },
+    }
+
+
 async def create_persona() -> str:
     """Create the Maya persona on Tavus. Returns persona ID."""
-    async with httpx.AsyncClient(timeout=60) as client:
+    resp = await tavus_request(
+        "POST", "/v2/personas", json=_persona_payload(), timeout=60
+    )
+    if not resp.is_success:
+        print(
+            f"Persona creation failed: {resp.status_code} {resp.text}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    persona_id = resp.json()["persona_id"]
+    print(f"Persona created: {persona_id}")
+    print(f"\nAdd to .env:\n    TAVUS_PERSONA_ID={persona_id}")
+    return persona_id
+
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+# Kept outside data/, which is served publicly under /static.
+MANIFEST_PATH = Path(__file__).resolve().parent / ".tavus_manifest.json"
+SYNC_CONCURRENCY = 4
+POLL_INITIAL_SECONDS = 2.0
+POLL_MAX_SECONDS = 30.0
+POLL_TIMEOUT_SECONDS = 900.0
+
+
+class SyncError(RuntimeError):
+    pass
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except FileNotFoundError:
+        return {"documents": {}, "persona": {}}
+
+
+def _save_manifest(manifest: dict) -> None:
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, MANIFEST_PATH)
+
+
+async def _wait_until_ready(document_id: str, doc_name: str) -> None:
+    """Poll processing status with jittered exponential backoff."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + POLL_TIMEOUT_SECONDS
+    delay = POLL_INITIAL_SECONDS
+    while True:
+        resp = await tavus_request(
+            "GET", f"/v2/documents/{document_id}", idempotent=True
+        )
+        if not resp.is_success:
+            raise SyncError(
+                f"status check for {doc_name} failed: {resp.status_code} {resp.text}"
+            )
+        status = resp.json().get("status")
+        if status == "ready":
+            return
+        if status in ("error", "failed"):
+            raise SyncError(f"Tavus could not process {doc_name}: {resp.text}")
+        if loop.time() + delay > deadline:
+            raise SyncError(f"{doc_name} still {status} after timeout")
+        await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+        delay = min(delay * 2, POLL_MAX_SECONDS)
+
+
+async def _sync_document(
+    filename: str, digest: str, manifest: dict, limit: asyncio.Semaphore
+) -> None:
+    doc_name = filename.removesuffix(".txt")
+    async with limit:
         payload = {
-            "persona_name": "Maya - UCSF Egg Retrieval Companion",
-            "system_prompt": SYSTEM_PROMPT,
-            "default_replica_id": TAVUS_REPLICA_ID,
-            "layers": {
-                "llm": {
-                    "tools": TOOLS,
-                    "extra_body": {"temperature": 0.2, "top_p": 0.9},
-                },
-                "perception": {"perception_model": "raven-1"},
-            },
+            "document_name": doc_name,
+            # The digest in the URL keeps Tavus from reusing a cached copy.
+            "document_url": f"{WEBHOOK_URL}/static/{filename}?v={digest[:12]}",
+            "tags": [DOCUMENT_TAG],
         }
-
-        resp = await client.post(
-            f"{TAVUS_BASE}/v2/personas", json=payload, headers=HEADERS
+        resp = await tavus_request(
+            "POST", "/v2/documents", json=payload, timeout=60
         )
         if not resp.is_success:
-            print(
-                f"Persona creation failed: {resp.status_code} {resp.text}",
-                file=sys.stderr,
+            raise SyncError(
+                f"uploading {doc_name} failed: {resp.status_code} {resp.text}"
             )
-            sys.exit(1)
-        persona_id = resp.json()["persona_id"]
-        print(f"Persona created: {persona_id}")
-        print(f"\nAdd to .env:\n    TAVUS_PERSONA_ID={persona_id}")
-        return persona_id
+        document_id = resp.json()["document_id"]
+        print(f"Uploaded {doc_name} → {document_id}, waiting for processing")
+    await _wait_until_ready(document_id, doc_name)
+
+    previous = manifest["documents"].get(filename)
+    manifest["documents"][filename] = {
+        "sha256": digest,
+        "document_id": document_id,
+    }
+    _save_manifest(manifest)
+    print(f"Ready: {doc_name}")
+    if previous:
+        await _delete_document(previous["document_id"], doc_name)
+
+
+async def _delete_document(document_id: str, doc_name: str) -> None:
+    resp = await tavus_request(
+        "DELETE", f"/v2/documents/{document_id}", idempotent=True
+    )
+    if resp.is_success or resp.status_code == 404:
+        print(f"Retired previous version of {doc_name} ({document_id})")
+    else:
+        print(
+            f"WARNING: could not delete {document_id}: {resp.status_code}",
+            file=sys.stderr,
+        )
+
+
+async def _sync_persona(manifest: dict, force: bool) -> None:
+    payload = _persona_payload()
+    digest = _sha256(json.dumps(payload, sort_keys=True).encode())
+    persona = manifest["persona"]
+    persona_id = persona.get("persona_id") or TAVUS_PERSONA_ID
+    if not force and persona.get("sha256") == digest:
+        print(f"Persona {persona_id} is up to date")
+        return
+
+    patch = [
+        {"op": "replace", "path": f"/{key}", "value": payload[key]}
+        for key in ("persona_name", "system_prompt", "default_replica_id")
+    ] + [
+        {"op": "replace", "path": f"/layers/{layer}", "value": value}
+        for layer, value in payload["layers"].items()
+    ]
+    resp = await tavus_request(
+        "PATCH", f"/v2/personas/{persona_id}", json=patch, timeout=60
+    )
+    if resp.is_success:
+        print(f"Persona {persona_id} updated")
+    elif resp.status_code == 404:
+        persona_id = await create_persona()
+    else:
+        raise SyncError(
+            f"updating persona failed: {resp.status_code} {resp.text}"
+        )
+    manifest["persona"] = {"persona_id": persona_id, "sha256": digest}
+    _save_manifest(manifest)
+
+
+async def sync(force: bool = False) -> None:
+    """Bring Tavus in line with data/ and the persona definition."""
+    manifest = _load_manifest()
+    files = {
+        path.name: _sha256(path.read_bytes())
+        for path in sorted(DATA_DIR.glob("*.txt"))
+    }
+    changed = [
+        (filename, digest)
+        for filename, digest in files.items()
+        if force
+        or manifest["documents"].get(filename, {}).get("sha256") != digest
+    ]
+    removed = [f for f in manifest["documents"] if f not in files]
+    print(
+        f"{len(files)} documents: {len(changed)} to upload, "
+        f"{len(removed)} to remove, {len(files) - len(changed)} unchanged"
+    )
+
+    limit = asyncio.Semaphore(SYNC_CONCURRENCY)
+    results = await asyncio.gather(
+        *(_sync_document(f, d, manifest, limit) for f, d in changed),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+
+    for filename in removed:
+        entry = manifest["documents"].pop(filename)
+        await _delete_document(entry["document_id"], filename)
+        _save_manifest(manifest)
+
+    await _sync_persona(manifest, force)
+    build_index()
+
+    if errors:
+        for error in errors:
+            print(f"ERROR: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+async def _run(command) -> None:
+    try:
+        await command()
+    finally:
+        await close_client()
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
+        print("  `python tavus_setup.py sync [--force]` to upload changed")
+        print("    documents and create or update the persona in one run")
+        print("or the original two steps:")
         print("  first run `python tavus_setup.py upload`")
         print("  then run `python tavus_setup.py persona`")
+        print("  `python tavus_setup.py index` rebuilds the local index")
         sys.exit(1)
 
     command = sys.argv[1]
 
     if command == "upload":
-        asyncio.run(upload_documents())
+        asyncio.run(_run(upload_documents))
     elif command == "persona":
-        asyncio.run(create_persona())
+        asyncio.run(_run(create_persona))
+    elif command == "sync":
+        force = "--force" in sys.argv[2:]
+        asyncio.run(_run(lambda: sync(force)))
+    elif command == "index":
+        index = build_index()
+        print(
+            f"Indexed {len(index.sections)} sections, "
+            f"{len(index.term_ids)} terms"
+        )
     else:
         print("Unknown command")
@@ -1,7 +1,12 @@
 import { useEffect, useRef, useState, useCallback } from "react";
 import DailyIframe, { type DailyCall } from "@daily-co/daily-js";
+import axios from "axios";
 import type { EmotionState, EscalationEvent } from "../types";
-import { logEscalation, logPerception } from "../services/api";
+import { logEscalation, logPerception, logUtterances } from "../services/api";
+
+// Utterances waiting to be sent beyond this mean the backend is not
+// keeping up; the summary is then computed from the final transcript.
+const MAX_PENDING_UTTERANCES = 200;
 
 function mapToEmotion(emotionalContext: string): EmotionState {
   const s = emotionalContext.toLowerCase();
@@ -27,6 +32,14 @@ export function useDailySession(
   // leaveCall() and on server-side disconnect; endedRef ensures onSessionEnded runs once.
   const endedRef = useRef(false);
   const emotionLogRef = useRef<{ emotion: string }[]>([]);
+  // Live utterances are numbered and sent one request at a time, in order;
+  // a failed request is retried with the next utterance.
+  const utteranceSeqRef = useRef(0);
+  const pendingUtterancesRef = useRef<
+    { seq: number; role: string; content: string }[]
+  >([]);
+  const sendingUtterancesRef = useRef(false);
+  const liveSummaryOffRef = useRef(false);
 
   useEffect(() => {
     if (!conversationUrl) return;
@@ -38,6 +51,27 @@ export function useDailySession(
     const call = DailyIframe.createCallObject();
     callRef.current = call;
 
+    const sendUtterances = () => {
+      if (sendingUtterancesRef.current || liveSummaryOffRef.current) return;
+      const batch = pendingUtterancesRef.current.slice();
+      if (batch.length === 0) return;
+      sendingUtterancesRef.current = true;
+      logUtterances(conversationId, batch)
+        .then(() => {
+          pendingUtterancesRef.current.splice(0, batch.length);
+          sendingUtterancesRef.current = false;
+          sendUtterances();
+        })
+        .catch((err) => {
+          sendingUtterancesRef.current = false;
+          // 409: the backend lost its live state; stop feeding it.
+          if (axios.isAxiosError(err) && err.response?.status === 409) {
+            liveSummaryOffRef.current = true;
+            pendingUtterancesRef.current = [];
+          }
+        });
+    };
+
     call.on("joined-meeting", () => setIsConnected(true));
     call.on("left-meeting", () => {
       setIsConnected(false);
@@ -93,6 +127,26 @@ export function useDailySession(
         }
       }
 
+      // Feed the backend's live summarizer so the post-call summary only has
+      // to reconcile the final transcript.
+      if (
+        msg.event_type === "conversation.utterance" &&
+        msg.properties?.speech
+      ) {
+        if (!liveSummaryOffRef.current) {
+          pendingUtterancesRef.current.push({
+            seq: utteranceSeqRef.current++,
+            role: msg.properties.role,
+            content: msg.properties.speech,
+          });
+          if (pendingUtterancesRef.current.length > MAX_PENDING_UTTERANCES) {
+            liveSummaryOffRef.current = true;
+            pendingUtterancesRef.current = [];
+          }
+          sendUtterances();
+        }
+      }
+
       if (
         msg.event_type === "conversation.utterance" &&
         msg.properties?.role === "user" &&
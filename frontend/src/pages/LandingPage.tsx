@@ -1,10 +1,13 @@
-import { useState } from "react";
+import { useRef, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { createConversation } from "../services/api";
 
 export default function LandingPage() {
   const [name, setName] = useState("");
   const [loading, setLoading] = useState(false);
+  // Reused when a failed start is retried, so a request that reached the
+  // server but whose response was lost does not open a second session.
+  const idempotencyKey = useRef(crypto.randomUUID());
   const navigate = useNavigate();
 
   async function handleStart(e: React.FormEvent) {
@@ -12,7 +15,10 @@ export default function LandingPage() {
     if (!name.trim() || loading) return;
     setLoading(true);
     try {
-      const result = await createConversation(name.trim());
+      const result = await createConversation(
+        name.trim(),
+        idempotencyKey.current,
+      );
       navigate("/session", {
         state: {
           conversationId: result.conversationId,
@@ -76,7 +82,10 @@ export default function LandingPage() {
                 type="text"
                 placeholder="e.g. Sarah"
                 value={name}
-                onChange={(e) => setName(e.target.value)}
+                onChange={(e) => {
+                  setName(e.target.value);
+                  idempotencyKey.current = crypto.randomUUID();
+                }}
                 className="w-full px-4 py-3 bg-ucsf-bg border border-ucsf-border rounded-xl text-ucsf-heading placeholder:text-ucsf-muted focus:outline-none focus:ring-2 focus:ring-ucsf-teal/40 focus:border-ucsf-teal transition"
               />
             </div>
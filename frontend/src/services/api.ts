@@ -5,10 +5,15 @@ const api = axios.create({ baseURL: "/api" });
 
 export async function createConversation(
   patientName: string,
+  idempotencyKey?: string,
 ): Promise<{ conversationId: string; conversationUrl: string }> {
-  const { data } = await api.post("/conversations", {
-    patient_name: patientName,
-  });
+  const { data } = await api.post(
+    "/conversations",
+    { patient_name: patientName },
+    idempotencyKey
+      ? { headers: { "Idempotency-Key": idempotencyKey } }
+      : undefined,
+  );
   return {
     conversationId: data.conversation_id,
     conversationUrl: data.conversation_url,
@@ -40,6 +45,15 @@ export async function logPerception(
   });
 }
 
+export async function logUtterances(
+  conversationId: string,
+  utterances: { seq: number; role: string; content: string }[],
+) {
+  await api.post(`/conversations/${conversationId}/utterances`, {
+    utterances,
+  });
+}
+
 export async function getConversationSummary(
   conversationId: string,
 ): Promise<SummaryData | null> {